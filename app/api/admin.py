@@ -0,0 +1,97 @@
+from fastapi import APIRouter, Depends, HTTPException
+# 관리자용 API 라우터, 의존성 주입(로그인 사용자), 에러 응답
+from fastapi.responses import StreamingResponse
+# 만들어진 엑셀 파일을 조각(chunk) 단위로 흘려 보내는 응답
+from starlette.concurrency import run_in_threadpool
+# 엑셀 생성(DB 조회 + 파일 쓰기)은 오래 걸리므로 이벤트 루프가 아닌 스레드에서 실행
+from sqlalchemy import select
+import asyncio, os, tempfile
+from datetime import datetime
+from database import engine
+# 동기 엔진으로 DB 커서를 열어 행을 조금씩 읽음 (sync/async 모드 모두 존재)
+import models
+from utils import get_current_user
+# 로그인한 사용자 확인
+from config import ADMIN_USER_IDS, ADMIN_EXPORT_CHUNK_ROWS
+from metrics import track
+# 엑셀 생성 시간을 /metrics에 따로 기록
+# 관리자 사용자 id 목록, DB에서 한 번에 읽어올 행 수
+
+router = APIRouter(prefix="/admin", tags=["admin"])
+
+# 시트 이름 → (제목 행, 조회할 컬럼). loge_excel.py의 data_log.xlsx와 같은 시트 구성
+# (Users 시트에는 비밀번호 해시를 넣지 않음)
+EXPORT_SHEETS = {
+    "Users": (
+        ["id", "username", "email", "created_at"],
+        [models.User.id, models.User.username, models.User.email, models.User.created_at],
+    ),
+    "LoginHistory": (
+        ["id", "user_id", "login_time"],
+        [models.LoginHistory.id, models.LoginHistory.user_id, models.LoginHistory.login_time],
+    ),
+    "Comments": (
+        ["id", "post_id", "user_id", "content", "create_date"],
+        [models.Comment.id, models.Comment.post_id, models.Comment.user_id, models.Comment.content, models.Comment.create_date],
+    ),
+}
+
+_export_lock = asyncio.Lock()
+# 엑셀 생성은 한 번에 하나만 (여러 번 눌러도 DB/디스크에 같은 작업이 겹치지 않게)
+
+def require_admin(user=Depends(get_current_user)):
+    # 로그인한 사용자 중 ADMIN_USER_IDS에 있는 계정만 허용 (설정하지 않으면 아무도 허용하지 않음)
+    if user.id not in ADMIN_USER_IDS:
+        raise HTTPException(status_code=403, detail="관리자만 사용할 수 있습니다.")
+    return user
+
+def build_export_workbook(path: str):
+    # DB → 엑셀 파일(path) 생성. 스레드에서 실행됨
+    from openpyxl import Workbook
+    from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+    # openpyxl은 이 기능을 쓸 때만 import
+    wb = Workbook(write_only=True)
+    # write_only → 행을 메모리에 쌓지 않고 임시 파일로 바로 씀 (행 수와 상관없이 메모리 일정)
+    with engine.connect() as conn:
+        for sheet, (header, columns) in EXPORT_SHEETS.items():
+            ws = wb.create_sheet(sheet)
+            ws.append(header)
+            result = conn.execution_options(yield_per=ADMIN_EXPORT_CHUNK_ROWS).execute(
+                select(*columns).order_by(columns[0])
+            )
+            # yield_per → DB 커서에서 ADMIN_EXPORT_CHUNK_ROWS 행씩만 가져옴
+            for row in result:
+                ws.append([ILLEGAL_CHARACTERS_RE.sub("", value) if isinstance(value, str) else value for value in row])
+                # 엑셀이 허용하지 않는 제어 문자가 본문에 있으면 저장이 실패하므로 제거
+    wb.save(path)
+
+def iter_file(path: str, chunk_size: int = 64 * 1024):
+    # 파일을 chunk_size씩 읽어 전송하고, 다 보내면(또는 연결이 끊기면) 임시 파일 삭제
+    try:
+        with open(path, "rb") as f:
+            while chunk := f.read(chunk_size):
+                yield chunk
+    finally:
+        os.remove(path)
+
+@router.get("/export.xlsx")
+async def export_xlsx(admin=Depends(require_admin)):
+    # Users / LoginHistory / Comments 시트를 DB에서 새로 만들어 다운로드
+    # xlsx는 zip 형식이라 마지막에 목차를 써야 완성되므로, 임시 파일에 다 만든 뒤 조각 단위로 전송한다
+    if _export_lock.locked():
+        raise HTTPException(status_code=429, detail="이미 엑셀 내보내기가 진행 중입니다. 잠시 후 다시 시도하세요.")
+    async with _export_lock:
+        fd, path = tempfile.mkstemp(prefix="export_", suffix=".xlsx")
+        os.close(fd)
+        try:
+            with track("excel"):
+                await run_in_threadpool(build_export_workbook, path)
+        except BaseException:
+            os.remove(path)
+            raise
+    filename = f"data_log_{datetime.utcnow():%Y%m%d_%H%M%S}.xlsx"
+    return StreamingResponse(
+        iter_file(path),  # 동기 generator → Starlette가 스레드에서 읽으므로 이벤트 루프를 막지 않음
+        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"', "Content-Length": str(os.path.getsize(path))},
+    )
@@ -1,13 +1,26 @@
-# FastAPI에서 라우터, 의존성 주입, HTTP 예외 처리 기능 import
-from fastapi import APIRouter, Depends, HTTPException
-# SQLAlchemy 세션(Session) 사용
-from sqlalchemy.orm import Session
-# DB 세션 가져오기 (get_db 함수)
-from database import get_db
-# Comment 모델 가져오기 (ORM 클래스)
-from models import Comment
+# FastAPI에서 라우터, 의존성 주입, HTTP 예외 처리, 쿼리 파라미터 검증 기능 import
+from fastapi import APIRouter, Depends, HTTPException, Query
+# select/update 쿼리 작성, (게시글 id, 작성일, id) 키셋 비교 조건용
+from sqlalchemy import select, update, tuple_
+# 외래키 검사 실패(없는 사용자가 작성한 댓글)
+from sqlalchemy.exc import IntegrityError
+# 감사 로그 기록(큐가 가득 차면 대기/디스크 쓰기)을 이벤트 루프가 아닌 스레드풀에서 실행
+from starlette.concurrency import run_in_threadpool
+# DB 세션 가져오기 (get_db 함수, 세션 타입: sync/async 모드 모두 await 해서 사용)
+from database import get_db, get_read_db, DBSession
+# 댓글 수가 바뀐 게시글을 조회 캐시에서 제거
+from cache import invalidate_post_cache
+# 작성자/IP별 댓글 작성 수 제한 (넘으면 429)
+from rate_limit import comment_rate_limit
+# Comment, PostModel 모델 가져오기 (ORM 클래스)
+from models import Comment, PostModel
 # 댓글 요청/응답 스키마 가져오기
-from schemas import CommentCreate, CommentResponse
+from schemas import CommentCreate, CommentResponse, CommentPage
+# 댓글 목록 cursor 생성/해석 함수
+from pagination import encode_cursor, decode_cursor
+# Pydantic 검증 없이 행 데이터를 바로 JSON 바이트로 응답 (목록 빠른 경로)
+from json_response import json_response
+from config import FAST_JSON_RESPONSES
 # 댓글 생성/수정 시간 기록용 datetime
 from datetime import datetime
 from loge_excel import add_comment as excel_add_comment
@@ -18,9 +31,12 @@ from loge_excel import add_comment as excel_add_comment
 # tags=["comments"] → Swagger 문서에서 'comments' 카테고리로 묶임
 router = APIRouter(prefix="/comments", tags=["comments"])
 
+# 빠른 경로에서 조회할 컬럼: CommentResponse 필드와 같은 이름, 같은 순서
+_COMMENT_RESPONSE_COLUMNS = [getattr(Comment, name) for name in CommentResponse.model_fields]
+
 # 댓글 작성 API
-@router.post("/", response_model=CommentResponse)  # POST 요청, 응답 모델 CommentResponse 사용
-def create_comment(comment: CommentCreate, db: Session = Depends(get_db)):
+@router.post("/", response_model=CommentResponse, dependencies=[Depends(comment_rate_limit)])  # POST 요청, 응답 모델 CommentResponse 사용
+async def create_comment(comment: CommentCreate, db: DBSession = Depends(get_db)):
     #클라이언트가 보내는 댓글 데이터를 받아 DB에 저장 후CommentResponse 형태로 반환
 
     # 댓글 ORM 객체 생성 (DB에 들어갈 데이터 준비)
@@ -31,52 +47,98 @@ def create_comment(comment: CommentCreate, db: Session = Depends(get_db)):
         create_date=datetime.utcnow()     # 댓글 생성 시각 기록
     )
     db.add(db_comment)      # DB 세션에 추가 (아직 DB에 반영 전)
-    db.commit()             # DB에 실제로 저장(commit)
-    db.refresh(db_comment)  # 새로 저장된 객체 갱신 (DB 반영 값 가져오기)
-    excel_add_comment(comment.post_id, comment.user_id, comment.content) # 엑셀자동저장
+    # 게시글의 댓글 수를 같은 트랜잭션에서 1 증가 (목록에서 COUNT 쿼리 없이 댓글 수 제공)
+    result = await db.execute(
+        update(PostModel)
+        .where(PostModel.id == comment.post_id)
+        .values(comment_count=PostModel.comment_count + 1)
+        .execution_options(synchronize_session=False)
+    )
+    if not result.rowcount:  # 게시글이 없으면 댓글도 저장하지 않음
+        await db.rollback()
+        raise HTTPException(status_code=404, detail="게시글을 찾을 수 없습니다.")
+    try:
+        await db.commit()             # DB에 실제로 저장(commit)
+    except IntegrityError:            # 외래키 검사(PRAGMA foreign_keys=ON) → 없는 사용자 id면 저장하지 않음
+        await db.rollback()
+        raise HTTPException(status_code=404, detail="사용자를 찾을 수 없습니다.")
+    await invalidate_post_cache(comment.post_id)  # 게시글 응답의 comment_count가 바뀌었으므로 캐시 제거
+    await db.refresh(db_comment)  # 새로 저장된 객체 갱신 (DB 반영 값 가져오기)
+    await run_in_threadpool(excel_add_comment, comment.post_id, comment.user_id, comment.content) # 엑셀자동저장
     return db_comment       # 클라이언트에게 CommentResponse 형태로 반환
     
-# 특정 게시글 댓글 조회 API
-@router.get("/{post_id}", response_model=list[CommentResponse])  # GET 요청, 댓글 리스트 반환
-def read_comments(post_id: int, db: Session = Depends(get_db)):
-    # 특정 게시글(post_id)에 달린 모든 댓글 조회
+# 특정 게시글 댓글 조회 API (cursor 페이지네이션)
+@router.get("/{post_id}", response_model=CommentPage)  # GET 요청, 댓글 페이지 반환
+async def read_comments(
+    post_id: int,
+    limit: int = Query(50, ge=1, le=200),  # 한 페이지에 가져올 댓글 수
+    cursor: str | None = None,             # 이전 응답의 next_cursor, 없으면 첫 페이지
+    db: DBSession = Depends(get_read_db),  # 조회 전용 → 복제본이 있으면 복제본 사용
+):
+    # 특정 게시글(post_id)에 달린 댓글을 오래된 순으로 limit개씩 조회
 
-    # DB에서 post_id가 일치하는 모든 댓글 조회
-    comments = db.query(Comment).filter(Comment.post_id == post_id).all()
-    # 댓글이 없으면 HTTP 404 예외 발생
-    if not comments:
-        raise HTTPException(status_code=404, detail="댓글이 없습니다.")
-    # 조회된 댓글 리스트 반환
-    return comments
+    # (post_id, create_date, id) 인덱스를 그대로 따라 읽는 조회
+    query = (
+        select(Comment)
+        .where(Comment.post_id == post_id)
+        .order_by(Comment.create_date, Comment.id)
+    )
+    if cursor:
+        last_date, last_id = decode_cursor(cursor, datetime.fromisoformat, int)
+        query = query.where(tuple_(Comment.create_date, Comment.id) > (last_date, last_id))
+        # 마지막으로 본 댓글 다음부터 조회
+    if FAST_JSON_RESPONSES:
+        # 빠른 경로: 필요한 컬럼만 tuple로 조회해서 바로 JSON 바이트로 응답
+        rows = (await db.execute(query.with_only_columns(*_COMMENT_RESPONSE_COLUMNS).limit(limit + 1))).all()
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1].create_date, rows[-1].id)
+        return json_response({"items": [row._asdict() for row in rows], "next_cursor": next_cursor})
+    comments = (await db.scalars(query.limit(limit + 1))).all()  # 다음 페이지 여부 확인용으로 1개 더 조회
+    next_cursor = None
+    if len(comments) > limit:
+        comments = comments[:limit]
+        next_cursor = encode_cursor(comments[-1].create_date, comments[-1].id)
+    # 댓글이 없어도 404 대신 빈 페이지 반환
+    return {"items": comments, "next_cursor": next_cursor}
 
 # 댓글 수정 API
 @router.put("/{comment_id}", response_model=CommentResponse)  # PUT 요청, 수정된 댓글 반환
-def update_comment(comment_id: int, content: str, db: Session = Depends(get_db)):
+async def update_comment(comment_id: int, content: str, db: DBSession = Depends(get_db)):
     """
     comment_id에 해당하는 댓글의 내용을 수정
     """
     # DB에서 해당 댓글 조회
-    comment = db.query(Comment).filter(Comment.id == comment_id).first()
+    comment = await db.get(Comment, comment_id)
     if not comment:  # 댓글이 없으면 404 예외 발생
         raise HTTPException(status_code=404, detail="댓글을 찾을 수 없습니다.")
     
     comment.content = content            # 댓글 내용 수정
     comment.create_date = datetime.utcnow()  # 수정 시각 갱신
-    db.commit()                          # DB에 반영
-    db.refresh(comment)                  # 수정된 객체 새로고침
+    await db.commit()                    # DB에 반영
+    await db.refresh(comment)            # 수정된 객체 새로고침
     return comment                       # 클라이언트에게 반환
 
 # 댓글 삭제 API
 @router.delete("/{comment_id}")  # DELETE 요청
-def delete_comment(comment_id: int, db: Session = Depends(get_db)):
+async def delete_comment(comment_id: int, db: DBSession = Depends(get_db)):
     """
     comment_id에 해당하는 댓글 삭제
     """
     # DB에서 댓글 조회
-    comment = db.query(Comment).filter(Comment.id == comment_id).first()
+    comment = await db.get(Comment, comment_id)
     if not comment:  # 댓글이 없으면 404 예외 발생
         raise HTTPException(status_code=404, detail="댓글을 찾을 수 없습니다.")
     
-    db.delete(comment)  # DB에서 삭제
-    db.commit()         # 삭제 반영
+    await db.delete(comment)  # DB에서 삭제
+    # 게시글의 댓글 수를 같은 트랜잭션에서 1 감소
+    await db.execute(
+        update(PostModel)
+        .where(PostModel.id == comment.post_id)
+        .values(comment_count=PostModel.comment_count - 1)
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()         # 삭제 반영
+    await invalidate_post_cache(comment.post_id)  # 댓글 수 변경 → 게시글 캐시 제거
     return {"message": "댓글이 삭제되었습니다."}  # 성공 메시지 반환
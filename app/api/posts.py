@@ -1,13 +1,31 @@
-from fastapi import APIRouter, Depends, HTTPException
-# FastAPI에서 API 경로 그룹화, 의존성 주입, 에러 처리에 필요한 클래스와 함수들을 불러온다
-from sqlalchemy.orm import Session
-# SQLAlchemy의 ORM 기능 중 데이터베이스와의 통신 및 쿼리 실행을 담당하는 Session 클래스를 불러온다
-from database import get_db
-# 데이터베이스 연결 및 세션을 생성하고 관리하는 함수를 'database.py' 파일에서 불러온다
+from fastapi import APIRouter, Depends, HTTPException, Query, Header, Response
+# FastAPI에서 API 경로 그룹화, 의존성 주입, 에러 처리, 쿼리 파라미터 검증, 요청 헤더 읽기, 응답 헤더 설정에 필요한 클래스와 함수들을 불러온다
+from sqlalchemy import select, delete, tuple_, func
+# select → 조회 쿼리 작성, tuple_ → (작성일, id) 두 컬럼을 한 번에 비교하는 키셋 조건을 만들 때 사용
+# func.substr → 본문 앞부분(snippet)만 DB에서 잘라서 가져올 때 사용
+# delete → 객체를 불러오지 않고 DELETE 문 한 번으로 삭제
+from sqlalchemy.exc import IntegrityError
+# 외래키 검사 실패(작성자가 없는 게시글 등)
+from sqlalchemy.orm import joinedload, raiseload
+# joinedload → 작성자(owner, user)를 같은 쿼리에서 JOIN으로 함께 조회
+# raiseload → 미리 불러오지 않은 관계에 접근하면 에러 (응답을 만들다 행마다 추가 쿼리(N+1)가 나가는 것을 막음)
+from database import get_db, get_read_db, DBSession, SQLALCHEMY_DATABASE_URL
+# 데이터베이스 연결 및 세션을 생성하고 관리하는 함수와 세션 타입을 'database.py' 파일에서 불러온다 (sync/async 모드 모두 await 해서 사용)
 import models, schemas
 # 데이터베이스 테이블 구조(ORM 모델)가 정의된 'models.py'와 데이터 검증/직렬화 스키마(Pydantic)가 정의된 'schemas.py' 모듈을 불러옵니다
 from datetime import datetime
 # 게시글 작성일 등 시간 정보를 기록하기 위해 파이썬 내장 datetime 모듈을 불러온다
+from pagination import encode_cursor, decode_cursor
+# 목록 조회 cursor를 만들고 해석하는 함수
+from http_cache import make_etag, etag_matches, not_modified_since, cache_headers, not_modified
+# ETag / Last-Modified 조건부 요청 처리 (바뀐 게 없으면 304)
+from cache import post_cache, post_cache_key, invalidate_post_cache
+# 자주 보는 게시글을 직렬화된 바이트로 보관하는 조회 캐시
+from json_response import json_response
+# Pydantic 검증 없이 행 데이터를 바로 JSON 바이트로 응답 (목록 빠른 경로)
+from config import FAST_JSON_RESPONSES
+from search import search_statement, render_snippet
+# 게시글/댓글 전문 검색 (SQLite FTS5). import 시 posts/comments 테이블 생성에 검색 인덱스 DDL이 연결됨
 
 # /posts 경로로 시작하는 API들을 묶어서 관리할 수 있는 라우터 객체를 생성한다
 router = APIRouter(prefix="/posts", tags=["posts"])
@@ -15,7 +33,7 @@ router = APIRouter(prefix="/posts", tags=["posts"])
 # 1. 게시글 생성 (Create)
 @router.post("/", response_model=schemas.PostResponse)
 # HTTP POST 요청이 기본 경로로 들어왔을 때 이 함수를 실행하도록 지정하며, 응답 데이터를 PostResponse 스키마로 검증하고 반환하도록 설정한다
-def create_post(post: schemas.PostCreate, db: Session = Depends(get_db)):
+async def create_post(post: schemas.PostCreate, db: DBSession = Depends(get_db)):
     # 게시글 생성 함수를 정의한다
     # 클라이언트 요청 데이터, DB 세션(get_db를 통해 주입)을 매개변수로 받는다.
     new_post = models.PostModel(
@@ -31,46 +49,233 @@ def create_post(post: schemas.PostCreate, db: Session = Depends(get_db)):
     )
     db.add(new_post)
     # 생성된 새 게시글 객체(new_post)를 SQLAlchemy 세션에 추가하여 DB에 저장할 준비
-    db.commit()
-    # 세션에 추가된 변경 사항을 실제 데이터베이스에 영구적으로 저장
-    db.refresh(new_post)
+    try:
+        await db.commit()
+        # 세션에 추가된 변경 사항을 실제 데이터베이스에 영구적으로 저장
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(status_code=400, detail="작성자(사용자)가 존재하지 않습니다.")
+        # 외래키 검사(PRAGMA foreign_keys=ON) → 없는 사용자 id로는 게시글을 저장하지 않음
+    await db.refresh(new_post)
     # DB에 저장된 후 자동 생성된 정보를 포함하여 'new_post' 객체를 최신 상태로 갱신
     return new_post
     # 최종적으로 저장 및 갱신된 게시글 객체를 클라이언트에게 응답으로 반환한다
 
-# 2. 게시글 전체 조회 (Read All)
-@router.get("/", response_model=list[schemas.PostResponse])
-# HTTP GET 요청이 기본 경로(/posts)로 들어왔을 때 이 함수를 실행하도록 지정하며, 응답 데이터를 PostResponse 객체의 리스트로 반환하도록 설정한다
-def get_posts(db: Session = Depends(get_db)):
-    # 게시글 전체 조회 함수를 정의합니다.
-    posts = db.query(models.PostModel).all()
-    # DB 세션(db)을 이용해 PostModel 테이블의 모든 레코드(게시글)를 조회하여 리스트 형태로 저장
-    return posts
-    # 조회된 모든 게시글을 담은 리스트를 응답으로 반환합니다.
+# 목록에서 고를 수 있는 필드: PostResponse 필드와 같은 이름, 같은 순서
+_POST_FIELDS = list(schemas.PostResponse.model_fields)
+
+def _list_fields(fields: str | None, snippet: int | None) -> list | None:
+    # 목록 응답에 넣을 필드 목록. fields, snippet 둘 다 없으면 None (기존 전체 응답)
+    if fields is None and snippet is None:
+        return None
+    if fields is None:
+        return [name for name in _POST_FIELDS if name != "content"]
+        # snippet만 요청하면 본문 전체(content)는 빼고 응답
+    names = list(dict.fromkeys(name.strip() for name in fields.split(",") if name.strip()))
+    if not names:
+        raise HTTPException(status_code=400, detail="fields에 필드를 하나 이상 지정하세요.")
+    unknown = [name for name in names if name not in _POST_FIELDS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"알 수 없는 필드입니다: {', '.join(unknown)} (사용 가능: {', '.join(_POST_FIELDS)})")
+    return names
+
+def _post_etag(post_id: int, updated_at: datetime) -> str:
+    # 게시글 하나의 ETag: (id, 마지막 변경 시각)이 같으면 응답 내용도 같다
+    return make_etag(post_id, updated_at)
+
+def _page_etag(cursor: str | None, limit: int, versions: list, variant: str = "") -> str:
+    # 목록 페이지의 ETag (컬렉션 버전)
+    # 같은 cursor/limit에서 페이지에 들어갈 게시글 id와 각 변경 시각, 다음 페이지 유무가 모두 같으면 같은 ETag
+    # → 글 추가/삭제/수정, 댓글 수 변경 중 하나라도 있으면 ETag가 바뀜
+    # variant: fields/snippet 조합. 응답 모양이 다르면 ETag도 달라야 함
+    return make_etag(cursor or "", limit, variant, len(versions) > limit, *(f"{post_id}:{updated_at}" for post_id, updated_at in versions[:limit]))
+
+# 2. 게시글 목록 조회 (Read All, cursor 페이지네이션)
+@router.get("/", response_model=schemas.PostPage)
+# HTTP GET 요청이 기본 경로(/posts)로 들어왔을 때 이 함수를 실행하며, 최신 글부터 limit개와 다음 페이지 cursor를 반환한다
+async def get_posts(
+    response: Response,
+    # ETag, Cache-Control 응답 헤더 설정용
+    limit: int = Query(20, ge=1, le=100),
+    # 한 페이지에 가져올 게시글 수 (1~100)
+    cursor: str | None = None,
+    # 이전 응답의 next_cursor. 없으면 첫 페이지
+    fields: str | None = None,
+    # 응답에 넣을 필드만 쉼표로 지정 (예: fields=id,title,create_date,owner_id). 없으면 전체 필드
+    snippet: int | None = Query(None, ge=1, le=1000),
+    # 본문 앞부분 N글자를 snippet 필드로 추가 (본문 전체는 DB에서 읽지 않음)
+    if_none_match: str | None = Header(None),
+    # 이전에 받은 ETag. 페이지가 그대로면 304 응답
+    db: DBSession = Depends(get_read_db),  # 조회 전용 → 복제본이 있으면 복제본 사용
+):
+    # 게시글 목록 조회 함수를 정의합니다.
+    # 목록은 글이 삭제되어도 최신 변경 시각이 그대로일 수 있으므로 Last-Modified 대신 ETag만 사용
+    query = select(models.PostModel).order_by(models.PostModel.create_date.desc(), models.PostModel.id.desc())
+    # (작성일, id) 내림차순 정렬 → ix_posts_create_date_id 인덱스를 그대로 역순으로 읽는다
+    if cursor:
+        last_date, last_id = decode_cursor(cursor, datetime.fromisoformat, int)
+        query = query.where(tuple_(models.PostModel.create_date, models.PostModel.id) < (last_date, last_id))
+        # 마지막으로 본 게시글보다 "뒤"에 있는 것만 조회 (OFFSET 없이 인덱스에서 바로 시작 위치를 찾음)
+    selected = _list_fields(fields, snippet)
+    variant = f"{','.join(selected)}:{snippet or ''}" if selected is not None else ""
+    if if_none_match:
+        # 조건부 요청이면 먼저 (id, 변경 시각)만 조회해서 ETag 비교 → 같으면 본문(content) 조회/직렬화 없이 304
+        versions = (await db.execute(
+            query.with_only_columns(models.PostModel.id, models.PostModel.updated_at).limit(limit + 1)
+        )).all()
+        headers = cache_headers(_page_etag(cursor, limit, versions, variant))
+        if etag_matches(if_none_match, headers["ETag"]):
+            return not_modified(headers)
+    if selected is not None or FAST_JSON_RESPONSES:
+        # 컬럼 지정 경로: ORM 객체 대신 필요한 컬럼만 tuple로 조회 → 행마다 Pydantic 검증 없이 바로 JSON 바이트
+        # fields/snippet을 쓰면 본문(Text) 컬럼을 읽지 않으므로 긴 글이 많은 게시판에서 메모리와 응답 크기가 크게 줄어듦
+        output = selected if selected is not None else _POST_FIELDS
+        names = list(dict.fromkeys([*output, "id", "create_date", "updated_at"]))
+        # cursor(작성일, id)와 ETag(변경 시각)에 필요한 컬럼은 응답에 없어도 조회
+        columns = [getattr(models.PostModel, name) for name in names]
+        if snippet:
+            columns.append(func.substr(models.PostModel.content, 1, snippet).label("snippet"))
+            output = [*output, "snippet"]
+            # substr은 바이트가 아니라 글자 수 기준이라 한글도 중간에서 잘리지 않음
+        rows = (await db.execute(query.with_only_columns(*columns).limit(limit + 1))).all()
+        headers = cache_headers(_page_etag(cursor, limit, [(row.id, row.updated_at) for row in rows], variant))
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1].create_date, rows[-1].id)
+        items = [{name: row._mapping[name] for name in output} for row in rows]
+        return json_response({"items": items, "next_cursor": next_cursor}, headers)
+    posts = (await db.scalars(query.limit(limit + 1))).all()
+    # 다음 페이지가 있는지 알기 위해 1개 더 조회
+    response.headers.update(cache_headers(_page_etag(cursor, limit, [(p.id, p.updated_at) for p in posts])))
+    next_cursor = None
+    if len(posts) > limit:
+        posts = posts[:limit]
+        next_cursor = encode_cursor(posts[-1].create_date, posts[-1].id)
+    return {"items": posts, "next_cursor": next_cursor}
+    # 이번 페이지 게시글과 다음 페이지 cursor를 응답으로 반환합니다.
+
+# 게시글/댓글 검색 (/{post_id}보다 먼저 선언해야 "search"가 게시글 id로 해석되지 않음)
+_SEARCH_SCOPES = {"all": None, "posts": "post", "comments": "comment"}
+
+@router.get("/search", response_model=schemas.SearchPage)
+async def search_posts(
+    q: str = Query(..., min_length=1, max_length=200),
+    # 검색어. 공백으로 나눈 단어를 모두 포함하는 글을 찾음
+    scope: str = Query("all", pattern="^(all|posts|comments)$"),
+    # all → 게시글+댓글, posts → 게시글만, comments → 댓글만
+    limit: int = Query(20, ge=1, le=100),
+    cursor: str | None = None,
+    # 이전 응답의 next_cursor
+    db: DBSession = Depends(get_read_db),
+):
+    # 관련도(bm25) 순으로 검색 결과와 검색어가 강조된 snippet을 반환
+    if not SQLALCHEMY_DATABASE_URL.startswith("sqlite"):
+        raise HTTPException(status_code=501, detail="검색은 SQLite(FTS5) DB에서만 지원합니다.")
+    if not q.split():
+        raise HTTPException(status_code=400, detail="검색어를 입력하세요.")
+    after = decode_cursor(cursor, float, int) if cursor else None
+    statement, params = search_statement(q, _SEARCH_SCOPES[scope], limit + 1, after)
+    rows = (await db.execute(statement, params)).all()
+    # 다음 페이지가 있는지 알기 위해 1개 더 조회
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].score, rows[-1].rowid)
+    items = [
+        {
+            "kind": row.kind,
+            "id": row.rowid // 2,  # 검색 인덱스 rowid → 원래 게시글/댓글 id
+            "post_id": row.post_id,
+            "title": row.title,
+            "snippet": render_snippet(row.snippet),
+            "score": -row.score or 0.0,  # bm25는 작을수록 관련도가 높으므로 부호를 바꿔서 제공
+        }
+        for row in rows
+    ]
+    return {"items": items, "next_cursor": next_cursor}
 
 # 3. 게시글 단일 조회 (Read One)
 @router.get("/{post_id}", response_model=schemas.PostResponse)
 # HTTP GET 요청이 '/posts/숫자' 형식으로 들어왔을 때 이 함수를 실행하며, {post_id}는 URL 경로에서 게시글 ID를 추출한다
-def get_post(post_id: int, db: Session = Depends(get_db)):
+async def get_post(
+    post_id: int,
+    if_none_match: str | None = Header(None),      # 이전에 받은 ETag
+    if_modified_since: str | None = Header(None),  # 이전에 받은 Last-Modified
+    db: DBSession = Depends(get_db),
+):
     # 특정 게시글 단일 조회 함수를 정의합니다.
-    post = db.query(models.PostModel).filter(models.PostModel.id == post_id).first()
-    # DB에서 PostModel 테이블을 쿼리하여 id가 post_id와 일치하는 레코드 조회
-    
-    if not post:
+    async def load_post():
+        # 캐시에 없을 때만 실행: DB에서 PostModel 테이블의 기본키(id)가 post_id와 일치하는 레코드 조회
+        post = await db.get(models.PostModel, post_id)
+        if not post:
+            return None  # 없는 게시글은 캐시하지 않음
+        body = schemas.PostResponse.model_validate(post).model_dump_json().encode()
+        return post.updated_at.isoformat().encode() + b"\n" + body
+        # 캐시 값: "변경 시각\n" + PostResponse JSON 바이트 → hit이면 DB 조회도, 직렬화도 하지 않음
+
+    cached = await post_cache.get_or_load(post_cache_key(post_id), load_post)
+    # 같은 게시글을 동시에 여러 요청이 조회해도 DB 조회는 한 번만 실행됨
+    if cached is None:
     # 해당 ID의 게시글이 데이터베이스에 존재하지 않는다면:
         raise HTTPException(status_code=404, detail="Post not found")
     # HTTP 404 상태 코드(Not Found)와 함께 에러 메시지를 클라이언트에게 반환한다
-    return post
-    # 게시글이 존재한다면, 조회된 PostModel 객체를 응답으로 반환한다
+    updated_at, body = cached.split(b"\n", 1)
+    updated_at = datetime.fromisoformat(updated_at.decode())
+    headers = cache_headers(_post_etag(post_id, updated_at), updated_at)
+    # 다음 요청에서 If-None-Match / If-Modified-Since로 쓸 수 있도록 ETag, Last-Modified 전달
+    if if_none_match:
+        # If-None-Match가 있으면 If-Modified-Since보다 우선 (RFC 9110)
+        if etag_matches(if_none_match, headers["ETag"]):
+            return not_modified(headers)
+    elif not_modified_since(if_modified_since, updated_at):
+        return not_modified(headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+    # 게시글이 존재한다면, 이미 직렬화된 JSON 바이트를 그대로 응답으로 반환한다
+
+# 3-1. 게시글 상세 (게시글 + 작성자 + 첫 페이지 댓글과 댓글 작성자)
+@router.get("/{post_id}/full", response_model=schemas.PostDetail)
+async def get_post_full(
+    post_id: int,
+    comment_limit: int = Query(50, ge=1, le=200),  # 함께 보낼 댓글 수 (GET /comments/{post_id}의 limit과 같음)
+    db: DBSession = Depends(get_read_db),  # 조회 전용 → 복제본이 있으면 복제본 사용
+):
+    # 게시글 화면에 필요한 데이터를 한 번에 반환 (GET /posts/{id} + GET /comments/{post_id} 두 번 요청할 필요 없음)
+    # 댓글 수와 상관없이 쿼리는 항상 2번: ① 게시글 + 작성자 ② 댓글 + 댓글 작성자
+    post = await db.scalar(
+        select(models.PostModel)
+        .where(models.PostModel.id == post_id)
+        .options(joinedload(models.PostModel.owner), raiseload("*"))
+    )
+    if not post:
+        raise HTTPException(status_code=404, detail="Post not found")
+    comments = (await db.scalars(
+        select(models.Comment)
+        .where(models.Comment.post_id == post_id)
+        .order_by(models.Comment.create_date, models.Comment.id)  # GET /comments/{post_id}와 같은 순서, 같은 인덱스
+        .limit(comment_limit + 1)  # 다음 페이지 여부 확인용으로 1개 더 조회
+        .options(joinedload(models.Comment.user), raiseload("*"))
+    )).all()
+    # post.comments 관계로 불러오면 댓글 전체를 읽으므로, 첫 페이지만 따로 조회
+    next_comment_cursor = None
+    if len(comments) > comment_limit:
+        comments = comments[:comment_limit]
+        next_comment_cursor = encode_cursor(comments[-1].create_date, comments[-1].id)
+    return {
+        **schemas.PostResponse.model_validate(post).model_dump(),
+        "owner": post.owner,
+        "comments": comments,
+        "next_comment_cursor": next_comment_cursor,
+    }
 
 # 4. 게시글 수정 (Update)
 @router.put("/{post_id}", response_model=schemas.PostResponse)
 # HTTP PUT 요청이 "/posts/{post_id}" 경로로 들어오면 이 함수를 실행
-def update_post(post_id: int, updated_post: schemas.PostCreate, db: Session = Depends(get_db)):
+async def update_post(post_id: int, updated_post: schemas.PostCreate, db: DBSession = Depends(get_db)):
     # 특정 게시글을 수정하는 API를 정의
     
     # 1. DB에서 수정할 게시글 조회
-    post = db.query(models.PostModel).filter(models.PostModel.id == post_id).first()
+    post = await db.get(models.PostModel, post_id)
     
     if not post:
     # 게시글이 존재하지 않으면 예외 발생
@@ -82,10 +287,12 @@ def update_post(post_id: int, updated_post: schemas.PostCreate, db: Session = De
     # 전달받은 데이터에서 title을 가져와 DB 객체에 덮어쓰기
     post.content = updated_post.content
     # 전달받은 데이터에서 content를 가져와 DB 객체에 덮어쓰기
+    # updated_at은 실제로 값이 바뀌었을 때 commit 시점에 자동 갱신 (onupdate) → ETag도 바뀜
     
     # 3. DB에 변경 사항 반영
-    db.commit() # 세션에 있는 변경사항을 실제 DB에 저장
-    db.refresh(post) # 수정된 객체를 최신 상태로 갱신
+    await db.commit() # 세션에 있는 변경사항을 실제 DB에 저장
+    await invalidate_post_cache(post_id) # 캐시에 남은 수정 전 게시글 제거
+    await db.refresh(post) # 수정된 객체를 최신 상태로 갱신
     
     # 4. 수정된 게시글 반환
     return post # 클라이언트에게 수정된 게시글 정보 전달
@@ -93,25 +300,24 @@ def update_post(post_id: int, updated_post: schemas.PostCreate, db: Session = De
 # 5. 게시글 삭제 (Delete)
 @router.delete("/{post_id}")
 # HTTP DELETE 요청이 "/posts/{post_id}" 경로로 들어오면 이 함수를 실행
-def delete_post(post_id: int, db: Session = Depends(get_db)):
+async def delete_post(post_id: int, db: DBSession = Depends(get_db)):
     # 특정 게시글을 삭제하는 API를 정의
     
-    # 1. DB에서 삭제할 게시글 조회
-    post = db.query(models.PostModel).filter(models.PostModel.id == post_id).first()
+    # 1. 게시글과 댓글을 DELETE 문으로 바로 삭제 (게시글/댓글 객체를 불러오지 않음)
+    await db.execute(delete(models.Comment).where(models.Comment.post_id == post_id))
+    # 댓글은 ON DELETE CASCADE로도 지워지지만, 외래키 옵션 없이 만들어진 기존 DB에서도 댓글이 남지 않도록 먼저 삭제
+    result = await db.execute(delete(models.PostModel).where(models.PostModel.id == post_id))
     
-    if not post:
+    if not result.rowcount:
     # 게시글이 존재하지 않으면 예외 발생
+        await db.rollback()
         raise HTTPException(status_code=404, detail="Post not found")
     # HTTP 404 상태 코드와 메시지 반환
     
-    # 2. 게시글 삭제
-    db.delete(post) # DB 세션에서 해당 게시글 삭제
-    db.commit() # 실제 DB에 삭제 반영
+    # 2. 삭제 반영
+    await db.commit() # 실제 DB에 삭제 반영 (댓글 + 게시글 한 트랜잭션)
+    await invalidate_post_cache(post_id) # 캐시에서도 제거
     
     # 3. 삭제 완료 메시지 반환
     return {"message": f"게시글 {post_id}번이 삭제되었습니다."}
     # 클라이언트에게 삭제 완료 메시지를 JSON 형태로 전달
-
-# 시간 출력 예시
-print(datetime.now()) # 로컬 시간
-print(datetime.utcnow()) # UTC 시간
\ No newline at end of file
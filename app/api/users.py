@@ -1,86 +1,154 @@
-from fastapi import APIRouter, Depends, HTTPException  # FastAPI 라우터, 의존성 주입, HTTP 예외 처리
-from sqlalchemy.orm import Session  # DB 세션 타입 힌트
+from fastapi import APIRouter, Depends, HTTPException, Query  # FastAPI 라우터, 의존성 주입, HTTP 예외 처리
+from sqlalchemy import select, update, delete, func  # 조회 쿼리 작성, 계정 삭제용 일괄 UPDATE/DELETE
+from starlette.concurrency import run_in_threadpool  # 파일 I/O가 있는 동기 함수를 스레드풀에서 실행
 import models, schemas, utils  # ORM 모델, Pydantic 스키마, 유틸 함수
-from database import get_db  # DB 세션 생성 함수
+from database import get_db, DBSession  # DB 세션 생성 함수, 세션 타입 (sync/async 모드 모두 await 해서 사용)
 from datetime import timedelta, datetime  # 토큰 만료 계산, 로그인 시간 기록
-from loge_excel import register_user, save_login_history, delete_user_safe # 엑셀 기록용 함수 import
+from loge_excel import register_user, save_login_history, delete_user_records # 엑셀 기록용 함수 import
+from cache import invalidate_post_cache  # 삭제된 게시글/댓글 수가 바뀐 게시글을 조회 캐시에서 제거
+from login_history import record_login  # 로그인 기록 배치 저장 (큐에 넣고 바로 반환)
+from rate_limit import login_rate_limit, register_rate_limit  # IP/이메일별 요청 수 제한 (넘으면 429)
+from config import RESERVED_USERNAMES  # 회원가입에 쓸 수 없는 사용자 이름
 from fastapi import APIRouter, Depends, HTTPException, Form
 
 # /users API 그룹 생성, Swagger UI에서 tags 지정
 router = APIRouter(prefix="/users", tags=["users"])
 
+def _record_login_events(user_id: int):
+    # 로그인 기록 두 곳(DB 로그인 기록, 감사 로그)에 큐잉 → 스레드풀 한 번으로 함께 실행
+    record_login(user_id)
+    save_login_history(user_id)
+
+def check_username_allowed(username: str):
+    # 관리자처럼 보이는 예약된 이름으로는 가입할 수 없음
+    if username.strip().lower() in RESERVED_USERNAMES:
+        raise HTTPException(status_code=400, detail="사용할 수 없는 사용자 이름입니다.")
+
 # ---------------------------
 # 1. 회원가입 API
 # ---------------------------
-@router.post("/", response_model=schemas.UserResponse)
-def create_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
+@router.post("/", response_model=schemas.UserResponse, dependencies=[Depends(register_rate_limit)])
+async def create_user(user: schemas.UserCreate, db: DBSession = Depends(get_db)):
     """
     새로운 사용자 등록
     1. 이메일 중복 확인
     2. 비밀번호 해시 후 DB 저장
     3. 엑셀 Users 시트에도 자동 기록
     """
-    db_user = db.query(models.User).filter(models.User.email == user.email).first()
+    check_username_allowed(user.username)
+    db_user = await db.scalar(select(models.User).where(models.User.email == user.email))
     if db_user:
         raise HTTPException(status_code=400, detail="Email already registered")  # 이미 등록된 이메일
     
-    hashed_pw = utils.hash_password(user.password)
+    hashed_pw = await utils.hash_password_async(user.password)  # 전용 스레드풀에서 해싱
     new_user = models.User(username=user.username, email=user.email, hashed_password=hashed_pw)
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.commit()
+    await db.refresh(new_user)
 
-    # 엑셀에도 자동 저장
-    register_user(user.username, user.email, user.password)
+    # 엑셀에도 자동 저장 (큐가 가득 차면 대기/디스크 쓰기가 될 수 있으므로 스레드풀에서 실행)
+    await run_in_threadpool(register_user, user.username, user.email, hashed_pw, user_id=new_user.id)  # 이미 만든 해시를 그대로 사용
 
     return new_user
 
 # ---------------------------
 # 2. 로그인 API
 # ---------------------------
-@router.post("/login")
-def login(
+@router.post("/login", dependencies=[Depends(login_rate_limit)])  # 비밀번호 대입, bcrypt 과부하 방지
+async def login(
     email: str = Form(...),
     password: str = Form(...),
-    db: Session = Depends(get_db)
+    db: DBSession = Depends(get_db)
 ):
-    user = db.query(models.User).filter(models.User.email == email).first()
-    if not user or not utils.verify_password(password, user.hashed_password):
+    user = await db.scalar(select(models.User).where(models.User.email == email))
+    if not user or not await utils.verify_password_async(password, user.hashed_password):
         raise HTTPException(status_code=401, detail="Invalid email or password")
     
-    # DB 로그인 기록
-    login_record = models.LoginHistory(user_id=user.id, login_time=datetime.utcnow())
-    db.add(login_record)
-    db.commit()
-
-    # 엑셀에도 자동 저장
-    save_login_history(user.id)
+    # DB 로그인 기록 → 기록 스레드가 모아서 한 트랜잭션으로 저장 (로그인마다 COMMIT 하지 않음)
+    # 엑셀(감사 로그)에도 자동 저장
+    # 큐가 가득 차면 block(대기)/spill(파일 잠금 + 디스크 쓰기)이 될 수 있으므로 이벤트 루프가 아닌 스레드풀에서 실행
+    await run_in_threadpool(_record_login_events, user.id)
 
     access_token_expires = timedelta(minutes=60)
-    token = utils.create_access_token(data={"user_id": user.id}, expires_delta=access_token_expires)
+    token = utils.create_access_token(data={"user_id": user.id, "ver": user.token_version or 0}, expires_delta=access_token_expires)
+    # ver → 토큰 버전. 비밀번호가 바뀌면 버전이 올라가 이 토큰은 더 이상 통과하지 못함
     return {"access_token": token, "token_type": "bearer"}
 
+# 내 최근 로그인 기록 (user_id, login_time 복합 인덱스로 조회)
+# 방금 한 로그인은 기록 스레드가 저장한 뒤(최대 LOGIN_HISTORY_FLUSH_INTERVAL초)부터 보임
+@router.get("/me/logins", response_model=list[schemas.LoginRecord])
+async def read_my_logins(limit: int = Query(20, ge=1, le=100), user=Depends(utils.get_current_user), db: DBSession = Depends(get_db)):
+    return (await db.scalars(
+        select(models.LoginHistory)
+        .where(models.LoginHistory.user_id == user.id)
+        .order_by(models.LoginHistory.login_time.desc())
+        .limit(limit)
+    )).all()
+
 
 # 3. 안전한 계정 삭제 API
+async def delete_user_rows(db: DBSession, user_id: int) -> dict:
+    # 사용자와 사용자의 게시글, 댓글, 로그인 기록을 DELETE/UPDATE 문 몇 개로 한 번에 삭제 (commit은 호출하는 쪽에서)
+    # 행 수와 상관없이 문장 수가 같음 → 글/댓글이 많은 사용자도 ORM으로 한 행씩 불러와 지우지 않음
+    # (새로 만든 DB는 ON DELETE CASCADE로도 지워지지만, 외래키 옵션 없이 만들어진 기존 DB를 위해 자식 행부터 직접 삭제)
+    Post, Comment = models.PostModel, models.Comment
+    own_posts = select(Post.id).where(Post.owner_id == user_id)
+    commented = select(Comment.post_id).where(Comment.user_id == user_id)
+    touched = list(await db.scalars(
+        select(Post.id).where(Post.id.in_(commented) | Post.id.in_(own_posts))
+    ))
+    # 캐시에서 지울 게시글: 삭제될 게시글 + 이 사용자의 댓글이 달려 있어 댓글 수가 바뀌는 게시글
+    await db.execute(
+        update(Post)
+        .where(Post.id.in_(commented), Post.owner_id != user_id)
+        .values(comment_count=Post.comment_count - (
+            select(func.count()).where(Comment.post_id == Post.id, Comment.user_id == user_id).scalar_subquery()
+        ))
+        .execution_options(synchronize_session=False)
+    )
+    # 다른 사람 게시글에 단 댓글 수만큼 comment_count 감소
+    counts = {
+        "comments": (await db.execute(delete(Comment).where(
+            (Comment.user_id == user_id) | Comment.post_id.in_(own_posts)
+        ))).rowcount,  # 이 사용자가 쓴 댓글 + 이 사용자 게시글에 달린 댓글
+        "posts": (await db.execute(delete(Post).where(Post.owner_id == user_id))).rowcount,
+        "logins": (await db.execute(delete(models.LoginHistory).where(models.LoginHistory.user_id == user_id))).rowcount,
+    }
+    await db.execute(delete(models.LoginDaily).where(models.LoginDaily.user_id == user_id))
+    await db.execute(delete(models.User).where(models.User.id == user_id))
+    counts["touched_posts"] = touched
+    return counts
+
 @router.delete("/delete-account") # HTTP DELETE 메소드를 처리하는 '/delete-account' 엔드포인트를 정의-
-def remove_user_safe(username: str, email: str, password: str): # API 함수 정의: 삭제를 위해 username, email, password를 입력받는다
+async def remove_user_safe(username: str, email: str, password: str, db: DBSession = Depends(get_db)): # API 함수 정의: 삭제를 위해 username, email, password를 입력받는다
+    # 이름, 이메일, 비밀번호가 모두 일치해야 삭제 가능 (단순 ID 입력만으로 다른 계정을 지우는 걸 방지)
+    user = await db.scalar(select(models.User).where(models.User.username == username, models.User.email == email))
+    if not user:
+        raise HTTPException(status_code=400, detail="사용자가 존재하지 않습니다.")
+    if not await utils.verify_password_async(password, user.hashed_password):
+        raise HTTPException(status_code=400, detail="비밀번호가 일치하지 않습니다.")
+    user_id = user.id
     try: # 예외 처리 시작: 계정 삭제 과정에서 발생할 수 있는 오류를 잡기 위함
-        delete_user_safe(username, email, password) # 실제 계정 삭제 로직을 수행하는 내부 함수를 호출한다
-        return {"message": f"계정 삭제 완료: {username}"} # 삭제 성공 시, 완료 메시지를 응답으로 반환한다
-    except ValueError as ve: # 'delete_user_safe' 함수 내에서 잘못된 값(예: 사용자 정보 불일치)으로 인해 발생한 ValueError를 잡는다
-        raise HTTPException(status_code=400, detail=str(ve)) # 400 Bad Request와 함께, ValueError의 내용을 사용자에게 반환한다
-    except Exception as e: # 그 외 예상치 못한 모든 종류의 오류(Exception)를 잡는다
+        counts = await delete_user_rows(db, user_id)
+        await db.commit() # 게시글, 댓글, 로그인 기록, 계정 삭제를 한 트랜잭션으로 반영
+    except Exception as e: # 예상치 못한 오류(Exception)가 나면 아무것도 지우지 않고 되돌린다
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"삭제 중 오류 발생: {str(e)}") # 500 Internal Server Error와 함께 오류 내용을 반환한다
+    utils.invalidate_user(user_id) # 삭제된 계정의 토큰이 더 이상 통과하지 못하도록 인증 캐시를 비운다
+    for post_id in counts.pop("touched_posts"):
+        await invalidate_post_cache(post_id)
+    await run_in_threadpool(delete_user_records, user_id) # 감사 로그(엑셀) 기록도 삭제 (파일 I/O라 스레드풀에서 실행)
+    return {"message": f"계정 삭제 완료: {username}", "deleted": counts} # 삭제 성공 시, 완료 메시지와 삭제된 행 수를 응답으로 반환한다
 
 # ---------------------------
 # 4. 아이디 찾기 API
 # ---------------------------
 @router.post("/find-id")
-def find_id(username: str, email: str, db: Session = Depends(get_db)):
+async def find_id(username: str, email: str, db: DBSession = Depends(get_db)):
     """
     이름 + 이메일로 사용자 아이디 조회
     """
-    user = db.query(models.User).filter(models.User.username == username, models.User.email == email).first()
+    user = await db.scalar(select(models.User).where(models.User.username == username, models.User.email == email))
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     return {"username": user.username, "email": user.email}
@@ -89,66 +157,71 @@ def find_id(username: str, email: str, db: Session = Depends(get_db)):
 # 5. 비밀번호 찾기 / 임시 비밀번호 발급
 # ---------------------------
 @router.post("/reset-password")
-def reset_password(username: str, email: str, db: Session = Depends(get_db)):
+async def reset_password(username: str, email: str, db: DBSession = Depends(get_db)):
     """
     이름 + 이메일 확인 후 임시 비밀번호 발급
     1. DB 사용자 조회
     2. 임시 비밀번호 생성 후 DB 해시 업데이트
     3. 임시 비밀번호 반환
     """
-    user = db.query(models.User).filter(models.User.username == username, models.User.email == email).first()
+    user = await db.scalar(select(models.User).where(models.User.username == username, models.User.email == email))
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
     import secrets
     temp_password = secrets.token_urlsafe(8)  # 8자리 임시 비밀번호
-    user.hashed_password = utils.hash_password(temp_password)
-    db.commit()
+    user.hashed_password = await utils.hash_password_async(temp_password)
+    user.token_version = (user.token_version or 0) + 1  # 기존 토큰 무효화
+    await db.commit()
+    utils.invalidate_user(user.id)  # 인증 캐시에서도 제거
     return {"message": "임시 비밀번호 발급 완료", "temp_password": temp_password}
 
 # ---------------------------
 # 6. 비밀번호 변경 API
 # ---------------------------
 @router.post("/change-password")
-def change_password(username: str, old_password: str, new_password: str, db: Session = Depends(get_db)):
+async def change_password(username: str, old_password: str, new_password: str, db: DBSession = Depends(get_db)):
     """
     사용자 비밀번호 변경
     1. 사용자 존재 확인
     2. 기존 비밀번호 확인
     3. 새 비밀번호 해시 DB 반영
     """
-    user = db.query(models.User).filter(models.User.username == username).first()
+    user = await db.scalar(select(models.User).where(models.User.username == username))
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
-    if not utils.verify_password(old_password, user.hashed_password):
+    if not await utils.verify_password_async(old_password, user.hashed_password):
         raise HTTPException(status_code=401, detail="Incorrect password")
     
-    user.hashed_password = utils.hash_password(new_password)
-    db.commit()
+    user.hashed_password = await utils.hash_password_async(new_password)
+    user.token_version = (user.token_version or 0) + 1  # 기존 토큰 무효화
+    await db.commit()
+    utils.invalidate_user(user.id)  # 인증 캐시에서도 제거
     return {"message": "비밀번호가 성공적으로 변경되었습니다."}
 
 # 7. HTML 폼 회원가입 처리 (templates/signup.html용)
 from fastapi import Form
 from fastapi.responses import RedirectResponse
 
-@router.post("/register")
-def register_user_form(
+@router.post("/register", dependencies=[Depends(register_rate_limit)])
+async def register_user_form(
     username: str = Form(...),
     email: str = Form(...),
     password: str = Form(...),
-    db: Session = Depends(get_db)
+    db: DBSession = Depends(get_db)
 ):
-    db_user = db.query(models.User).filter(models.User.email == email).first()
+    check_username_allowed(username)
+    db_user = await db.scalar(select(models.User).where(models.User.email == email))
     if db_user:
         raise HTTPException(status_code=400, detail="이미 등록된 이메일입니다.")
 
-    hashed_pw = utils.hash_password(password)
+    hashed_pw = await utils.hash_password_async(password)  # 전용 스레드풀에서 해싱
     new_user = models.User(username=username, email=email, hashed_password=hashed_pw)
     db.add(new_user)
-    db.commit()
+    await db.commit()
 
     # 엑셀 기록
-    register_user(username, email, password)
+    await run_in_threadpool(register_user, username, email, hashed_pw, user_id=new_user.id)  # 큐가 가득 차면 대기할 수 있으므로 스레드풀에서
 
     # 회원가입 완료 후 메인 페이지로 이동
     return RedirectResponse(url="/", status_code=303)
@@ -157,11 +230,11 @@ def register_user_form(
 from fastapi import Form
 
 @router.post("/find-id")
-def find_id(username: str = Form(...), email: str = Form(...), db: Session = Depends(get_db)):
+async def find_id(username: str = Form(...), email: str = Form(...), db: DBSession = Depends(get_db)):
     # 기존 로직 그대로
     ...
 
 @router.post("/reset-password")
-def reset_password(username: str = Form(...), email: str = Form(...), db: Session = Depends(get_db)):
+async def reset_password(username: str = Form(...), email: str = Form(...), db: DBSession = Depends(get_db)):
     # 기존 로직 그대로
     ...
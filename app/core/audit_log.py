@@ -0,0 +1,515 @@
+import glob
+# → 여러 워커 프로세스가 남긴 임시 저장(spill) 파일 찾기
+import json
+# → 이벤트 내용(payload)을 JSON 문자열로 저장하기 위해 사용
+import os
+# → 디스크 임시 저장(spill) 파일 교체/삭제용
+import tempfile
+# → 엑셀 등 결과 파일을 임시 파일에 다 쓴 뒤 한 번에 교체하기 위해 사용
+import queue
+# → 요청 스레드와 기록 스레드 사이에서 이벤트를 넘겨주는 스레드 안전 큐
+import sqlite3
+# → 감사 로그 전용 SQLite 파일(사이드 테이블)에 접근하는 내장 모듈
+import threading
+# → 백그라운드 기록 스레드 생성용
+import time
+# → 시간 기준 flush 트리거 계산용
+import uuid
+# → 디스크에 임시 저장하는 이벤트마다 고유 키를 붙여 다시 저장할 때 중복을 막음
+from datetime import datetime
+from metrics import WORK_SECONDS
+# 배치 저장 시간을 기록기 이름별로 /metrics에 기록
+try:
+    import fcntl
+    # → 리눅스/맥: 파일 잠금 (여러 워커 프로세스 사이)
+except ImportError:
+    fcntl = None
+    import msvcrt
+    # → 윈도우: 파일 잠금
+
+
+# 0. 프로세스 간 파일 잠금
+class FileLock:
+    """잠금 파일(path)을 이용한 프로세스 간 배타 잠금 (with 문 또는 acquire/release)
+
+    uvicorn --workers N 처럼 여러 프로세스가 같은 파일을 다룰 때 한 번에 하나만 작업하게 한다.
+    잠글 때마다 파일을 새로 열기 때문에 같은 프로세스의 다른 스레드끼리도 배타적이다.
+    (객체 하나를 여러 스레드가 함께 쓰지 말고 잠글 때마다 새로 만들어 사용)
+    """
+
+    def __init__(self, path: str, timeout: float = 30.0):
+        self.path = path
+        self.timeout = timeout  # 0이면 한 번만 시도
+        self._file = None
+
+    def acquire(self) -> bool:
+        # timeout초 안에 잠그면 True, 못 잠그면 False
+        f = open(self.path, "a+b")
+        deadline = time.monotonic() + self.timeout
+        while True:
+            try:
+                if fcntl is not None:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                else:
+                    f.seek(0)
+                    msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+                self._file = f
+                return True
+            except OSError:
+                if time.monotonic() >= deadline:
+                    f.close()
+                    return False
+                time.sleep(0.01)
+
+    def release(self):
+        f, self._file = self._file, None
+        try:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+        finally:
+            f.close()
+
+    def __enter__(self):
+        if not self.acquire():
+            raise TimeoutError(f"파일 잠금 대기 시간 초과: {self.path}")
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+def replace_atomically(path: str, write):
+    # write(임시 경로)로 같은 폴더의 임시 파일에 다 쓴 뒤 path를 한 번에 교체
+    # → 읽는 쪽은 항상 완성된 파일만 보고, 여러 워커가 동시에 써도 잠금 순서대로 하나씩 교체됨
+    folder = os.path.dirname(os.path.abspath(path))
+    with FileLock(path + ".lock"):
+        fd, tmp_path = tempfile.mkstemp(prefix=os.path.basename(path) + ".", suffix=".tmp", dir=folder)
+        os.close(fd)
+        try:
+            write(tmp_path)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
+
+# 1. append-only 저장소
+class AuditLogStore:
+    """감사 이벤트를 SQLite 사이드 테이블에 추가만(append-only) 하는 저장소
+
+    엑셀처럼 시트 전체를 다시 쓰지 않고 INSERT만 하므로
+    기록 비용이 지금까지 쌓인 행 수와 무관하게 일정하다.
+    """
+
+    def __init__(self, path: str):
+        self.path = path  # 감사 로그 DB 파일 경로
+
+    def connect(self) -> sqlite3.Connection:
+        # 다른 프로세스가 쓰는 중이면 최대 30초까지 기다림
+        # (여러 워커가 동시에 INSERT 해도 SQLite 잠금으로 순서대로 저장되고 id는 AUTOINCREMENT로 중복 없이 증가)
+        return sqlite3.connect(self.path, timeout=30)
+
+    def init(self):
+        # 테이블/인덱스가 없으면 생성 (이미 있으면 그대로 둠)
+        conn = self.connect()
+        try:
+            conn.executescript("""
+                PRAGMA journal_mode=WAL;
+                CREATE TABLE IF NOT EXISTS audit_events (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    sheet TEXT NOT NULL,
+                    user_id INTEGER,
+                    payload TEXT NOT NULL,
+                    created_at TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS ix_audit_events_sheet_id ON audit_events (sheet, id);
+                CREATE INDEX IF NOT EXISTS ix_audit_events_user_id ON audit_events (user_id);
+                CREATE TABLE IF NOT EXISTS audit_meta (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL
+                );
+            """)
+            if "event_key" not in {row[1] for row in conn.execute("PRAGMA table_info(audit_events)")}:
+                # 예전 버전이 만든 감사 로그 DB에는 없는 컬럼 → 추가 (기존 행은 NULL)
+                conn.execute("ALTER TABLE audit_events ADD COLUMN event_key TEXT")
+            conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS ux_audit_events_event_key ON audit_events (event_key)")
+            conn.commit()
+        finally:
+            conn.close()
+
+    def append_many(self, events, keys=None):
+        # events: [(sheet, user_id, payload(dict), created_at(datetime)), ...]
+        # 배치 전체를 하나의 트랜잭션으로 INSERT
+        # keys: 이벤트별 고유 키 (디스크 임시 저장분을 다시 저장할 때). 이미 저장된 키는 건너뜀
+        rows = [
+            (sheet, user_id, json.dumps(payload, ensure_ascii=False, default=str), created_at.isoformat(), key)
+            for (sheet, user_id, payload, created_at), key in zip(events, keys or [None] * len(events))
+        ]
+        conn = self.connect()
+        try:
+            with conn:
+                conn.executemany(
+                    "INSERT OR IGNORE INTO audit_events (sheet, user_id, payload, created_at, event_key) VALUES (?, ?, ?, ?, ?)",
+                    rows,
+                )
+        finally:
+            conn.close()
+
+    def has_marker(self, key: str) -> bool:
+        # 한 번만 해야 하는 작업(예: 예전 엑셀 가져오기)을 이미 했는지 확인
+        conn = self.connect()
+        try:
+            return conn.execute("SELECT 1 FROM audit_meta WHERE key = ?", (key,)).fetchone() is not None
+        finally:
+            conn.close()
+
+    def import_once(self, key: str, events):
+        # events를 저장하고 key를 기록 (한 트랜잭션). 이미 key가 있으면 아무것도 하지 않고 None 반환
+        # BEGIN IMMEDIATE → 여러 워커가 동시에 시작해도 한 프로세스만 가져옴
+        # 같은 (sheet, user_id, created_at) 이벤트가 이미 있으면 건너뜀 (이 저장소에서 내보낸 엑셀을 다시 읽은 경우)
+        conn = self.connect()
+        try:
+            conn.isolation_level = None
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                if conn.execute("SELECT 1 FROM audit_meta WHERE key = ?", (key,)).fetchone():
+                    conn.execute("ROLLBACK")
+                    return None
+                imported = 0
+                for sheet, user_id, payload, created_at in events:
+                    created_at = created_at.isoformat()
+                    if conn.execute(
+                        "SELECT 1 FROM audit_events WHERE sheet = ? AND user_id IS ? AND created_at = ?",
+                        (sheet, user_id, created_at),
+                    ).fetchone():
+                        continue
+                    conn.execute(
+                        "INSERT INTO audit_events (sheet, user_id, payload, created_at) VALUES (?, ?, ?, ?)",
+                        (sheet, user_id, json.dumps(payload, ensure_ascii=False, default=str), created_at),
+                    )
+                    imported += 1
+                conn.execute("INSERT INTO audit_meta (key, value) VALUES (?, ?)", (key, datetime.now().isoformat()))
+                conn.execute("COMMIT")
+                return imported
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        finally:
+            conn.close()
+
+    def iter_events(self, sheet: str):
+        # 특정 시트의 이벤트를 id 순서대로 하나씩 꺼냄 (전체를 메모리에 올리지 않음)
+        conn = self.connect()
+        try:
+            cursor = conn.execute(
+                "SELECT id, user_id, payload, created_at FROM audit_events WHERE sheet = ? ORDER BY id",
+                (sheet,),
+            )
+            for event_id, user_id, payload, created_at in cursor:
+                yield event_id, user_id, json.loads(payload), created_at
+        finally:
+            conn.close()
+
+    def find_users(self, username: str, email: str):
+        # Users 이벤트 중 이름/이메일이 일치하는 행 조회
+        conn = self.connect()
+        try:
+            cursor = conn.execute(
+                "SELECT id, user_id, payload FROM audit_events "
+                "WHERE sheet = 'Users' "
+                "AND json_extract(payload, '$.username') = ? "
+                "AND json_extract(payload, '$.email') = ? "
+                "ORDER BY id",
+                (username, email),
+            )
+            return [(event_id, user_id, json.loads(payload)) for event_id, user_id, payload in cursor]
+        finally:
+            conn.close()
+
+    def delete_user(self, user_event_ids, user_id):
+        # 사용자 행과 해당 사용자의 로그인/댓글 이벤트를 한 트랜잭션으로 삭제
+        conn = self.connect()
+        try:
+            with conn:
+                conn.executemany("DELETE FROM audit_events WHERE id = ?", [(i,) for i in user_event_ids])
+                conn.execute(
+                    "DELETE FROM audit_events WHERE sheet IN ('LoginHistory', 'Comments') AND user_id = ?",
+                    (user_id,),
+                )
+        finally:
+            conn.close()
+
+    def delete_user_events(self, user_id):
+        # user_id의 모든 이벤트(Users 행, 로그인, 댓글)를 한 번에 삭제 (DB에서 계정을 지운 뒤 호출)
+        conn = self.connect()
+        try:
+            with conn:
+                return conn.execute("DELETE FROM audit_events WHERE user_id = ?", (user_id,)).rowcount
+        finally:
+            conn.close()
+
+
+# 2. 배치 기록기
+class AuditLogWriter:
+    """크기가 정해진 큐에 쌓인 이벤트를 백그라운드 스레드가 모아서 저장하는 기록기
+
+    batch_size개가 모이거나 flush_interval초가 지나면 한 번에 저장한다.
+    큐가 가득 차면 policy에 따라 drop(버림) / block(잠시 대기) / spill(디스크 임시 저장) 한다.
+    append()는 어떤 경우에도 예외를 올리지 않으므로 기록 실패가 요청 실패로 번지지 않는다.
+
+    워커 프로세스가 여러 개여도 안전하도록
+    - spill 파일은 프로세스마다 따로 쓰고 (spill_path.<pid>)
+    - 다시 저장(replay)은 잠금을 잡은 한 프로세스만 모든 프로세스의 spill 파일을 처리한다.
+    - spill 한 이벤트에는 고유 키를 붙이고, 저장소는 이미 저장된 키를 건너뛴다
+      (다시 저장한 직후 replay 파일을 지우기 전에 프로세스가 죽어도 다음 replay에서 두 번 저장되지 않음)
+    store.append_many(events, keys=None)를 구현한 저장소면 무엇이든 사용할 수 있다.
+    """
+
+    _STOP = object()  # 기록 스레드 종료 신호
+    _FLUSH = object()  # 모아둔 배치를 즉시 저장하라는 신호
+    POLICIES = ("drop", "block", "spill")
+
+    def __init__(self, store: AuditLogStore, batch_size: int = 100, flush_interval: float = 1.0,
+                 maxsize: int = 10000, policy: str = "spill", block_timeout: float = 0.5,
+                 spill_path: str = None, name: str = "audit-log-writer", replay_wait: float = 30.0):
+        if policy not in self.POLICIES:
+            raise ValueError(f"알 수 없는 감사 로그 큐 정책: {policy}")
+        self.store = store
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.policy = policy
+        self.block_timeout = block_timeout
+        self.spill_path = spill_path or store.path + ".spill.jsonl"
+        self.name = name  # 기록 스레드 이름 (로그인 기록 등 다른 저장소에도 같은 기록기를 사용)
+        self.replay_wait = replay_wait  # flush/stop 때 다른 프로세스의 replay가 끝나기를 기다리는 최대 시간(초)
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._thread = None
+        self._lock = threading.Lock()
+        self._spill_lock_path = self.spill_path + ".lock"  # spill 파일 쓰기/가져가기 (짧게 잡음)
+        self._replay_lock_path = self.spill_path + ".replay.lock"  # 다시 저장하는 프로세스는 하나만
+        # 모니터링용 카운터
+        self._counters = {
+            "enqueued": 0,      # 큐에 들어간 이벤트 수
+            "written": 0,       # 저장 완료된 이벤트 수
+            "dropped": 0,       # 버려진 이벤트 수
+            "spilled": 0,       # 디스크에 임시 저장된 이벤트 수
+            "failed_batches": 0,  # 저장에 실패한 배치 수
+            "flushes": 0,       # 저장(배치) 횟수
+        }
+        self._flush_seconds_total = 0.0
+        self._flush_seconds_max = 0.0
+        self._flush_seconds_last = 0.0
+
+    def start(self):
+        # 기록 스레드가 없으면 시작 (여러 번 불러도 하나만 뜸)
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+
+    def append(self, sheet: str, user_id, payload: dict, created_at: datetime = None) -> bool:
+        # 요청 스레드에서는 큐에 넣기만 하고 바로 반환 (저장 여부 반환)
+        # created_at을 넘기지 않으면 지금 시각(로컬)으로 기록
+        item = (sheet, user_id, payload, created_at or datetime.now())
+        try:
+            self.start()
+            if self.policy == "block":
+                self._queue.put(item, timeout=self.block_timeout)
+            else:
+                self._queue.put_nowait(item)
+            self._count("enqueued")
+            return True
+        except queue.Full:
+            if self.policy == "spill" and self._spill([item]):
+                return True
+            self._count("dropped")
+            return False
+        except Exception as e:
+            print(f"감사 로그 기록 실패: {e}")
+            self._count("dropped")
+            return False
+
+    def flush(self):
+        # 지금까지 넣은 이벤트(디스크 임시 저장분 포함)가 모두 저장될 때까지 대기
+        # 다른 프로세스가 spill 파일을 다시 저장하는 중이면 그 작업이 끝날 때까지(최대 replay_wait초) 기다린 뒤
+        # 남은 spill 파일을 직접 처리하므로, 반환 후에는 이 프로세스가 spill 한 이벤트도 저장되어 있다
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(self._FLUSH)
+            self._queue.join()
+
+    def stop(self):
+        # 남은 이벤트를 모두 저장한 뒤 기록 스레드 종료 (graceful shutdown)
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(self._STOP)
+            self._thread.join()
+
+    def stats(self) -> dict:
+        # 큐 길이, 저장 지연, 버려진 이벤트 수 등 현재 상태
+        with self._lock:
+            stats = dict(self._counters)
+            flushes = stats["flushes"]
+            stats.update({
+                "policy": self.policy,
+                "queue_depth": self._queue.qsize(),
+                "queue_maxsize": self._queue.maxsize,
+                "flush_seconds_total": round(self._flush_seconds_total, 6),
+                "flush_seconds_avg": round(self._flush_seconds_total / flushes, 6) if flushes else 0.0,
+                "flush_seconds_max": round(self._flush_seconds_max, 6),
+                "flush_seconds_last": round(self._flush_seconds_last, 6),
+            })
+        return stats
+
+    def _count(self, name: str, n: int = 1):
+        with self._lock:
+            self._counters[name] += n
+
+    def _run(self):
+        self._replay_spill()  # 이전 실행에서 남은 임시 저장분부터 처리
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        while True:
+            timeout = max(deadline - time.monotonic(), 0)
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+            stopping = item is self._STOP
+            forced = stopping or item is self._FLUSH
+            if item is not None and not forced:
+                batch.append(item)
+            # 크기 또는 시간 조건을 만족하면 저장 (flush/stop 신호면 즉시 저장)
+            if batch and (forced or len(batch) >= self.batch_size or time.monotonic() >= deadline):
+                self._write(batch)
+                for _ in batch:
+                    self._queue.task_done()
+                batch = []
+            if forced:
+                # flush/stop → 다른 프로세스가 replay 중이면 끝날 때까지 기다렸다가 남은 spill 파일까지 저장
+                self._replay_spill(wait=self.replay_wait)
+            elif item is None and self._queue.empty():
+                # 큐가 한가할 때 디스크에 밀려난 이벤트를 다시 저장 (다른 프로세스가 하는 중이면 건너뜀)
+                self._replay_spill()
+            if time.monotonic() >= deadline:
+                deadline = time.monotonic() + self.flush_interval
+            if forced:
+                self._queue.task_done()
+            if stopping:
+                return
+
+    def _write(self, batch) -> bool:
+        started = time.perf_counter()
+        try:
+            self.store.append_many(batch)
+        except Exception as e:
+            print(f"감사 로그 저장 실패 ({len(batch)}건): {e}")
+            self._count("failed_batches")
+            # 실패한 배치는 디스크에 남겨 두었다가 다음에 다시 시도
+            self._spill(batch)
+            return False
+        elapsed = time.perf_counter() - started
+        WORK_SECONDS.observe(elapsed, self.name)
+        with self._lock:
+            self._counters["written"] += len(batch)
+            self._counters["flushes"] += 1
+            self._flush_seconds_total += elapsed
+            self._flush_seconds_last = elapsed
+            self._flush_seconds_max = max(self._flush_seconds_max, elapsed)
+        return True
+
+    def _spill(self, items) -> bool:
+        # 이벤트를 JSON 한 줄씩 디스크 파일 끝에 덧붙임
+        try:
+            lines = "".join(
+                json.dumps([sheet, user_id, payload, created_at.isoformat(), uuid.uuid4().hex], ensure_ascii=False, default=str) + "\n"
+                for sheet, user_id, payload, created_at in items
+            )
+            with FileLock(self._spill_lock_path):
+                with open(f"{self.spill_path}.{os.getpid()}", "a", encoding="utf-8") as f:
+                    f.write(lines)
+            self._count("spilled", len(items))
+            return True
+        except Exception as e:
+            print(f"감사 로그 임시 저장 실패: {e}")
+            return False
+
+    def _spill_files(self):
+        # 모든 프로세스의 spill 파일 (spill_path.<pid>) + 예전 버전이 남긴 spill_path
+        paths = [path for path in glob.glob(glob.escape(self.spill_path) + ".*")
+                 if path[len(self.spill_path) + 1:].isdigit()]
+        if os.path.exists(self.spill_path):
+            paths.append(self.spill_path)
+        return paths
+
+    def _replay_spill(self, wait: float = 0):
+        # 다른 프로세스가 이미 다시 저장 중이면 wait초까지 기다리고, 그래도 못 잡으면 건너뜀
+        # (잠금을 잡은 프로세스가 모든 프로세스의 spill 파일을 처리함)
+        replay_lock = FileLock(self._replay_lock_path, timeout=wait)
+        try:
+            if not replay_lock.acquire():
+                if wait:
+                    print(f"감사 로그 재저장 대기 시간 초과 ({wait}초): 다른 프로세스가 처리 중")
+                return
+        except OSError as e:
+            print(f"감사 로그 재저장 잠금 실패: {e}")
+            return
+        try:
+            replay_path = self.spill_path + ".replay"
+            while True:
+                if not os.path.exists(replay_path):
+                    with FileLock(self._spill_lock_path):
+                        # 쓰는 중인 프로세스가 없을 때 spill 파일 하나를 replay 파일로 가져감
+                        pending = self._spill_files()
+                        if not pending:
+                            return
+                        os.replace(pending[0], replay_path)
+                if not self._replay_file(replay_path):
+                    return  # 실패 → 남은 줄은 replay 파일에 두고 다음 기회에 재시도
+        finally:
+            replay_lock.release()
+
+    def _replay_file(self, replay_path) -> bool:
+        # replay 파일을 배치 단위로 다시 저장 (모두 저장하면 파일 삭제 후 True)
+        # 저장한 뒤 파일을 정리하기 전에 프로세스가 죽으면 다음 replay에서 같은 줄을 다시 읽지만,
+        # 줄마다 붙은 키를 저장소가 이미 저장된 것으로 보고 건너뛰므로 두 번 저장되지 않음
+        batch, keys, lines = [], [], []
+        with open(replay_path, encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                sheet, user_id, payload, created_at, *key = json.loads(line)  # 예전 버전이 쓴 줄에는 키가 없음
+                batch.append((sheet, user_id, payload, datetime.fromisoformat(created_at)))
+                keys.append(key[0] if key else None)
+                lines.append(line)
+                if len(batch) >= self.batch_size:
+                    if not self._write_replayed(batch, keys):
+                        # 아직 저장하지 못한 줄만 남겨서 다음 기회에 재시도
+                        self._keep_unreplayed(replay_path, lines, f)
+                        return False
+                    batch, keys, lines = [], [], []
+            if batch and not self._write_replayed(batch, keys):
+                self._keep_unreplayed(replay_path, lines, f)
+                return False
+        os.remove(replay_path)
+        return True
+
+    def _keep_unreplayed(self, replay_path, lines, rest):
+        rest_path = replay_path + ".rest"
+        with open(rest_path, "w", encoding="utf-8") as out:
+            out.writelines(lines)
+            for line in rest:
+                out.write(line)
+        rest.close()
+        os.replace(rest_path, replay_path)
+
+    def _write_replayed(self, batch, keys) -> bool:
+        # 다시 저장하다 실패하면 replay 파일을 그대로 두고 다음 기회에 재시도
+        try:
+            self.store.append_many(batch, keys=keys)
+        except Exception as e:
+            print(f"감사 로그 재저장 실패: {e}")
+            return False
+        self._count("written", len(batch))
+        return True
@@ -0,0 +1,246 @@
+import asyncio
+# 같은 키를 동시에 조회하는 요청들이 DB 조회 한 번의 결과를 함께 기다리도록 Future 사용
+from abc import ABC, abstractmethod
+# 저장소 인터페이스: 메서드를 빠뜨린 저장소는 만들 때(서버 시작 시) 바로 TypeError
+import threading
+# 여러 요청 스레드가 동시에 캐시를 건드려도 안전하도록 Lock 사용
+import time
+# 항목 만료(TTL) 계산용
+from collections import OrderedDict
+# 사용 순서를 기억하는 dict → 가장 오래 안 쓴 항목(LRU)을 쉽게 찾을 수 있음
+from config import POST_CACHE_BACKEND, POST_CACHE_SIZE, POST_CACHE_TTL, REDIS_URL
+# 게시글 조회 캐시 저장소 종류, 크기, 보관 시간
+
+# 프로세스 내부 LRU + TTL 캐시
+class LRUCache:
+    """최대 maxsize개까지 보관하고, ttl초가 지나면 만료되는 캐시
+
+    가득 차면 가장 오래 사용하지 않은 항목부터 버린다.
+    hit/miss/eviction 수를 세어 stats()로 확인할 수 있다.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()  # key → (만료 시각, 값)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                self.misses += 1
+                return default
+            expires_at, value = item
+            if expires_at <= time.monotonic():
+                # 만료된 항목은 지우고 miss 처리
+                del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)  # 최근 사용으로 표시
+            self.hits += 1
+            return value
+
+    def set(self, key, value, ttl: float = None):
+        # ttl을 주면 이 항목만 다른 만료 시간 사용
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)  # 가장 오래 안 쓴 항목 제거
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def delete_where(self, predicate):
+        # predicate(key, value)가 True인 항목을 모두 제거 (드물게 쓰는 일괄 무효화용)
+        with self._lock:
+            for key in [k for k, (_, v) in self._data.items() if predicate(k, v)]:
+                del self._data[key]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+# 캐시 저장소 인터페이스
+class CacheBackend(ABC):
+    """바이트 값을 키로 저장하는 캐시 저장소
+
+    메모리 LRU가 기본이고, 같은 메서드를 구현하면 Redis 같은 외부 저장소로 바꿀 수 있다.
+    외부 저장소는 네트워크 호출이므로 get/set/delete는 async로 정의한다.
+    """
+
+    @abstractmethod
+    async def get(self, key: str) -> bytes | None:
+        ...
+
+    @abstractmethod
+    async def set(self, key: str, value: bytes, ttl: float = None):
+        ...
+
+    @abstractmethod
+    async def delete(self, key: str):
+        ...
+
+    def stats(self) -> dict:
+        return {}
+
+class MemoryCacheBackend(CacheBackend):
+    """프로세스 내부 LRUCache를 사용하는 기본 저장소 (워커마다 따로 가짐)"""
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60.0):
+        self._cache = LRUCache(maxsize=maxsize, ttl=ttl)
+
+    async def get(self, key):
+        return self._cache.get(key)
+
+    async def set(self, key, value, ttl=None):
+        self._cache.set(key, value, ttl)
+
+    async def delete(self, key):
+        self._cache.delete(key)
+
+    def stats(self):
+        return {"backend": "memory", **self._cache.stats()}
+
+class RedisCacheBackend(CacheBackend):
+    """Redis(또는 호환 서버)를 사용하는 저장소, 여러 워커/서버가 캐시를 공유
+
+    redis 패키지가 설치되어 있어야 하며, 이 저장소를 선택했을 때만 import 한다.
+    크기/eviction은 Redis 서버가 관리하므로 hit/miss만 센다.
+    """
+
+    def __init__(self, url: str, ttl: float = 60.0, prefix: str = "myapi:"):
+        import redis.asyncio as redis_asyncio
+        self._redis = redis_asyncio.from_url(url)
+        self.ttl = ttl
+        self.prefix = prefix
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, key):
+        value = await self._redis.get(self.prefix + key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    async def set(self, key, value, ttl=None):
+        await self._redis.set(self.prefix + key, value, px=int((self.ttl if ttl is None else ttl) * 1000))
+
+    async def delete(self, key):
+        await self._redis.delete(self.prefix + key)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "backend": "redis",
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+def build_cache_backend(name: str, maxsize: int, ttl: float, url: str = "") -> CacheBackend:
+    # 설정 이름("memory" / "redis")으로 저장소 생성
+    if name == "memory":
+        return MemoryCacheBackend(maxsize=maxsize, ttl=ttl)
+    if name == "redis":
+        return RedisCacheBackend(url, ttl=ttl)
+    raise ValueError(f"알 수 없는 캐시 저장소: {name}")
+
+# 조회 결과 캐시 (read-through)
+class ReadThroughCache:
+    """캐시에 없으면 loader로 DB에서 읽어 저장하고 돌려주는 캐시
+
+    같은 키가 동시에 miss 나면 첫 요청만 loader를 실행하고 나머지는 그 결과를 기다린다 (stampede 방지).
+    loader 실행 중에 invalidate된 키는 결과를 저장하지 않아, 수정 전 값이 캐시에 다시 들어가지 않는다.
+    """
+
+    def __init__(self, backend: CacheBackend):
+        self.backend = backend
+        self._inflight = {}    # key → 실행 중인 loader 결과를 기다리는 Future
+        self._stale = set()    # loader 실행 중에 무효화된 키
+        self.loads = 0         # 실제로 loader(DB 조회)를 실행한 횟수
+        self.coalesced = 0     # 다른 요청의 조회 결과를 함께 받은 횟수
+        self.invalidations = 0
+
+    async def get_or_load(self, key: str, loader):
+        # loader: 값을 bytes로 돌려주는 async 함수, 없는 데이터면 None (None은 저장하지 않음)
+        value = await self.backend.get(key)
+        if value is not None:
+            return value
+        pending = self._inflight.get(key)
+        if pending is not None:
+            self.coalesced += 1
+            return await asyncio.shield(pending)  # 기다리던 요청이 취소돼도 공유 Future는 유지
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        self._stale.discard(key)
+        try:
+            self.loads += 1
+            value = await loader()
+            if value is not None and key not in self._stale:
+                await self.backend.set(key, value)
+            future.set_result(value)
+            return value
+        except asyncio.CancelledError:
+            future.cancel()  # 첫 요청이 취소되면 기다리던 요청도 취소 (다음 요청이 다시 조회)
+            raise
+        except Exception as exc:
+            future.set_exception(exc)
+            future.exception()  # 기다리는 요청이 없어도 "exception was never retrieved" 경고가 나지 않게 처리
+            raise
+        finally:
+            del self._inflight[key]
+            self._stale.discard(key)
+
+    async def invalidate(self, key: str):
+        # 쓰기(수정/삭제) 직후 호출 → 다음 조회는 DB에서 새로 읽음
+        self.invalidations += 1
+        if key in self._inflight:
+            self._stale.add(key)
+        await self.backend.delete(key)
+
+    def stats(self) -> dict:
+        return {
+            **self.backend.stats(),
+            "loads": self.loads,
+            "coalesced": self.coalesced,
+            "invalidations": self.invalidations,
+            "inflight": len(self._inflight),
+        }
+
+# ---------------------------
+# 게시글 단일 조회 캐시 (posts 라우터가 채우고, 게시글/댓글 쓰기 후 무효화)
+# ---------------------------
+post_cache = ReadThroughCache(build_cache_backend(POST_CACHE_BACKEND, POST_CACHE_SIZE, POST_CACHE_TTL, REDIS_URL))
+
+def post_cache_key(post_id: int) -> str:
+    return f"post:{post_id}"
+
+async def invalidate_post_cache(post_id: int):
+    # 게시글 내용이나 댓글 수가 바뀐 뒤(commit 후) 호출
+    await post_cache.invalidate(post_cache_key(post_id))
+
+def post_cache_stats() -> dict:
+    # hit 비율, 크기, eviction, 실제 DB 조회 횟수 등
+    return post_cache.stats()
@@ -0,0 +1,214 @@
+import os
+# 환경변수를 읽기 위한 기본 OS 모듈
+
+# 설정값 모음
+# 모든 값은 같은 이름의 환경변수로 덮어쓸 수 있음 (예: set AUDIT_QUEUE_POLICY=drop)
+
+def _env_str(name: str, default: str) -> str:
+    # 환경변수가 없으면 기본값 사용
+    return os.getenv(name, default)
+
+def _env_int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    return int(value) if value not in (None, "") else default
+
+def _env_float(name: str, default: float) -> float:
+    value = os.getenv(name)
+    return float(value) if value not in (None, "") else default
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value in (None, ""):
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+# ---------------------------
+# 감사 로그(엑셀 기록) 설정
+# ---------------------------
+_PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# 프로젝트 폴더 (main.py, loge_excel.py, data_log.xlsx가 있는 곳). 실행한 현재 폴더와 상관없이 같은 파일을 가리키도록
+AUDIT_EXCEL_PATH = _env_str("AUDIT_EXCEL_PATH", os.path.join(_PROJECT_DIR, "data_log.xlsx"))
+# 엑셀 파일 경로 (예전 기록을 가져올 파일이자 export_excel()이 만드는 파일). 예전처럼 C:\pro\data_log.xlsx를 쓰던 서버는 환경변수로 지정
+AUDIT_DB_PATH = _env_str("AUDIT_DB_PATH", os.path.join(os.path.dirname(AUDIT_EXCEL_PATH), "audit_log.db"))
+# 실제 기록이 쌓이는 감사 로그 DB (기본: 엑셀 파일과 같은 폴더)
+AUDIT_QUEUE_MAXSIZE = _env_int("AUDIT_QUEUE_MAXSIZE", 10000)
+# 메모리 큐에 쌓아둘 수 있는 최대 이벤트 수
+AUDIT_QUEUE_POLICY = _env_str("AUDIT_QUEUE_POLICY", "spill")
+# 큐가 가득 찼을 때 동작: drop(버림) / block(잠시 대기) / spill(디스크에 임시 저장)
+AUDIT_BLOCK_TIMEOUT = _env_float("AUDIT_BLOCK_TIMEOUT", 0.5)
+# block 정책일 때 최대 대기 시간(초). 넘기면 버림
+AUDIT_BATCH_SIZE = _env_int("AUDIT_BATCH_SIZE", 100)
+# 한 번에 저장할 이벤트 수
+AUDIT_FLUSH_INTERVAL = _env_float("AUDIT_FLUSH_INTERVAL", 1.0)
+# 이벤트가 적어도 이 시간(초)마다 한 번은 저장
+
+# ---------------------------
+# 비밀번호 해싱(bcrypt) 설정
+# ---------------------------
+PASSWORD_HASH_ROUNDS = _env_int("PASSWORD_HASH_ROUNDS", 12)
+# bcrypt cost factor. 1 올릴 때마다 해싱 시간이 약 2배
+PASSWORD_WORKERS = _env_int("PASSWORD_WORKERS", 4)
+# 비밀번호 해싱/검증 전용 스레드 수 (요청 처리 스레드풀과 분리)
+PASSWORD_MAX_PENDING = _env_int("PASSWORD_MAX_PENDING", 64)
+# 실행 중 + 대기 중인 비밀번호 작업 상한. 넘으면 바로 거절
+PASSWORD_BUSY_STATUS = _env_int("PASSWORD_BUSY_STATUS", 503)
+# 상한을 넘었을 때 응답 코드 (429 또는 503)
+
+# ---------------------------
+# 인증(JWT) 캐시 설정
+# ---------------------------
+TOKEN_CACHE_SIZE = _env_int("TOKEN_CACHE_SIZE", 10000)
+# 검증된 토큰 claims를 보관할 최대 개수
+TOKEN_CACHE_TTL = _env_float("TOKEN_CACHE_TTL", 300)
+# 토큰 claims 보관 시간(초). 토큰 만료 시각을 넘지는 않음
+USER_CACHE_SIZE = _env_int("USER_CACHE_SIZE", 10000)
+# 사용자 정보를 보관할 최대 개수
+USER_CACHE_TTL = _env_float("USER_CACHE_TTL", 60)
+# 사용자 정보 보관 시간(초). 여러 워커로 띄울 때 다른 워커의 캐시는 이 시간 안에 갱신됨
+
+# ---------------------------
+# 데이터베이스 설정
+# ---------------------------
+DB_MODE = _env_str("DB_MODE", "sync")
+# sync → 동기 엔진(요청마다 스레드풀 사용), async → AsyncEngine(aiosqlite/asyncpg, 스레드 없이 대기)
+DATABASE_URL = _env_str("DATABASE_URL", "sqlite:///./myapi.db")
+# 주 DB 주소. 예: postgresql://user:pw@db-host/myapi
+DATABASE_REPLICA_URLS = [url.strip() for url in _env_str("DATABASE_REPLICA_URLS", "").split(",") if url.strip()]
+# 읽기 전용 복제본 주소 목록 (쉼표로 구분). 비어 있으면 조회도 주 DB 사용
+
+# SQLite 튜닝 프로필 (연결할 때마다 PRAGMA로 적용)
+SQLITE_JOURNAL_MODE = _env_str("SQLITE_JOURNAL_MODE", "WAL")
+# WAL → 쓰는 중에도 읽기가 막히지 않음 (기본값 DELETE는 쓰기 하나가 모든 읽기를 막음)
+SQLITE_SYNCHRONOUS = _env_str("SQLITE_SYNCHRONOUS", "NORMAL")
+# WAL에서는 NORMAL이어도 DB가 깨지지 않음 (정전 시 마지막 커밋 몇 개만 잃을 수 있음)
+SQLITE_BUSY_TIMEOUT_MS = _env_int("SQLITE_BUSY_TIMEOUT_MS", 5000)
+# 다른 연결이 쓰는 중이면 "database is locked" 대신 이 시간(ms)까지 기다림
+SQLITE_MMAP_SIZE = _env_int("SQLITE_MMAP_SIZE", 268435456)
+# 메모리 매핑으로 읽을 최대 크기(바이트), 기본 256MB
+SQLITE_CACHE_SIZE = _env_int("SQLITE_CACHE_SIZE", -65536)
+# 연결당 페이지 캐시 크기. 음수는 KiB 단위 (-65536 → 64MB)
+SQLITE_TEMP_STORE = _env_str("SQLITE_TEMP_STORE", "MEMORY")
+# 정렬/임시 테이블을 디스크 대신 메모리에 생성
+SQLITE_STATEMENT_CACHE = _env_int("SQLITE_STATEMENT_CACHE", 256)
+# 연결당 준비된(prepared) SQL 문 캐시 개수 (sqlite3 cached_statements)
+
+MIGRATE_ON_STARTUP = _env_bool("MIGRATE_ON_STARTUP", False)
+# True → 서버 시작(lifespan) 때 밀린 스키마 마이그레이션 실행 (개발용). 기본값은 버전만 확인하고 밀려 있으면 시작 실패
+#        → 스키마는 배포 단계에서 한 번 올린다 (python app/scripts/migrate.py)
+MIGRATION_CHUNK_ROWS = _env_int("MIGRATION_CHUNK_ROWS", 1000)
+# 새 컬럼 값 채우기(backfill)를 이 행 수씩 나눠서 각각 따로 커밋 (큰 테이블을 오래 잠그지 않도록)
+MIGRATION_CHUNK_PAUSE = _env_float("MIGRATION_CHUNK_PAUSE", 0.0)
+# 배치 사이에 쉬는 시간(초). 운영 중에 돌릴 때 다른 쓰기 요청이 끼어들 틈을 줌
+MIGRATION_LOCK_TIMEOUT = _env_float("MIGRATION_LOCK_TIMEOUT", 600)
+# 다른 프로세스가 마이그레이션 중이면 이 시간(초)까지 기다림 (여러 워커가 동시에 시작할 때)
+
+# 커넥션 풀 설정
+DB_POOL_SIZE = _env_int("DB_POOL_SIZE", 5)
+# 평소 유지할 연결 수
+DB_MAX_OVERFLOW = _env_int("DB_MAX_OVERFLOW", 10)
+# 몰릴 때 추가로 열 수 있는 연결 수
+DB_POOL_TIMEOUT = _env_float("DB_POOL_TIMEOUT", 30)
+# 풀에서 연결을 얻기까지 최대 대기 시간(초)
+DB_POOL_RECYCLE = _env_int("DB_POOL_RECYCLE", 1800)
+# 이 시간(초)보다 오래된 연결은 닫고 새로 맺음. -1이면 사용 안 함
+DB_POOL_PRE_PING = _env_bool("DB_POOL_PRE_PING", True)
+# 풀에서 연결을 꺼낼 때마다 살아있는지 확인 (끊긴 연결은 자동으로 교체)
+DB_STATEMENT_TIMEOUT_MS = _env_int("DB_STATEMENT_TIMEOUT_MS", 0)
+# 쿼리 하나의 최대 실행 시간(ms). 0이면 제한 없음 (PostgreSQL/MySQL에서만 적용)
+DB_QUERY_CACHE_SIZE = _env_int("DB_QUERY_CACHE_SIZE", 1000)
+# SQLAlchemy가 컴파일한 SQL 문을 재사용하는 캐시 크기
+
+# ---------------------------
+# HTTP 캐시 설정 (게시글 조회 응답)
+# ---------------------------
+HTTP_CACHE_CONTROL = _env_str("HTTP_CACHE_CONTROL", "public, max-age=0, s-maxage=5")
+# 브라우저는 매번 ETag로 확인(변경 없으면 304), CDN/리버스 프록시는 5초 동안 직접 응답
+
+# ---------------------------
+# 게시글 조회 캐시 설정
+# ---------------------------
+POST_CACHE_BACKEND = _env_str("POST_CACHE_BACKEND", "memory")
+# memory → 워커 프로세스 내부 LRU, redis → Redis 서버 공유 (redis 패키지 필요)
+POST_CACHE_SIZE = _env_int("POST_CACHE_SIZE", 1024)
+# memory 저장소에 보관할 최대 게시글 수
+POST_CACHE_TTL = _env_float("POST_CACHE_TTL", 30)
+# 게시글 보관 시간(초). 여러 워커로 띄울 때 다른 워커의 수정은 이 시간 안에 반영됨
+REDIS_URL = _env_str("REDIS_URL", "redis://localhost:6379/0")
+# redis 저장소 주소
+
+# ---------------------------
+# JSON 응답 설정
+# ---------------------------
+FAST_JSON_RESPONSES = _env_bool("FAST_JSON_RESPONSES", False)
+# True → 목록 조회(게시글/댓글)를 ORM 객체 + Pydantic 검증 대신 행 tuple → orjson 바이트로 바로 응답
+
+# ---------------------------
+# 관리자 기능 설정
+# ---------------------------
+ADMIN_USER_IDS = {int(user_id) for user_id in _env_str("ADMIN_USER_IDS", "").split(",") if user_id.strip()}
+# 관리자 API(/admin/...)를 쓸 수 있는 사용자 id 목록 (쉼표로 구분, 예: 1,7)
+# 사용자 이름은 회원가입 때 누구나 고를 수 있으므로 이름이 아닌 id로 지정. 비어 있으면 관리자 API는 모두 403
+RESERVED_USERNAMES = {name.strip().lower() for name in _env_str("RESERVED_USERNAMES", "admin,administrator,root").split(",") if name.strip()}
+# 회원가입(/users/, /users/register)에 쓸 수 없는 사용자 이름 (관리자로 착각하게 만드는 이름, 대소문자 구분 없음)
+ADMIN_EXPORT_CHUNK_ROWS = _env_int("ADMIN_EXPORT_CHUNK_ROWS", 1000)
+# 엑셀 내보내기 때 DB에서 한 번에 읽어올 행 수
+
+# ---------------------------
+# 로그인 기록 설정
+# ---------------------------
+LOGIN_HISTORY_BATCH_SIZE = _env_int("LOGIN_HISTORY_BATCH_SIZE", 200)
+# 로그인 기록을 이만큼 모아서 한 트랜잭션으로 저장
+LOGIN_HISTORY_FLUSH_INTERVAL = _env_float("LOGIN_HISTORY_FLUSH_INTERVAL", 1.0)
+# 또는 이 시간(초)이 지나면 저장
+LOGIN_HISTORY_QUEUE_MAXSIZE = _env_int("LOGIN_HISTORY_QUEUE_MAXSIZE", 10000)
+# 저장 대기 큐 최대 길이
+LOGIN_HISTORY_QUEUE_POLICY = _env_str("LOGIN_HISTORY_QUEUE_POLICY", "spill")
+# 큐가 가득 찼을 때: drop / block / spill (감사 로그와 같은 정책)
+LOGIN_HISTORY_SPILL_PATH = _env_str("LOGIN_HISTORY_SPILL_PATH", "login_history.spill.jsonl")
+# 큐가 가득 차거나 DB 저장이 실패했을 때 임시로 쌓아둘 파일
+LOGIN_HISTORY_RETENTION_DAYS = _env_int("LOGIN_HISTORY_RETENTION_DAYS", 90)
+# 원본 로그인 기록 보존 기간(일). 지난 기록은 login_daily(사용자/날짜별 집계)로 합친 뒤 삭제
+LOGIN_HISTORY_COMPACT_CHUNK = _env_int("LOGIN_HISTORY_COMPACT_CHUNK", 5000)
+# 정리 작업 때 한 트랜잭션에서 처리할 행 수 (락을 오래 잡지 않도록)
+
+# ---------------------------
+# 요청 측정(/metrics) 설정
+# ---------------------------
+SLOW_REQUEST_SECONDS = _env_float("SLOW_REQUEST_SECONDS", 0.5)
+# 이 시간(초) 이상 걸린 요청은 실행한 SQL 목록과 함께 로그 출력
+SLOW_REQUEST_MAX_STATEMENTS = _env_int("SLOW_REQUEST_MAX_STATEMENTS", 50)
+# 느린 요청 로그에 남길 SQL 최대 개수 (요청마다 이만큼만 보관)
+
+# ---------------------------
+# 요청 제한(rate limit), 과부하 차단(load shedding) 설정
+# ---------------------------
+RATE_LIMIT_ENABLED = _env_bool("RATE_LIMIT_ENABLED", True)
+# 로그인/회원가입/댓글 작성 요청 수 제한 (토큰 버킷: 평균 속도 + 순간 허용량)
+RATE_LIMIT_BACKEND = _env_str("RATE_LIMIT_BACKEND", "memory")
+# memory → 워커 프로세스마다 따로 셈, redis → Redis 서버에서 모든 워커/서버가 함께 셈 (redis 패키지 필요)
+RATE_LIMIT_MAX_KEYS = _env_int("RATE_LIMIT_MAX_KEYS", 100000)
+# memory 저장소가 기억할 최대 키(IP/사용자) 수. 넘으면 가장 오래 안 쓴 키부터 잊음
+RATE_LIMIT_TRUST_FORWARDED = _env_bool("RATE_LIMIT_TRUST_FORWARDED", False)
+# True → X-Forwarded-For의 첫 주소를 클라이언트 IP로 사용 (리버스 프록시 뒤에서만 켤 것, 아니면 위조 가능)
+RATE_LIMIT_IP_FACTOR = _env_float("RATE_LIMIT_IP_FACTOR", 4.0)
+# IP 기준 한도 = 사용자 기준 한도 × 이 값 (회사/학교처럼 여러 사용자가 IP 하나를 같이 쓰는 경우). 0이면 IP 기준 제한 안 함
+RATE_LIMIT_LOGIN_PER_MINUTE = _env_float("RATE_LIMIT_LOGIN_PER_MINUTE", 10)
+RATE_LIMIT_LOGIN_BURST = _env_int("RATE_LIMIT_LOGIN_BURST", 5)
+# 로그인: 이메일(사용자)당 분당 10회, 연속 5회까지 (분당 횟수를 0으로 두면 이 범위는 제한하지 않음, 아래도 같음)
+RATE_LIMIT_REGISTER_PER_MINUTE = _env_float("RATE_LIMIT_REGISTER_PER_MINUTE", 5)
+RATE_LIMIT_REGISTER_BURST = _env_int("RATE_LIMIT_REGISTER_BURST", 3)
+# 회원가입: 분당 5회, 연속 3회까지 (IP 기준은 × RATE_LIMIT_IP_FACTOR)
+RATE_LIMIT_COMMENT_PER_MINUTE = _env_float("RATE_LIMIT_COMMENT_PER_MINUTE", 30)
+RATE_LIMIT_COMMENT_BURST = _env_int("RATE_LIMIT_COMMENT_BURST", 10)
+# 댓글 작성: 로그인 토큰당 분당 30회, 연속 10회까지 (토큰 없이 보내면 IP 기준만)
+
+SHED_MAX_INFLIGHT = _env_int("SHED_MAX_INFLIGHT", 256)
+# 처리 중인 요청이 이 수 이상이면 새 쓰기 요청은 503으로 바로 거절. 0이면 사용 안 함
+SHED_MAX_POOL_WAIT = _env_float("SHED_MAX_POOL_WAIT", 0.5)
+# 최근 SHED_WINDOW_SECONDS초 동안 DB 연결을 얻기까지 기다린 평균 시간(초)이 이 값 이상이면 거절. 0이면 사용 안 함
+SHED_WINDOW_SECONDS = _env_float("SHED_WINDOW_SECONDS", 5.0)
+# DB 연결 대기 시간 평균을 계산할 최근 구간(초)
+SHED_METHODS = {m.strip().upper() for m in _env_str("SHED_METHODS", "POST,PUT,PATCH,DELETE").split(",") if m.strip()}
+# 과부하일 때 거절할 요청 메서드 (기본: 쓰기만 거절하고 조회는 계속 처리)
+SHED_RETRY_AFTER = _env_int("SHED_RETRY_AFTER", 2)
+# 과부하로 거절할 때 Retry-After 헤더 값(초)
@@ -0,0 +1,56 @@
+import hashlib
+# ETag 값을 만들 때 사용할 해시 함수
+from datetime import datetime, timezone
+# Last-Modified / If-Modified-Since 시각 비교용
+from email.utils import format_datetime, parsedate_to_datetime
+# HTTP 날짜 형식(예: Wed, 01 Jan 2025 00:00:00 GMT) 변환
+from fastapi import Response
+# 304 Not Modified 응답 생성
+from config import HTTP_CACHE_CONTROL
+# 조회 응답에 붙일 Cache-Control 값
+
+# HTTP 조건부 요청(ETag / Last-Modified) 공통 함수
+# 클라이언트나 CDN이 이전 응답의 ETag를 If-None-Match로 보내면,
+# 내용이 그대로일 때 본문 없이 304만 돌려주어 직렬화와 전송 비용을 줄인다
+
+def make_etag(*parts) -> str:
+    # 값들(예: 게시글 id, 수정 시각)로 strong ETag 생성 → "a1b2c3..."
+    raw = "|".join(p.isoformat() if isinstance(p, datetime) else str(p) for p in parts)
+    return '"' + hashlib.sha1(raw.encode()).hexdigest()[:20] + '"'
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    # If-None-Match 헤더에 현재 ETag가 들어 있는지 확인
+    # 여러 개(쉼표 구분), "*", 약한 비교(W/ 접두어 무시) 모두 처리
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (tag.strip() for tag in if_none_match.split(","))
+    return etag in (tag[2:] if tag.startswith("W/") else tag for tag in candidates)
+
+def http_date(value: datetime) -> str:
+    # DB의 UTC 시각(naive)을 HTTP 날짜 문자열로 변환
+    return format_datetime(value.replace(tzinfo=timezone.utc, microsecond=0), usegmt=True)
+
+def not_modified_since(if_modified_since: str | None, last_modified: datetime) -> bool:
+    # If-Modified-Since 이후로 바뀌지 않았으면 True (HTTP 날짜는 초 단위이므로 초 미만은 버림)
+    if not if_modified_since:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False  # 형식이 잘못된 헤더는 무시하고 전체 응답
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    return last_modified.replace(tzinfo=timezone.utc, microsecond=0) <= since
+
+def cache_headers(etag: str, last_modified: datetime | None = None) -> dict:
+    # 200/304 응답에 똑같이 붙일 캐시 관련 헤더
+    headers = {"ETag": etag, "Cache-Control": HTTP_CACHE_CONTROL}
+    if last_modified is not None:
+        headers["Last-Modified"] = http_date(last_modified)
+    return headers
+
+def not_modified(headers: dict) -> Response:
+    # 본문 없는 304 응답 (캐시 헤더는 그대로 포함)
+    return Response(status_code=304, headers=headers)
@@ -0,0 +1,23 @@
+import json
+# orjson이 없을 때 사용할 기본 JSON 인코더
+from fastapi import Response
+# 이미 만들어진 JSON 바이트를 그대로 보내는 응답
+try:
+    import orjson
+    # C로 구현된 빠른 JSON 인코더 (datetime도 직접 ISO 형식으로 변환)
+except ImportError:
+    orjson = None
+
+# 빠른 JSON 응답 경로
+# response_model을 거치면 행마다 Pydantic 검증(from_attributes) + 직렬화를 하므로
+# 목록처럼 행이 많은 응답은 DB 행(tuple)을 dict로 바꿔 바로 JSON 바이트로 만든다
+
+def dumps(content) -> bytes:
+    # dict/list → JSON 바이트. datetime은 Pydantic과 같은 ISO 형식 문자열로 변환
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, default=lambda v: v.isoformat(), ensure_ascii=False, separators=(",", ":")).encode()
+
+def json_response(content, headers: dict = None) -> Response:
+    # 검증 없이 바로 JSON 응답 생성 (응답 스키마와 같은 모양인지는 호출하는 쪽이 보장)
+    return Response(content=dumps(content), media_type="application/json", headers=headers)
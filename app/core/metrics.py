@@ -0,0 +1,293 @@
+import bisect
+# 관측값이 들어갈 히스토그램 구간(bucket) 찾기
+import collections
+# 최근 DB 연결 대기 시간을 시간 순서대로 보관 (deque)
+import contextvars
+# 요청마다 따로 쌓이는 SQL 실행 횟수/시간 (스레드풀, 비동기 세션 안에서도 같은 요청으로 묶임)
+import threading
+import time
+from contextlib import contextmanager
+from sqlalchemy import event
+from config import SLOW_REQUEST_SECONDS, SLOW_REQUEST_MAX_STATEMENTS, SHED_WINDOW_SECONDS
+
+# 요청 지연 시간, 요청별 SQL 횟수/시간, bcrypt·감사 로그 작업 시간 측정
+# 외부 라이브러리 없이 Prometheus 텍스트 형식(/metrics)으로 내보낸다
+#   - 히스토그램: 구간별 누적 개수(_bucket), 합계(_sum), 개수(_count) → histogram_quantile()로 p50/p95/p99 계산
+#   - 라벨은 개수가 정해진 값만 사용 (경로는 실제 URL이 아니라 "/posts/{post_id}" 같은 라우트 템플릿)
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# 초 단위 구간
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+# 요청 하나가 실행한 SQL 수 구간
+
+_registry = []
+# 등록된 지표 (render_metrics()가 순서대로 출력)
+
+
+def _label_text(names, values, extra=()) -> str:
+    pairs = [(name, str(value)) for name, value in zip(names, values)] + list(extra)
+    if not pairs:
+        return ""
+    escaped = (value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"') for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+
+class Counter:
+    """증가만 하는 값 (예: 느린 요청 수)"""
+
+    def __init__(self, name: str, help: str, labelnames=()):
+        self.name, self.help, self.labelnames = name, help, tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def inc(self, *labels, amount: float = 1.0):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def render(self) -> list:
+        with self._lock:
+            items = sorted(self._values.items())
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        lines += [f"{self.name}{_label_text(self.labelnames, labels)} {value}" for labels, value in items]
+        return lines
+
+
+class Histogram:
+    """관측값을 구간별로 세는 히스토그램 (라벨 조합마다 따로 집계)"""
+
+    def __init__(self, name: str, help: str, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name, self.help, self.labelnames = name, help, tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}  # 라벨 값 tuple → [구간별 개수(+Inf 포함), 합계, 개수]
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def observe(self, value: float, *labels):
+        index = bisect.bisect_left(self.buckets, value)  # value <= bucket 인 첫 구간 (없으면 +Inf)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> list:
+        with self._lock:
+            items = sorted((labels, (list(counts), total, count)) for labels, (counts, total, count) in self._series.items())
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for labels, (counts, total, count) in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float("inf"),), counts):
+                cumulative += n
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f"{self.name}_bucket{_label_text(self.labelnames, labels, [('le', le)])} {cumulative}")
+            lines.append(f"{self.name}_sum{_label_text(self.labelnames, labels)} {total}")
+            lines.append(f"{self.name}_count{_label_text(self.labelnames, labels)} {count}")
+        return lines
+
+
+class Gauge:
+    """렌더링할 때 function()을 불러서 현재 값을 보여주는 값 (예: 처리 중인 요청 수)"""
+
+    def __init__(self, name: str, help: str, function):
+        self.name, self.help, self.function = name, help, function
+        _registry.append(self)
+
+    def render(self) -> list:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge", f"{self.name} {float(self.function())}"]
+
+
+class RecentValues:
+    """최근 seconds초 동안 들어온 값만 보관하고 평균을 계산 (요청이 없으면 오래된 값은 자연히 빠짐)"""
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self._values = collections.deque()  # (시각, 값)
+        self._total = 0.0
+        self._lock = threading.Lock()
+
+    def add(self, value: float):
+        now = time.monotonic()
+        with self._lock:
+            self._values.append((now, value))
+            self._total += value
+            self._prune(now)
+
+    def mean(self) -> float:
+        with self._lock:
+            self._prune(time.monotonic())
+            return self._total / len(self._values) if self._values else 0.0
+
+    def _prune(self, now: float):
+        while self._values and self._values[0][0] < now - self.seconds:
+            self._total -= self._values.popleft()[1]
+        if not self._values:
+            self._total = 0.0  # 부동소수점 오차가 쌓이지 않도록
+
+
+def render_metrics() -> str:
+    # 모든 지표를 Prometheus 텍스트 형식으로
+    lines = []
+    for metric in _registry:
+        lines += metric.render()
+    return "\n".join(lines) + "\n"
+
+
+REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds", "HTTP 요청 처리 시간(초)", ("method", "route", "status"))
+REQUEST_QUERIES = Histogram(
+    "http_request_db_queries", "요청 하나가 실행한 SQL 수", ("method", "route"), buckets=COUNT_BUCKETS)
+REQUEST_DB_SECONDS = Histogram(
+    "http_request_db_seconds", "요청 하나가 SQL 실행에 쓴 시간(초)", ("method", "route"))
+REQUEST_WORK_SECONDS = Histogram(
+    "http_request_work_seconds", "요청 하나가 bcrypt/감사 로그(엑셀) 작업에 쓴 시간(초)", ("kind", "route"))
+SLOW_REQUESTS = Counter(
+    "http_slow_requests_total", f"SLOW_REQUEST_SECONDS({SLOW_REQUEST_SECONDS}초) 이상 걸린 요청 수", ("method", "route"))
+QUERY_SECONDS = Histogram(
+    "db_query_duration_seconds", "SQL 한 번 실행 시간(초)", ("operation",))
+WORK_SECONDS = Histogram(
+    "work_duration_seconds", "bcrypt/감사 로그(엑셀) 작업 시간(초), 요청 밖(백그라운드 기록 스레드) 포함", ("kind",))
+POOL_WAIT_SECONDS = Histogram(
+    "db_pool_wait_seconds", "커넥션 풀에서 DB 연결을 얻기까지 걸린 시간(초)")
+RATE_LIMITED = Counter(
+    "http_rate_limited_total", "요청 수 제한으로 거절(429)한 요청 수", ("scope", "key"))
+SHED_REQUESTS = Counter(
+    "http_shed_requests_total", "과부하로 거절(503)한 요청 수", ("method", "reason"))
+
+pool_wait = RecentValues(SHED_WINDOW_SECONDS)
+# 최근 DB 연결 대기 시간 (과부하 차단 판단용)
+
+
+# ---------------------------
+# 요청별 측정값
+# ---------------------------
+class RequestStats:
+    """요청 하나 동안 쌓이는 SQL 횟수/시간, 작업 시간, (느린 요청 로그용) SQL 목록"""
+
+    __slots__ = ("queries", "db_seconds", "work", "statements")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.work = {}        # kind → 초
+        self.statements = []  # (초, SQL) 최대 SLOW_REQUEST_MAX_STATEMENTS개
+
+_current = contextvars.ContextVar("request_stats", default=None)
+
+
+def current_stats():
+    # 지금 처리 중인 요청의 측정값 (요청 밖이면 None)
+    return _current.get()
+
+
+@contextmanager
+def track(kind: str):
+    # with track("bcrypt"): ... → 작업 시간을 WORK_SECONDS와 현재 요청 측정값에 기록
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        WORK_SECONDS.observe(elapsed, kind)
+        stats = _current.get()
+        if stats is not None:
+            stats.work[kind] = stats.work.get(kind, 0.0) + elapsed
+
+
+# ---------------------------
+# SQL 실행 측정 (SQLAlchemy 이벤트)
+# ---------------------------
+def _operation(statement: str) -> str:
+    # 라벨에는 SQL 종류만 사용 (SELECT/INSERT/UPDATE/DELETE/...)
+    word = statement.lstrip().split(None, 1)
+    return word[0].upper() if word else "OTHER"
+
+
+def instrument_engine(sync_engine):
+    # 엔진의 모든 SQL 실행 시간, 커넥션 풀 대기 시간을 측정 (비동기 엔진은 .sync_engine을 넘김)
+    pool = sync_engine.pool
+    connect = pool.connect
+    # 풀에는 "연결을 기다리기 시작" 이벤트가 없으므로 엔진이 연결을 꺼낼 때 부르는 pool.connect를 감싸서 측정
+
+    def timed_connect():
+        started = time.perf_counter()
+        try:
+            return connect()
+        finally:
+            elapsed = time.perf_counter() - started
+            POOL_WAIT_SECONDS.observe(elapsed)
+            pool_wait.add(elapsed)
+
+    pool.connect = timed_connect
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        context._metrics_started = time.perf_counter()
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - context._metrics_started
+        QUERY_SECONDS.observe(elapsed, _operation(statement))
+        stats = _current.get()
+        if stats is not None:
+            stats.queries += 1
+            stats.db_seconds += elapsed
+            if len(stats.statements) < SLOW_REQUEST_MAX_STATEMENTS:
+                stats.statements.append((elapsed, statement))
+
+
+# ---------------------------
+# ASGI 미들웨어
+# ---------------------------
+class MetricsMiddleware:
+    """요청마다 처리 시간, SQL 수/시간, 작업 시간을 라우트별로 기록하고 느린 요청은 SQL 목록과 함께 출력"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        stats = RequestStats()
+        token = _current.set(stats)
+        status = 500  # 응답을 시작하기 전에 예외가 나면 500
+        started = time.perf_counter()
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            _current.reset(token)
+            elapsed = time.perf_counter() - started
+            route = scope.get("route")
+            route = getattr(route, "path", None) or "unmatched"  # 없는 경로는 URL별로 나누지 않음
+            method = scope["method"]
+            REQUEST_SECONDS.observe(elapsed, method, route, status)
+            REQUEST_QUERIES.observe(stats.queries, method, route)
+            REQUEST_DB_SECONDS.observe(stats.db_seconds, method, route)
+            for kind, seconds in stats.work.items():
+                REQUEST_WORK_SECONDS.observe(seconds, kind, route)
+            if elapsed >= SLOW_REQUEST_SECONDS:
+                SLOW_REQUESTS.inc(method, route)
+                _log_slow_request(method, scope.get("path", ""), status, elapsed, stats)
+
+
+def _log_slow_request(method, path, status, elapsed, stats: RequestStats):
+    work = ", ".join(f"{kind} {seconds * 1000:.1f}ms" for kind, seconds in stats.work.items()) or "-"
+    lines = [
+        f"느린 요청: {method} {path} → {status}, {elapsed * 1000:.1f}ms "
+        f"(SQL {stats.queries}회 {stats.db_seconds * 1000:.1f}ms, 작업 {work})"
+    ]
+    for seconds, statement in stats.statements:
+        lines.append(f"    {seconds * 1000:8.2f}ms  {' '.join(statement.split())[:300]}")
+    if stats.queries > len(stats.statements):
+        lines.append(f"    ... 외 {stats.queries - len(stats.statements)}개")
+    print("\n".join(lines))
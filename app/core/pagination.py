@@ -0,0 +1,26 @@
+import base64, json
+# base64 → cursor를 URL에 안전한 문자열로 인코딩
+# json → cursor 안에 들어갈 값(정렬 키)을 직렬화
+from fastapi import HTTPException
+# 잘못된 cursor가 들어오면 400 에러 응답
+
+# 키셋(cursor) 페이지네이션 공통 함수
+# OFFSET 방식은 앞 페이지를 모두 건너뛰어야 하므로 뒤 페이지일수록 느려지지만
+# cursor 방식은 "마지막으로 본 정렬 키 다음부터" 인덱스를 타므로 몇 번째 페이지든 비용이 같다
+
+def encode_cursor(*values) -> str:
+    # 정렬 키 값들(예: create_date, id)을 불투명한 문자열로 변환
+    raw = json.dumps(values, default=lambda v: v.isoformat(), separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str, *types) -> tuple:
+    # encode_cursor로 만든 문자열을 다시 값으로 변환
+    # types: 각 값을 변환할 함수 (예: datetime.fromisoformat, int)
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if len(values) != len(types):
+            raise ValueError("cursor 길이 불일치")
+        return tuple(convert(value) for convert, value in zip(types, values))
+    except Exception:
+        raise HTTPException(status_code=400, detail="잘못된 cursor 값입니다.")
@@ -0,0 +1,259 @@
+import hashlib
+# 토큰을 키로 쓸 때 원문 대신 해시 사용
+from abc import ABC, abstractmethod
+# 저장소 인터페이스: 메서드를 빠뜨린 저장소는 만들 때(서버 시작 시) 바로 TypeError
+import math
+# Retry-After 초 단위 올림
+import threading
+# 여러 요청이 동시에 같은 버킷을 건드려도 안전하도록 Lock 사용
+import time
+# 토큰 충전량 계산용
+from collections import OrderedDict
+# 가장 오래 안 쓴 키(LRU)부터 잊기 위해 사용
+from fastapi import HTTPException, Request
+from fastapi.responses import JSONResponse
+from config import (
+    RATE_LIMIT_ENABLED, RATE_LIMIT_BACKEND, RATE_LIMIT_MAX_KEYS, RATE_LIMIT_TRUST_FORWARDED, RATE_LIMIT_IP_FACTOR,
+    RATE_LIMIT_LOGIN_PER_MINUTE, RATE_LIMIT_LOGIN_BURST, RATE_LIMIT_REGISTER_PER_MINUTE, RATE_LIMIT_REGISTER_BURST,
+    RATE_LIMIT_COMMENT_PER_MINUTE, RATE_LIMIT_COMMENT_BURST, REDIS_URL,
+    SHED_MAX_INFLIGHT, SHED_MAX_POOL_WAIT, SHED_METHODS, SHED_RETRY_AFTER,
+)
+from metrics import Gauge, RATE_LIMITED, SHED_REQUESTS, pool_wait
+
+# 입장 제어 (bcrypt, 감사 로그를 쓰는 로그인/회원가입/댓글 작성이 몰려서 조회까지 느려지는 것 방지)
+#   1) 요청 수 제한: IP별, 사용자별 토큰 버킷 → 넘으면 429 + Retry-After (라우트 의존성 RateLimit)
+#   2) 과부하 차단: 처리 중인 요청 수 또는 DB 연결 대기 시간이 기준을 넘으면 쓰기 요청을 503 + Retry-After (LoadShedMiddleware)
+
+
+# ---------------------------
+# 토큰 버킷 저장소
+# ---------------------------
+class RateLimitBackend(ABC):
+    """키마다 토큰 버킷을 두는 저장소
+
+    버킷은 초당 rate개씩 burst개까지 채워지고, 요청 하나가 토큰 cost개를 쓴다.
+    메모리가 기본이고, 같은 메서드를 구현하면 Redis 같은 공유 저장소로 바꿀 수 있다.
+    """
+
+    @abstractmethod
+    async def take(self, buckets, cost: float = 1.0) -> list:
+        # buckets: [(key, rate, burst), ...] (한 요청이 쓰는 IP 버킷, 사용자 버킷)
+        # 모든 버킷에 토큰이 있을 때만 한꺼번에 쓰고, 하나라도 모자라면 아무 버킷에서도 쓰지 않음
+        # → 버킷별로 다시 시도할 수 있을 때까지 남은 시간(초) 목록 반환 (모두 0이면 허용)
+        ...
+
+    def stats(self) -> dict:
+        return {}
+
+class MemoryRateLimitBackend(RateLimitBackend):
+    """프로세스 내부 저장소 (워커마다 따로 셈 → 워커 N개면 실제 한도는 최대 N배)"""
+
+    def __init__(self, maxsize: int = 100000):
+        self.maxsize = maxsize
+        self._buckets = OrderedDict()  # key → (남은 토큰, 마지막 계산 시각)
+        self._lock = threading.Lock()
+
+    async def take(self, buckets, cost=1.0):
+        now = time.monotonic()
+        with self._lock:
+            refilled, waits = [], []
+            for key, rate, burst in buckets:
+                tokens, updated = self._buckets.get(key, (burst, now))
+                tokens = min(burst, tokens + (now - updated) * rate)  # 지난 시간만큼 충전
+                refilled.append(tokens)
+                waits.append(0.0 if tokens >= cost else (cost - tokens) / rate)
+            spend = cost if not any(waits) else 0  # 하나라도 모자라면 충전만 반영하고 쓰지 않음
+            for (key, _, _), tokens in zip(buckets, refilled):
+                self._buckets[key] = (tokens - spend, now)
+                self._buckets.move_to_end(key)
+            while len(self._buckets) > self.maxsize:
+                self._buckets.popitem(last=False)  # 가장 오래 안 쓴 키 제거 (다시 오면 가득 찬 버킷으로 시작)
+            return waits
+
+    def stats(self):
+        with self._lock:
+            return {"backend": "memory", "keys": len(self._buckets), "maxsize": self.maxsize}
+
+class RedisRateLimitBackend(RateLimitBackend):
+    """Redis(또는 호환 서버)에 버킷을 두는 저장소, 여러 워커/서버가 같은 한도를 공유
+
+    redis 패키지가 설치되어 있어야 하며, 이 저장소를 선택했을 때만 import 한다.
+    충전/차감은 Lua 스크립트로 한 번에 실행하므로 동시에 요청이 와도 토큰이 두 번 쓰이지 않는다.
+    """
+
+    SCRIPT = """
+    local now, cost = tonumber(ARGV[1]), tonumber(ARGV[2])
+    local tokens, waits, denied = {}, {}, false
+    for i, key in ipairs(KEYS) do
+        local rate, burst = tonumber(ARGV[1 + 2 * i]), tonumber(ARGV[2 + 2 * i])
+        local data = redis.call('HMGET', key, 'tokens', 'ts')
+        local ts = tonumber(data[2]) or now
+        tokens[i] = math.min(burst, (tonumber(data[1]) or burst) + math.max(0, now - ts) * rate)
+        waits[i] = 0
+        if tokens[i] < cost then waits[i] = (cost - tokens[i]) / rate; denied = true end
+    end
+    for i, key in ipairs(KEYS) do
+        local rate, burst = tonumber(ARGV[1 + 2 * i]), tonumber(ARGV[2 + 2 * i])
+        if not denied then tokens[i] = tokens[i] - cost end
+        redis.call('HSET', key, 'tokens', tostring(tokens[i]), 'ts', tostring(now))
+        redis.call('PEXPIRE', key, math.ceil(burst / rate * 1000) + 1000)
+        waits[i] = tostring(waits[i])
+    end
+    return waits
+    """
+    # 모든 키를 확인한 뒤 모두 허용일 때만 토큰을 씀 (스크립트 하나라 중간에 다른 요청이 끼어들지 않음)
+    # 가득 찰 시간이 지나면 키가 사라짐 (없는 키 = 가득 찬 버킷). 소수는 정수로 잘리지 않도록 문자열로 반환
+
+    def __init__(self, url: str, prefix: str = "myapi:ratelimit:"):
+        import redis.asyncio as redis_asyncio
+        self._redis = redis_asyncio.from_url(url)
+        self._script = self._redis.register_script(self.SCRIPT)
+        self.prefix = prefix
+
+    async def take(self, buckets, cost=1.0):
+        args = [time.time(), cost]
+        for _, rate, burst in buckets:
+            args += [rate, burst]
+        waits = await self._script(keys=[self.prefix + key for key, _, _ in buckets], args=args)
+        return [float(wait) for wait in waits]
+
+    def stats(self):
+        return {"backend": "redis"}
+
+def build_rate_limit_backend(name: str, maxsize: int, url: str = "") -> RateLimitBackend:
+    # 설정 이름("memory" / "redis")으로 저장소 생성
+    if name == "memory":
+        return MemoryRateLimitBackend(maxsize=maxsize)
+    if name == "redis":
+        return RedisRateLimitBackend(url)
+    raise ValueError(f"알 수 없는 요청 제한 저장소: {name}")
+
+rate_limit_backend = build_rate_limit_backend(RATE_LIMIT_BACKEND, RATE_LIMIT_MAX_KEYS, REDIS_URL)
+
+
+# ---------------------------
+# 요청 수 제한 (라우트 의존성)
+# ---------------------------
+def client_ip(request: Request) -> str:
+    # 요청을 보낸 IP (프록시 뒤라면 RATE_LIMIT_TRUST_FORWARDED=true로 X-Forwarded-For 사용)
+    if RATE_LIMIT_TRUST_FORWARDED:
+        forwarded = request.headers.get("x-forwarded-for")
+        if forwarded:
+            return forwarded.split(",", 1)[0].strip()
+    return request.client.host if request.client else "unknown"
+
+async def _request_user(request: Request, field: str = None):
+    # 사용자 기준 키: 요청 본문의 field 값(로그인 이메일 = 공격 대상 계정), 없으면 Bearer 토큰
+    # → 본문 값은 클라이언트가 마음대로 바꿀 수 있으므로 "누가 보냈는지"가 아니라 "어느 계정을 노리는지"에만 사용
+    # FastAPI가 라우트 인자를 만들 때 이미 읽은 본문(form/json)을 다시 쓰므로 추가로 읽지 않음
+    if field:
+        if request.headers.get("content-type", "").startswith("application/json"):
+            body = await request.json()
+            value = body.get(field) if isinstance(body, dict) else None
+        else:
+            value = (await request.form()).get(field)
+        if value not in (None, ""):
+            return str(value).strip().lower()
+    authorization = request.headers.get("authorization", "")
+    if authorization.lower().startswith("bearer "):
+        return "token:" + hashlib.sha256(authorization[7:].encode()).hexdigest()[:32]
+    return None
+
+class RateLimit:
+    """라우트 의존성: IP별, 사용자별 토큰 버킷을 하나씩 쓰고 모자라면 429
+
+    @router.post("/login", dependencies=[Depends(login_rate_limit)]) 처럼 사용한다.
+    IP 한도는 사용자 한도 × RATE_LIMIT_IP_FACTOR (여러 사용자가 IP 하나를 같이 쓰는 경우).
+    IP, 사용자 버킷을 모두 확인한 뒤 둘 다 허용일 때만 토큰을 쓰므로
+    사용자 한도에 걸린 요청이 같은 IP(NAT 뒤의 다른 사용자)의 한도를 깎지 않는다.
+    per_minute가 0 이하면 이 범위는 제한하지 않음, RATE_LIMIT_IP_FACTOR가 0 이하면 IP 기준은 쓰지 않음.
+    """
+
+    def __init__(self, scope: str, per_minute: float, burst: int, user_field: str = None,
+                 backend: RateLimitBackend = None):
+        self.scope = scope
+        self.rate = per_minute / 60.0  # 초당 충전량
+        self.burst = max(1, burst)  # 0이면 한 번도 허용하지 못하므로 최소 1
+        self.user_field = user_field
+        self.backend = backend or rate_limit_backend
+
+    async def __call__(self, request: Request):
+        if not RATE_LIMIT_ENABLED or self.rate <= 0:
+            return
+        checks = []
+        if RATE_LIMIT_IP_FACTOR > 0:
+            checks.append(("ip", client_ip(request), self.rate * RATE_LIMIT_IP_FACTOR, math.ceil(self.burst * RATE_LIMIT_IP_FACTOR)))
+        user = await _request_user(request, self.user_field)
+        if user is not None:
+            checks.append(("user", user, self.rate, self.burst))
+        if not checks:
+            return
+        waits = await self.backend.take([(f"{self.scope}:{key_type}:{key}", rate, burst) for key_type, key, rate, burst in checks])
+        if any(waits):
+            wait, key_type = max(zip(waits, (check[0] for check in checks)))
+            RATE_LIMITED.inc(self.scope, key_type)  # 거절한 요청 하나당 한 번, 가장 오래 기다려야 하는 기준으로 기록
+            raise HTTPException(
+                status_code=429,
+                detail="요청이 너무 많습니다. 잠시 후 다시 시도해주세요.",
+                headers={"Retry-After": str(max(1, math.ceil(wait)))},
+            )
+
+login_rate_limit = RateLimit("login", RATE_LIMIT_LOGIN_PER_MINUTE, RATE_LIMIT_LOGIN_BURST, user_field="email")
+# 로그인: 같은 이메일로 비밀번호를 계속 대입하는 경우 + 한 IP에서 여러 계정을 시도하는 경우
+register_rate_limit = RateLimit("register", RATE_LIMIT_REGISTER_PER_MINUTE, RATE_LIMIT_REGISTER_BURST)
+# 회원가입: 아직 사용자가 없으므로 IP 기준만
+comment_rate_limit = RateLimit("comment", RATE_LIMIT_COMMENT_PER_MINUTE, RATE_LIMIT_COMMENT_BURST)
+# 댓글 작성: Bearer 토큰 기준 + IP 기준 (본문의 user_id는 요청마다 바꿔서 한도를 피할 수 있으므로 쓰지 않음)
+
+def rate_limit_stats() -> dict:
+    return {"enabled": RATE_LIMIT_ENABLED, **rate_limit_backend.stats()}
+
+
+# ---------------------------
+# 과부하 차단 (ASGI 미들웨어)
+# ---------------------------
+_inflight = 0
+# 지금 처리 중인 HTTP 요청 수 (이벤트 루프에서만 변경)
+
+Gauge("http_requests_in_flight", "지금 처리 중인 HTTP 요청 수", lambda: _inflight)
+Gauge("db_pool_wait_recent_seconds", "최근 DB 연결 대기 시간 평균(초), 과부하 차단 기준과 비교하는 값", pool_wait.mean)
+
+def overload_reason():
+    # 과부하면 이유("inflight" / "pool_wait"), 아니면 None
+    if SHED_MAX_INFLIGHT and _inflight >= SHED_MAX_INFLIGHT:
+        return "inflight"
+    if SHED_MAX_POOL_WAIT and pool_wait.mean() >= SHED_MAX_POOL_WAIT:
+        return "pool_wait"
+    return None
+
+class LoadShedMiddleware:
+    """처리 중인 요청 수나 DB 연결 대기 시간이 기준을 넘으면 SHED_METHODS(기본: 쓰기) 요청을 바로 503으로 거절
+
+    줄을 세워 기다리게 하는 대신 빨리 거절해서 이미 받은 요청과 조회 요청의 지연 시간을 지킨다.
+    DB 연결 대기 시간은 최근 SHED_WINDOW_SECONDS초 평균이라 부하가 줄면 자동으로 다시 받는다.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        global _inflight
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        if scope["method"] in SHED_METHODS:
+            reason = overload_reason()
+            if reason is not None:
+                SHED_REQUESTS.inc(scope["method"], reason)
+                response = JSONResponse(
+                    {"detail": "서버가 바빠 요청을 처리할 수 없습니다. 잠시 후 다시 시도해주세요."},
+                    status_code=503,
+                    headers={"Retry-After": str(SHED_RETRY_AFTER)},
+                )
+                await response(scope, receive, send)
+                return
+        _inflight += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _inflight -= 1
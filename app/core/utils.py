@@ -6,14 +6,30 @@ from fastapi import Depends, HTTPException
 # HTTPException → HTTP 에러 응답 발생시 사용
 from fastapi.security import OAuth2PasswordBearer  
 # OAuth2 비밀번호 기반 인증을 위한 FastAPI 보안 모듈
-from sqlalchemy.orm import Session  
-# DB 세션 타입 힌트용
-from database import get_db  
-# DB 세션 생성 함수 import
+from sqlalchemy import select
+# 조회 쿼리 작성용
+from database import get_db, DBSession  
+# DB 세션 생성 함수, 세션 타입 import
 import models  
 # User 모델 등 ORM 모델 import
 from datetime import datetime, timedelta  
 # 시간 관련 처리, 토큰 만료 시간 계산에 사용
+import asyncio
+# 비밀번호 작업을 전용 스레드풀에서 기다리기(await) 위해 사용
+from concurrent.futures import ThreadPoolExecutor
+# 비밀번호 해싱/검증 전용 스레드풀
+from config import PASSWORD_HASH_ROUNDS, PASSWORD_WORKERS, PASSWORD_MAX_PENDING, PASSWORD_BUSY_STATUS
+# bcrypt cost factor, 전용 스레드 수, 동시 작업 상한
+from config import TOKEN_CACHE_SIZE, TOKEN_CACHE_TTL, USER_CACHE_SIZE, USER_CACHE_TTL
+# 인증 캐시 크기와 유지 시간
+import hashlib, time
+# hashlib → 토큰 원문 대신 해시를 캐시 키로 사용, time → 토큰 만료 확인
+from dataclasses import dataclass
+# 캐시에 보관할 가벼운 사용자 정보 객체 정의용
+from cache import LRUCache
+# 프로세스 내부 LRU + TTL 캐시
+from metrics import track
+# bcrypt 작업 시간 측정 (/metrics)
 
 # JWT 설정
 SECRET_KEY = "YOUR_SECRET_KEY"  
@@ -31,9 +47,9 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="users/login")
 # 비밀번호 해싱
 def hash_password(password: str) -> str:
     # bcrypt로 비밀번호 해싱
-    return bcrypt.hashpw(password.encode(), bcrypt.gensalt()).decode()
+    return bcrypt.hashpw(password.encode(), bcrypt.gensalt(rounds=PASSWORD_HASH_ROUNDS)).decode()
     # encode() → 문자열을 바이트로 변환
-    # gensalt() → 랜덤 솔트 생성
+    # gensalt() → 랜덤 솔트 생성 (rounds = cost factor)
     # decode() → 바이트 → 문자열로 변환
 
 # 비밀번호 검증
@@ -41,6 +57,51 @@ def verify_password(plain, hashed) -> bool:
     # 입력한 평문 비밀번호와 DB의 해시된 비밀번호 비교
     return bcrypt.checkpw(plain.encode(), hashed.encode())
 
+# 비밀번호 작업 전용 스레드풀
+# bcrypt는 CPU를 오래 쓰므로 FastAPI 기본 스레드풀에서 돌리면
+# 로그인이 몰릴 때 게시글 조회 같은 다른 요청까지 스레드를 못 얻고 밀린다
+_password_executor = None
+_password_pending = 0  # 실행 중 + 대기 중인 비밀번호 작업 수 (이벤트 루프에서만 변경)
+
+def _get_password_executor() -> ThreadPoolExecutor:
+    # 처음 사용할 때 스레드풀 생성
+    global _password_executor
+    if _password_executor is None:
+        _password_executor = ThreadPoolExecutor(max_workers=PASSWORD_WORKERS, thread_name_prefix="password")
+    return _password_executor
+
+async def _run_password_task(func, *args):
+    # 상한을 넘으면 줄 세우지 않고 바로 거절 (무한정 대기열이 쌓이는 것 방지)
+    global _password_pending
+    if _password_pending >= PASSWORD_MAX_PENDING:
+        raise HTTPException(
+            status_code=PASSWORD_BUSY_STATUS,
+            detail="요청이 많아 잠시 후 다시 시도해주세요.",
+            headers={"Retry-After": "1"},
+        )
+    _password_pending += 1
+    try:
+        loop = asyncio.get_running_loop()
+        with track("bcrypt"):  # 스레드풀 대기 시간 포함 (요청 입장에서 비밀번호 때문에 기다린 시간)
+            return await loop.run_in_executor(_get_password_executor(), func, *args)
+    finally:
+        _password_pending -= 1
+
+async def hash_password_async(password: str) -> str:
+    # 전용 스레드풀에서 비밀번호 해싱
+    return await _run_password_task(hash_password, password)
+
+async def verify_password_async(plain, hashed) -> bool:
+    # 전용 스레드풀에서 비밀번호 검증
+    return await _run_password_task(verify_password, plain, hashed)
+
+def shutdown_password_executor():
+    # 서버 종료 시 스레드풀 정리
+    global _password_executor
+    if _password_executor is not None:
+        _password_executor.shutdown(wait=True)
+        _password_executor = None
+
 # JWT 토큰 생성
 def create_access_token(data: dict, expires_delta: timedelta = None):
     to_encode = data.copy()  
@@ -52,22 +113,65 @@ def create_access_token(data: dict, expires_delta: timedelta = None):
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)  
     # 토큰 생성
 
+# 인증 캐시
+# 토큰 서명 검증 결과(claims)와 사용자 정보를 프로세스 메모리에 잠시 보관해서
+# 인증이 필요한 요청마다 JWT 디코딩 + DB 조회를 반복하지 않도록 함
+_token_cache = LRUCache(maxsize=TOKEN_CACHE_SIZE, ttl=TOKEN_CACHE_TTL)  # sha256(토큰) → claims
+_user_cache = LRUCache(maxsize=USER_CACHE_SIZE, ttl=USER_CACHE_TTL)  # user_id → UserPrincipal
+
+@dataclass(frozen=True)
+class UserPrincipal:
+    # 인증된 사용자 정보 (세션에 묶이지 않는 가벼운 객체라 캐시에 그대로 보관 가능)
+    id: int
+    username: str
+    email: str
+    token_version: int
+
+def _token_key(token: str) -> str:
+    # 토큰 원문 대신 해시를 키로 사용
+    return hashlib.sha256(token.encode()).hexdigest()
+
+def invalidate_user(user_id: int):
+    # 비밀번호 변경/재발급, 계정 삭제 시 해당 사용자의 캐시를 모두 제거
+    _user_cache.delete(user_id)
+    _token_cache.delete_where(lambda key, claims: claims["user_id"] == user_id)
+
+def auth_cache_stats() -> dict:
+    # 토큰/사용자 캐시 hit, miss 통계
+    return {"token_cache": _token_cache.stats(), "user_cache": _user_cache.stats()}
+
 # 현재 로그인한 사용자 조회
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])  
-        # 토큰 디코딩
-        user_id = payload.get("user_id")  
+async def get_current_user(token: str = Depends(oauth2_scheme), db: DBSession = Depends(get_db)):
+    key = _token_key(token)
+    claims = _token_cache.get(key)
+    if claims is None:
+        try:
+            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+            # 토큰 디코딩 (서명, 만료 확인)
+        except jwt.PyJWTError:
+            raise HTTPException(status_code=401, detail="Invalid credentials")
+            # 토큰이 잘못되거나 만료되면 인증 실패
+        user_id = payload.get("user_id")
         # payload에서 user_id 추출
         if user_id is None:
             raise HTTPException(status_code=401, detail="Invalid credentials")
         # user_id 없으면 인증 실패
-        user = db.query(models.User).filter(models.User.id == user_id).first()  
-        # DB에서 user 조회
-        if not user:
+        claims = {"user_id": user_id, "ver": payload.get("ver", 0), "exp": payload["exp"]}
+        # 토큰 만료 시각을 넘겨서 캐시에 남지 않도록 TTL을 잘라서 저장
+        _token_cache.set(key, claims, ttl=min(TOKEN_CACHE_TTL, payload["exp"] - time.time()))
+    elif claims["exp"] <= time.time():
+        raise HTTPException(status_code=401, detail="Invalid credentials")
+
+    user = _user_cache.get(claims["user_id"])
+    if user is None:
+        db_user = await db.get(models.User, claims["user_id"])
+        # 캐시에 없을 때만 DB에서 user 조회
+        if not db_user:
             raise HTTPException(status_code=401, detail="Invalid credentials")
-        return user  
-        # 로그인 성공 시 User 객체 반환
-    except Exception:
+        user = UserPrincipal(db_user.id, db_user.username, db_user.email, db_user.token_version or 0)
+        _user_cache.set(user.id, user)
+    if claims["ver"] != user.token_version:
+        # 비밀번호가 바뀌었거나 계정이 삭제되어 토큰 버전이 올라간 경우 → 예전 토큰 거부
         raise HTTPException(status_code=401, detail="Invalid credentials")
-        # 토큰이 잘못되거나 만료되면 인증 실패
+    return user
+    # 로그인 성공 시 UserPrincipal 반환
@@ -1,6 +1,7 @@
-from sqlalchemy import create_engine  
+from sqlalchemy import create_engine, event  
 # SQLAlchemy의 create_engine 함수를 불러옴
 # DB와 연결할 엔진 객체를 만드는 함수
+# event → 새 DB 연결이 만들어질 때마다 PRAGMA를 적용하는 훅 등록
 
 from sqlalchemy.ext.declarative import declarative_base  
 # ORM 모델(Base)을 정의할 때 상속받는 Base 클래스를 만드는 함수
@@ -12,37 +13,297 @@ from sqlalchemy.orm import Session
 # Session 타입 힌트를 위해 import
 # 함수의 반환 타입이나 변수 타입 표기에 사용
 
-# SQLite 데이터베이스 URL
-SQLALCHEMY_DATABASE_URL = "sqlite:///./myapi.db"  
-# 현재 폴더에 myapi.db라는 SQLite 파일 생성
+from starlette.concurrency import run_in_threadpool
+# sync 모드에서 동기 세션 호출을 스레드풀에서 실행하기 위해 사용
+
+from config import DB_MODE
+# "sync" → 기존 동기 엔진 + 스레드풀, "async" → AsyncEngine(aiosqlite/asyncpg)
+from config import (
+    SQLITE_JOURNAL_MODE, SQLITE_SYNCHRONOUS, SQLITE_BUSY_TIMEOUT_MS, SQLITE_MMAP_SIZE,
+    SQLITE_CACHE_SIZE, SQLITE_TEMP_STORE, SQLITE_STATEMENT_CACHE,
+    DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT, DB_QUERY_CACHE_SIZE,
+    DATABASE_URL, DATABASE_REPLICA_URLS, DB_POOL_RECYCLE, DB_POOL_PRE_PING, DB_STATEMENT_TIMEOUT_MS,
+)
+# SQLite PRAGMA 프로필, 커넥션 풀 설정, DB 주소(주 DB / 읽기 전용 복제본)
+
+import itertools
+# 읽기 복제본을 돌아가며 고르기 위한 itertools.cycle
+from metrics import instrument_engine
+# 모든 엔진의 SQL 실행 횟수/시간 측정 (/metrics, 느린 요청 로그)
+
+# 데이터베이스 URL (환경변수 DATABASE_URL로 변경 가능)
+SQLALCHEMY_DATABASE_URL = DATABASE_URL
+# 기본값은 현재 폴더의 myapi.db SQLite 파일
 # "sqlite:///" → SQLite 파일 경로 지정
 # "./myapi.db" → 현재 폴더에 생성
+# 예: postgresql://user:pw@db-host/myapi → 여러 서버(노드)가 같은 DB를 사용
 
-# 엔진 생성
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL,  # DB 연결 정보
-    connect_args={"check_same_thread": False}  
-    # SQLite에서는 기본적으로 같은 스레드에서만 DB 접근 가능
-    # 여러 스레드에서 안전하게 접근하도록 설정
-)
+# SQLite 연결마다 적용할 PRAGMA 프로필 (순서대로 실행)
+SQLITE_PRAGMAS = {
+    "journal_mode": SQLITE_JOURNAL_MODE,    # WAL: 쓰기 중에도 읽기 가능
+    "synchronous": SQLITE_SYNCHRONOUS,      # NORMAL: WAL에서 안전하면서 fsync 횟수 감소
+    "busy_timeout": SQLITE_BUSY_TIMEOUT_MS, # 잠겨 있으면 바로 에러 대신 잠시 대기
+    "mmap_size": SQLITE_MMAP_SIZE,          # 메모리 매핑 읽기
+    "cache_size": SQLITE_CACHE_SIZE,        # 페이지 캐시 크기
+    "temp_store": SQLITE_TEMP_STORE,        # 임시 데이터는 메모리에
+    "foreign_keys": "ON",                   # 외래키 검사 + ON DELETE CASCADE 적용 (SQLite는 연결마다 켜야 함)
+}
 
-# DB와 실제로 대화할 세션 생성
-SessionLocal = sessionmaker(
-    autocommit=False,  # False → 커밋을 수동으로 해야 함
-    autoflush=False,   # False → 변경 내용을 자동으로 DB에 반영하지 않음
-    bind=engine        # 어떤 DB 엔진과 연결할지 지정
-)
+def apply_sqlite_pragmas(dbapi_connection, pragmas: dict = None):
+    # DB 연결 하나에 PRAGMA 프로필을 적용
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in (SQLITE_PRAGMAS if pragmas is None else pragmas).items():
+            cursor.execute(f"PRAGMA {name}={value}")
+    finally:
+        cursor.close()
+
+def _register_sqlite_pragmas(sync_engine):
+    # 엔진이 새 연결을 만들 때마다 apply_sqlite_pragmas가 실행되도록 훅 등록
+    @event.listens_for(sync_engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        apply_sqlite_pragmas(dbapi_connection)
+
+def _statement_timeout_args(url: str) -> dict:
+    # 쿼리 하나가 DB_STATEMENT_TIMEOUT_MS를 넘기면 DB 서버가 취소하도록 하는 연결 인자
+    # (SQLite는 서버가 없으므로 해당 없음. 잠금 대기는 busy_timeout PRAGMA가 담당)
+    if not DB_STATEMENT_TIMEOUT_MS:
+        return {}
+    scheme = url.split("://", 1)[0]
+    if scheme.startswith("postgresql+asyncpg"):
+        return {"server_settings": {"statement_timeout": str(DB_STATEMENT_TIMEOUT_MS)}}
+    if scheme.startswith("postgresql"):
+        return {"options": f"-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}"}
+    if scheme.startswith("mysql"):
+        return {"init_command": f"SET SESSION MAX_EXECUTION_TIME={DB_STATEMENT_TIMEOUT_MS}"}
+    return {}
+
+def _engine_options(url: str) -> dict:
+    # 엔진 공통 옵션 (풀 크기, SQL 컴파일 캐시, 드라이버별 연결 인자)
+    options = {"query_cache_size": DB_QUERY_CACHE_SIZE}
+    if url.startswith("sqlite"):
+        options["connect_args"] = {
+            "check_same_thread": False,
+            # SQLite에서는 기본적으로 같은 스레드에서만 DB 접근 가능
+            # 여러 스레드에서 안전하게 접근하도록 설정 (SQLite 드라이버에만 있는 인자)
+            "cached_statements": SQLITE_STATEMENT_CACHE,
+            # 연결마다 준비된 SQL 문을 재사용 (매번 다시 파싱하지 않음)
+        }
+    else:
+        options["connect_args"] = _statement_timeout_args(url)
+    if ":memory:" not in url:
+        # 메모리 DB는 연결 하나만 쓰는 전용 풀을 사용하므로 풀 크기 설정이 없음
+        options.update(
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_timeout=DB_POOL_TIMEOUT,
+            pool_recycle=DB_POOL_RECYCLE,      # 오래된 연결은 새로 맺음 (DB/방화벽의 유휴 연결 끊김 대비)
+            pool_pre_ping=DB_POOL_PRE_PING,    # 풀에서 꺼낼 때 살아있는지 확인 (DB 재시작 후 첫 요청 에러 방지)
+        )
+    return options
+
+def to_async_url(url: str) -> str:
+    # 동기 드라이버 URL을 비동기 드라이버 URL로 변환
+    # sqlite:///./myapi.db → sqlite+aiosqlite:///./myapi.db
+    # postgresql://...     → postgresql+asyncpg://...
+    scheme, rest = url.split("://", 1)
+    if "+" in scheme:  # 이미 드라이버가 지정된 URL은 그대로 사용
+        return url
+    driver = {"sqlite": "aiosqlite", "postgresql": "asyncpg", "mysql": "aiomysql"}[scheme]
+    return f"{scheme}+{driver}://{rest}"
+
+def build_engine(url: str):
+    # 동기 엔진 생성 + SQLite면 PRAGMA 훅 등록
+    new_engine = create_engine(
+        url,                     # DB 연결 정보
+        **_engine_options(url),  # 풀 크기, 드라이버별 연결 인자 등
+    )
+    if url.startswith("sqlite"):
+        _register_sqlite_pragmas(new_engine)
+    instrument_engine(new_engine)
+    return new_engine
+
+def build_async_engine(url: str):
+    # 비동기 엔진 생성 (aiosqlite/asyncpg가 설치되어 있어야 함)
+    from sqlalchemy.ext.asyncio import create_async_engine
+    async_url = to_async_url(url)
+    new_engine = create_async_engine(async_url, **_engine_options(async_url))
+    if url.startswith("sqlite"):
+        _register_sqlite_pragmas(new_engine.sync_engine)  # 비동기 엔진에도 같은 PRAGMA 적용
+    instrument_engine(new_engine.sync_engine)
+    return new_engine
+
+def _sync_sessionmaker(bind):
+    # DB와 실제로 대화할 세션 생성기
+    return sessionmaker(
+        autocommit=False,  # False → 커밋을 수동으로 해야 함
+        autoflush=False,   # False → 변경 내용을 자동으로 DB에 반영하지 않음
+        expire_on_commit=False,  # False → 커밋 후에도 객체 값을 유지 (응답 직렬화 때 추가 조회 방지)
+        bind=bind          # 어떤 DB 엔진과 연결할지 지정
+    )
+
+def _async_sessionmaker(bind):
+    from sqlalchemy.ext.asyncio import async_sessionmaker
+    return async_sessionmaker(
+        bind,
+        autoflush=False,
+        expire_on_commit=False,  # 비동기 세션에서는 커밋 후 지연 조회가 불가능하므로 값을 유지
+    )
+
+# 주(primary) DB 엔진 생성 → 모든 쓰기와 일반 조회
+engine = build_engine(SQLALCHEMY_DATABASE_URL)
+SessionLocal = _sync_sessionmaker(engine)
+
+# 비동기 엔진 생성 (async 모드에서만)
+async_engine = None
+AsyncSessionLocal = None
+if DB_MODE == "async":
+    async_engine = build_async_engine(SQLALCHEMY_DATABASE_URL)
+    AsyncSessionLocal = _async_sessionmaker(async_engine)
+
+# 읽기 전용 복제본(replica) 엔진 (DATABASE_REPLICA_URLS가 있을 때만)
+# 목록 조회(GET)만 복제본으로 보내고, 쓰기는 항상 주 DB로 보낸다.
+# 복제본은 주 DB보다 조금 늦게 반영될 수 있으므로 "방금 쓴 값을 바로 읽어야 하는" 곳에는 쓰지 않음
+replica_engines = []
+ReplicaSessionLocals = []
+for _replica_url in DATABASE_REPLICA_URLS:
+    if DB_MODE == "async":
+        _replica_engine = build_async_engine(_replica_url)
+        ReplicaSessionLocals.append(_async_sessionmaker(_replica_engine))
+    else:
+        _replica_engine = build_engine(_replica_url)
+        ReplicaSessionLocals.append(_sync_sessionmaker(_replica_engine))
+    replica_engines.append(_replica_engine)
+_replica_cycle = itertools.cycle(ReplicaSessionLocals) if ReplicaSessionLocals else None
+# 복제본이 여러 개면 요청마다 돌아가며 사용 (round-robin)
 
 # ORM 모델들이 상속할 Base 클래스 생성
 Base = declarative_base()
 # 이후 ORM 모델을 만들 때 class User(Base): ... 처럼 상속
 
-# FastAPI 의존성 주입용 DB 세션 함수
-def get_db():
-    """DB 세션을 생성하고 사용 후 반드시 닫아주는 의존성 함수"""
-    db: Session = SessionLocal()  # DB 세션 생성
+# sync 모드용 세션 어댑터
+class SyncSessionAdapter:
+    """동기 Session을 AsyncSession과 같은 방식(await db.execute(...))으로 쓰게 해주는 어댑터
+
+    라우터는 항상 async def + await로 작성하고,
+    sync 모드에서는 실제 DB 호출만 스레드풀에서 실행한다.
+    """
+
+    def __init__(self, session: Session):
+        self.session = session
+
+    def add(self, instance):
+        self.session.add(instance)  # DB 접근 없이 세션에만 추가
+
+    def add_all(self, instances):
+        self.session.add_all(instances)
+
+    async def execute(self, statement, params=None):
+        return await run_in_threadpool(self.session.execute, statement, params)
+
+    async def scalar(self, statement, params=None):
+        return await run_in_threadpool(self.session.scalar, statement, params)
+
+    async def scalars(self, statement, params=None):
+        return await run_in_threadpool(self.session.scalars, statement, params)
+
+    async def get(self, entity, ident):
+        return await run_in_threadpool(self.session.get, entity, ident)
+
+    async def delete(self, instance):
+        await run_in_threadpool(self.session.delete, instance)
+
+    async def flush(self):
+        await run_in_threadpool(self.session.flush)
+
+    async def commit(self):
+        await run_in_threadpool(self.session.commit)
+
+    async def rollback(self):
+        await run_in_threadpool(self.session.rollback)
+
+    async def refresh(self, instance):
+        await run_in_threadpool(self.session.refresh, instance)
+
+    async def run_sync(self, fn, *args, **kwargs):
+        # fn(동기 Session, ...)을 실행. AsyncSession.run_sync와 같은 사용법
+        return await run_in_threadpool(fn, self.session, *args, **kwargs)
+
+    async def close(self):
+        await run_in_threadpool(self.session.close)
+
+# 라우터의 db 타입 힌트용 세션 타입
+# (sqlalchemy.ext.asyncio는 greenlet이 필요하므로 async 모드에서만 import)
+if DB_MODE == "async":
+    from sqlalchemy.ext.asyncio import AsyncSession as DBSession
+else:
+    DBSession = SyncSessionAdapter
+
+async def _session_scope(session_factory):
+    # 세션을 열어 넘겨주고, 사용이 끝나면 반드시 닫음
+    if DB_MODE == "async":
+        async with session_factory() as db:  # 비동기 세션 생성, 블록을 벗어나면 자동으로 닫힘
+            yield db
+        return
+    db = SyncSessionAdapter(session_factory())  # DB 세션 생성
     try:
         yield db  # 세션 사용
         # FastAPI에서 yield를 쓰면 이 함수가 의존성 주입으로 활용 가능
     finally:
-        db.close()  # 세션 종료 시 반드시 닫아줌
+        await db.close()  # 세션 종료 시 반드시 닫아줌
+
+# FastAPI 의존성 주입용 DB 세션 함수
+async def get_db():
+    """주 DB 세션을 생성하고 사용 후 반드시 닫아주는 의존성 함수
+
+    async 모드 → AsyncSession, sync 모드 → SyncSessionAdapter
+    어느 쪽이든 라우터에서는 await db.execute(...) 형태로 사용한다.
+    """
+    async for db in _session_scope(AsyncSessionLocal if DB_MODE == "async" else SessionLocal):
+        yield db
+
+async def get_read_db():
+    """읽기 전용 조회용 세션 의존성 함수
+
+    복제본이 설정되어 있으면 복제본 중 하나로, 없으면 주 DB로 연결한다.
+    이 세션으로는 쓰기(commit)를 하지 않는다.
+    """
+    if _replica_cycle is None:
+        session_factory = AsyncSessionLocal if DB_MODE == "async" else SessionLocal
+    else:
+        session_factory = next(_replica_cycle)
+    async for db in _session_scope(session_factory):
+        yield db
+
+def describe_database() -> dict:
+    # 시작 시 출력할 실제 적용된 DB 설정 (URL, 모드, 풀, PRAGMA 값)
+    report = {
+        "url": engine.url.render_as_string(hide_password=True),
+        "mode": DB_MODE,
+        "pool": type(engine.pool).__name__,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+        "statement_timeout_ms": DB_STATEMENT_TIMEOUT_MS,
+        "replicas": [e.url.render_as_string(hide_password=True) for e in replica_engines],
+    }
+    if engine.dialect.name == "sqlite":
+        with engine.connect() as conn:
+            # 연결에 실제로 적용된 값을 다시 읽어서 확인
+            report["pragmas"] = {
+                name: conn.exec_driver_sql(f"PRAGMA {name}").scalar()
+                for name in SQLITE_PRAGMAS
+            }
+    return report
+
+async def dispose_engines():
+    # 서버 종료 시 커넥션 풀 정리
+    for replica_engine in replica_engines:
+        if DB_MODE == "async":
+            await replica_engine.dispose()
+        else:
+            replica_engine.dispose()
+    if async_engine is not None:
+        await async_engine.dispose()
+    engine.dispose()
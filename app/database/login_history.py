@@ -0,0 +1,137 @@
+import atexit
+# 종료 시 큐에 남은 로그인 기록을 마저 저장
+from datetime import datetime, timedelta
+from sqlalchemy import Date, and_, cast, func, insert, or_, select
+from sqlalchemy.dialects import postgresql, sqlite
+# 일별 집계 UPSERT(INSERT ... ON CONFLICT DO UPDATE)는 DB 종류별 insert로 작성
+from database import engine
+# 기록 스레드/정리 작업은 동기 엔진 사용 (sync/async 모드 모두 존재)
+from models import User, LoginHistory, LoginDaily
+from audit_log import AuditLogWriter
+# 감사 로그와 같은 배치 기록기 (크기/시간 기준 flush, 큐가 가득 차면 drop/block/spill)
+from config import (
+    LOGIN_HISTORY_BATCH_SIZE, LOGIN_HISTORY_FLUSH_INTERVAL, LOGIN_HISTORY_QUEUE_MAXSIZE,
+    LOGIN_HISTORY_QUEUE_POLICY, LOGIN_HISTORY_SPILL_PATH, LOGIN_HISTORY_RETENTION_DAYS, LOGIN_HISTORY_COMPACT_CHUNK,
+)
+
+# 로그인 기록
+# 로그인마다 INSERT + COMMIT 하지 않고 큐에 넣은 뒤 기록 스레드가 여러 행을 한 트랜잭션으로 저장한다
+# login_history에는 최근 LOGIN_HISTORY_RETENTION_DAYS일 원본만 남기고,
+# 그 이전 기록은 compact_login_history()로 login_daily(사용자/날짜별 한 행)에 합친 뒤 삭제한다
+
+class LoginHistoryStore:
+    """AuditLogWriter가 모은 로그인 이벤트를 login_history 테이블에 저장하는 저장소"""
+
+    def __init__(self, bind):
+        self.bind = bind  # 저장에 사용할 동기 엔진
+
+    def append_many(self, events, keys=None):
+        # events: [(sheet, user_id, payload, created_at), ...] → 한 트랜잭션으로 multi-row INSERT
+        # keys: 디스크 임시 저장분을 다시 저장할 때 이벤트별 고유 키 → 이미 저장된 키는 건너뜀
+        with self.bind.begin() as conn:
+            alive = set(conn.scalars(select(User.id).where(User.id.in_({user_id for _, user_id, _, _ in events}))))
+            # 큐에 있는 동안 삭제된 계정의 기록은 버림 (외래키 검사에 걸려 배치 전체가 실패하지 않도록)
+            rows = [
+                {"user_id": user_id, "login_time": created_at, "event_key": key}
+                for (_, user_id, _, created_at), key in zip(events, keys or [None] * len(events))
+                if user_id in alive
+            ]
+            if not rows:
+                return
+            if keys and conn.dialect.name in ("sqlite", "postgresql"):
+                dialect_insert = sqlite.insert if conn.dialect.name == "sqlite" else postgresql.insert
+                conn.execute(dialect_insert(LoginHistory).on_conflict_do_nothing(), rows)
+            else:
+                conn.execute(insert(LoginHistory), rows)
+
+login_history_writer = AuditLogWriter(
+    LoginHistoryStore(engine),
+    batch_size=LOGIN_HISTORY_BATCH_SIZE,
+    flush_interval=LOGIN_HISTORY_FLUSH_INTERVAL,
+    maxsize=LOGIN_HISTORY_QUEUE_MAXSIZE,
+    policy=LOGIN_HISTORY_QUEUE_POLICY,
+    spill_path=LOGIN_HISTORY_SPILL_PATH,
+    name="login-history-writer",
+)
+atexit.register(login_history_writer.stop)
+# lifespan에서 먼저 stop하면 아무 일도 안 함
+
+def record_login(user_id: int) -> bool:
+    # 로그인 기록을 큐에 넣고 바로 반환 (로그인 응답이 DB 쓰기를 기다리지 않음)
+    return login_history_writer.append("LoginHistory", user_id, {}, created_at=datetime.utcnow())
+
+def start_login_history():
+    login_history_writer.start()
+
+def stop_login_history():
+    # 큐에 남은 로그인 기록을 모두 저장한 뒤 기록 스레드 종료
+    login_history_writer.stop()
+
+def login_history_stats() -> dict:
+    # 큐 길이, 저장 지연, 버려진 기록 수
+    return login_history_writer.stats()
+
+# ---------------------------
+# 보존 기간 정리 (원본 → 일별 집계)
+# ---------------------------
+def _daily_upsert(dialect_name: str, condition):
+    # condition에 해당하는 원본 기록을 사용자/날짜별로 묶어 login_daily에 더함 (이미 있는 날짜면 횟수 합산)
+    raw = LoginHistory.__table__
+    daily = LoginDaily.__table__
+    if dialect_name == "sqlite":
+        day = func.date(raw.c.login_time)
+        dialect_insert, earliest, latest = sqlite.insert, func.min, func.max
+    elif dialect_name == "postgresql":
+        day = cast(raw.c.login_time, Date)
+        dialect_insert, earliest, latest = postgresql.insert, func.least, func.greatest
+    else:
+        raise ValueError(f"로그인 기록 정리를 지원하지 않는 DB입니다: {dialect_name}")
+    source = (
+        select(raw.c.user_id, day, func.count(), func.min(raw.c.login_time), func.max(raw.c.login_time))
+        .where(condition, raw.c.user_id.is_not(None))
+        .group_by(raw.c.user_id, day)
+    )
+    statement = dialect_insert(daily).from_select(
+        ["user_id", "day", "login_count", "first_login", "last_login"], source
+    )
+    return statement.on_conflict_do_update(
+        index_elements=["user_id", "day"],
+        set_={
+            "login_count": daily.c.login_count + statement.excluded.login_count,
+            "first_login": earliest(daily.c.first_login, statement.excluded.first_login),
+            "last_login": latest(daily.c.last_login, statement.excluded.last_login),
+        },
+    )
+
+def compact_login_history(retention_days: int = LOGIN_HISTORY_RETENTION_DAYS,
+                          chunk_size: int = LOGIN_HISTORY_COMPACT_CHUNK, bind=None) -> dict:
+    """보존 기간이 지난 로그인 기록을 login_daily로 합치고 원본은 삭제
+
+    (login_time, id) 순서로 chunk_size 행씩 잘라서 집계 + 삭제를 한 트랜잭션으로 처리하므로
+    중간에 멈춰도 같은 기록이 두 번 합산되지 않고, 다시 실행하면 남은 부분부터 이어서 정리한다.
+    """
+    bind = bind or engine
+    raw = LoginHistory.__table__
+    cutoff = datetime.utcnow() - timedelta(days=retention_days)
+    old = raw.c.login_time < cutoff
+    result = {"cutoff": cutoff.isoformat(), "rows": 0, "chunks": 0}
+    while True:
+        with bind.begin() as conn:
+            boundary = conn.execute(
+                select(raw.c.login_time, raw.c.id).where(old)
+                .order_by(raw.c.login_time, raw.c.id).offset(chunk_size - 1).limit(1)
+            ).first()
+            # 이번 chunk의 마지막 행 (없으면 남은 기록이 chunk_size 이하 → 전부 처리)
+            if boundary is None:
+                condition = old
+            else:
+                condition = and_(old, or_(
+                    raw.c.login_time < boundary.login_time,
+                    and_(raw.c.login_time == boundary.login_time, raw.c.id <= boundary.id),
+                ))
+            conn.execute(_daily_upsert(conn.dialect.name, condition))
+            deleted = conn.execute(raw.delete().where(condition)).rowcount
+        result["rows"] += deleted
+        result["chunks"] += 1
+        if boundary is None:
+            return result
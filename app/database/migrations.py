@@ -0,0 +1,494 @@
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, func, inspect, insert, select
+from sqlalchemy.schema import CreateIndex, CreateTable
+
+from database import Base, engine
+# 마이그레이션 대상 DB (DATABASE_URL)
+import models
+# 목표 스키마 = 현재 ORM 모델 정의
+import search
+# posts/comments 테이블을 새로 만들 때 검색 인덱스(FTS)와 트리거도 같이 생성되도록 등록
+from audit_log import FileLock
+# SQLite 파일 DB는 잠금 파일로 한 프로세스만 마이그레이션
+from config import MIGRATION_CHUNK_ROWS, MIGRATION_CHUNK_PAUSE, MIGRATION_LOCK_TIMEOUT
+
+# 버전 번호가 붙은 스키마 마이그레이션
+# 적용한 버전은 schema_version 테이블에 남기고, 아직 적용하지 않은 버전만 순서대로 실행한다.
+# 단계마다 이미 적용된 상태인지 먼저 확인하므로
+# create_all로 만든 DB, 예전 버전 DB, 중간에 실패한 DB 어느 쪽에서 실행해도 결과가 같다.
+#   - 컬럼 추가: ALTER TABLE ADD COLUMN (기본값이 상수면 기존 행을 다시 쓰지 않음)
+#   - 값 채우기: id 범위로 MIGRATION_CHUNK_ROWS행씩 나눠서 각각 커밋 → 잠금은 배치 하나 동안만
+#   - NOT NULL 지정: PostgreSQL은 CHECK NOT VALID → VALIDATE 뒤에 SET NOT NULL (SQLite는 테이블을 다시 만들어야 해서 건너뜀)
+#   - 인덱스: PostgreSQL은 CREATE INDEX CONCURRENTLY (쓰기를 막지 않음)
+#   - 외래키 변경: SQLite는 테이블 재생성, PostgreSQL은 NOT VALID로 바꾼 뒤 VALIDATE
+
+schema_version = Table(
+    "schema_version", MetaData(),
+    # ORM 모델(Base)과 따로 관리 → create_all이 만들거나 건드리지 않음
+    Column("version", Integer, primary_key=True),
+    Column("description", String, nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+
+def _count(conn, table: str, where: str = None) -> int:
+    return conn.exec_driver_sql(f"SELECT count(*) FROM {table}" + (f" WHERE {where}" if where else "")).scalar()
+
+
+def _columns(conn, table: str) -> set:
+    return {column["name"] for column in inspect(conn).get_columns(table)}
+
+
+def _chunks(conn, table: str, chunk_size: int) -> int:
+    # id 범위로 나눴을 때 배치 수
+    max_id = conn.exec_driver_sql(f"SELECT max(id) FROM {table}").scalar() or 0
+    return -(-max_id // chunk_size)
+
+
+# ---------------------------
+# 마이그레이션 단계
+# ---------------------------
+# estimate(conn, chunk_size) → 할 일이 없으면 None, 있으면 {"rows": 대상 행 수, "chunks": 배치 수, "lock": 잠금 설명}
+# apply(bind, chunk_size, pause) → 실제 적용
+
+class CreateTables:
+    """없는 테이블만 현재 모델 정의대로 생성"""
+
+    def __init__(self, *tables: str):
+        self.tables = tables
+
+    def describe(self) -> str:
+        return f"테이블 생성: {', '.join(self.tables)}"
+
+    def estimate(self, conn, chunk_size):
+        missing = [name for name in self.tables if not inspect(conn).has_table(name)]
+        if not missing:
+            return None
+        return {"rows": 0, "chunks": 1, "lock": f"새 테이블만 생성 ({', '.join(missing)})"}
+
+    def apply(self, bind, chunk_size, pause):
+        Base.metadata.create_all(bind=bind, tables=[Base.metadata.tables[name] for name in self.tables], checkfirst=True)
+
+
+class AddColumn:
+    """컬럼이 없으면 추가 (ddl: 타입과 기본값, 예: "INTEGER NOT NULL DEFAULT 0")
+
+    ddl을 생략하면 모델에 정의된 컬럼 타입을 DB 종류에 맞게 변환해서 사용 (예: DateTime → SQLite DATETIME, PostgreSQL TIMESTAMP WITHOUT TIME ZONE)
+    """
+
+    def __init__(self, table: str, column: str, ddl: str = None):
+        self.table, self.column, self.ddl = table, column, ddl
+
+    def _ddl(self, dialect) -> str:
+        if self.ddl:
+            return self.ddl
+        return Base.metadata.tables[self.table].c[self.column].type.compile(dialect=dialect)
+
+    def describe(self) -> str:
+        return f"컬럼 추가: {self.table}.{self.column} {self._ddl(engine.dialect)}"
+
+    def estimate(self, conn, chunk_size):
+        if self.column in _columns(conn, self.table):
+            return None
+        return {"rows": _count(conn, self.table), "chunks": 1, "lock": "ALTER TABLE (스키마만 변경, 짧은 잠금)"}
+
+    def apply(self, bind, chunk_size, pause):
+        with bind.begin() as conn:
+            if self.column not in _columns(conn, self.table):
+                conn.exec_driver_sql(f"ALTER TABLE {self.table} ADD COLUMN {self.column} {self._ddl(bind.dialect)}")
+
+
+class Backfill:
+    """column = expression 으로 값 채우기 (where에 해당하는 행만), id 범위로 나눠서 배치마다 커밋
+
+    배치마다 따로 커밋하므로 중간에 멈춰도 다시 실행하면 where에 남은 행부터 이어서 채운다.
+    """
+
+    def __init__(self, table: str, column: str, expression: str, where: str = None):
+        self.table, self.column, self.expression, self.where = table, column, expression, where
+
+    def describe(self) -> str:
+        return f"값 채우기: {self.table}.{self.column} = {' '.join(self.expression.split())}"
+
+    def estimate(self, conn, chunk_size):
+        if self.column in _columns(conn, self.table):
+            rows = _count(conn, self.table, self.where)
+            if not rows:
+                return None
+        else:
+            rows = _count(conn, self.table)  # 앞 단계에서 컬럼을 추가하기 전 (dry-run) → 전체 행
+        return {
+            "rows": rows,
+            "chunks": _chunks(conn, self.table, chunk_size),
+            "lock": f"배치({chunk_size}행)마다 짧은 쓰기 잠금",
+        }
+
+    def apply(self, bind, chunk_size, pause):
+        with bind.connect() as conn:
+            max_id = conn.exec_driver_sql(f"SELECT max(id) FROM {self.table}").scalar() or 0
+        condition = f" AND ({self.where})" if self.where else ""
+        for low in range(0, max_id, chunk_size):
+            with bind.begin() as conn:
+                conn.exec_driver_sql(
+                    f"UPDATE {self.table} SET {self.column} = {self.expression} "
+                    f"WHERE id > {low} AND id <= {low + chunk_size}{condition}"
+                )
+            if pause:
+                time.sleep(pause)  # 다른 쓰기 요청이 끼어들 틈
+
+
+class SetNotNull:
+    """값을 다 채운 컬럼을 NOT NULL로 바꿈 (PostgreSQL만)
+
+    SET NOT NULL을 바로 실행하면 전체 행을 검사하는 동안 테이블 읽기/쓰기가 모두 막힌다.
+    먼저 CHECK (컬럼 IS NOT NULL) NOT VALID를 걸고(새로 쓰는 행만 검사) VALIDATE로 기존 행을 검사한 뒤
+    SET NOT NULL을 실행하면 검사된 CHECK를 보고 다시 훑지 않는다 (PostgreSQL 12 이상).
+    fill이 있으면 CHECK를 건 뒤에 남은 NULL을 fill 값으로 채움 (앞 단계의 값 채우기와 CHECK 사이에 들어온 행).
+    SQLite는 컬럼 제약을 바꾸려면 테이블을 다시 만들어야 하므로 건너뜀 (ORM이 항상 값을 넣음).
+    """
+
+    def __init__(self, table: str, column: str, fill: str = None):
+        self.table, self.column, self.fill = table, column, fill
+
+    @property
+    def constraint(self) -> str:
+        return f"ck_{self.table}_{self.column}_not_null"
+
+    def describe(self) -> str:
+        return f"NOT NULL 지정 (PostgreSQL만): {self.table}.{self.column}"
+
+    def estimate(self, conn, chunk_size):
+        if conn.dialect.name == "sqlite":
+            return None
+        columns = {column["name"]: column for column in inspect(conn).get_columns(self.table)}
+        if self.column in columns and not columns[self.column]["nullable"]:
+            return None
+        return {"rows": _count(conn, self.table), "chunks": 1, "lock": "CHECK NOT VALID로 추가 후 VALIDATE (쓰기를 막지 않음), SET NOT NULL은 짧은 잠금"}
+
+    def apply(self, bind, chunk_size, pause):
+        if bind.dialect.name == "sqlite":
+            return
+        with bind.begin() as conn:
+            # 중간에 실패한 뒤 다시 실행해도 되도록 먼저 지움
+            conn.exec_driver_sql(f"ALTER TABLE {self.table} DROP CONSTRAINT IF EXISTS {self.constraint}")
+            conn.exec_driver_sql(
+                f"ALTER TABLE {self.table} ADD CONSTRAINT {self.constraint} CHECK ({self.column} IS NOT NULL) NOT VALID"
+            )
+        if self.fill:
+            with bind.begin() as conn:
+                conn.exec_driver_sql(f"UPDATE {self.table} SET {self.column} = {self.fill} WHERE {self.column} IS NULL")
+        with bind.begin() as conn:
+            conn.exec_driver_sql(f"ALTER TABLE {self.table} VALIDATE CONSTRAINT {self.constraint}")
+        with bind.begin() as conn:
+            conn.exec_driver_sql(f"ALTER TABLE {self.table} ALTER COLUMN {self.column} SET NOT NULL")
+            conn.exec_driver_sql(f"ALTER TABLE {self.table} DROP CONSTRAINT {self.constraint}")
+
+
+class AddIndex:
+    """모델에 정의된 인덱스가 없으면 생성"""
+
+    def __init__(self, table: str, name: str):
+        self.table, self.name = table, name
+
+    def _index(self):
+        return next(index for index in Base.metadata.tables[self.table].indexes if index.name == self.name)
+
+    def describe(self) -> str:
+        columns = ", ".join(column.name for column in self._index().columns)
+        return f"인덱스 생성: {self.name} ON {self.table} ({columns})"
+
+    def estimate(self, conn, chunk_size):
+        if self.name in {index["name"] for index in inspect(conn).get_indexes(self.table)}:
+            return None
+        if conn.dialect.name == "postgresql":
+            lock = "CREATE INDEX CONCURRENTLY (쓰기를 막지 않음)"
+        else:
+            lock = "인덱스를 만드는 동안 테이블 쓰기 잠금"
+        return {"rows": _count(conn, self.table), "chunks": 1, "lock": lock}
+
+    def apply(self, bind, chunk_size, pause):
+        index = self._index()
+        if bind.dialect.name == "postgresql":
+            # CONCURRENTLY는 트랜잭션 안에서 실행할 수 없으므로 AUTOCOMMIT 연결 사용
+            columns = ", ".join(column.name for column in index.columns)
+            unique = "UNIQUE " if index.unique else ""
+            with bind.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+                conn.exec_driver_sql(f"CREATE {unique}INDEX CONCURRENTLY IF NOT EXISTS {self.name} ON {self.table} ({columns})")
+        else:
+            with bind.begin() as conn:
+                conn.execute(CreateIndex(index, if_not_exists=True))
+
+
+class SearchIndex:
+    """검색 인덱스(FTS5)와 자동 색인 트리거가 없으면 만들고 기존 게시글/댓글을 색인 (SQLite만)"""
+
+    def describe(self) -> str:
+        return "검색 인덱스 생성 + 기존 게시글/댓글 색인"
+
+    def estimate(self, conn, chunk_size):
+        if conn.dialect.name != "sqlite" or inspect(conn).has_table("search_index"):
+            return None
+        rows = _count(conn, "posts") + _count(conn, "comments")
+        return {"rows": rows, "chunks": 1, "lock": "색인하는 동안 쓰기 잠금 (한 트랜잭션)"}
+
+    def apply(self, bind, chunk_size, pause):
+        with bind.begin() as conn:
+            search.rebuild_search_index(conn)
+
+
+class CascadeForeignKeys:
+    """모델에서 ondelete="CASCADE"인 외래키가 DB에는 CASCADE 없이 만들어져 있으면 바꿈
+
+    예전에는 SQLite 외래키 검사가 꺼져 있었으므로 참조 대상이 없는 행(고아 행)이 있을 수 있다.
+    (PostgreSQL도 외래키를 NOT VALID로 만들었거나 트리거를 끄고 복사한 DB라면 있을 수 있음)
+    새 외래키를 통과하지 못하므로 orphaned_<테이블> 테이블로 옮긴 뒤 외래키를 바꾼다 (지우지 않고 보관, 확인 후 직접 삭제).
+    """
+
+    def __init__(self, table: str):
+        self.table = table
+
+    def describe(self) -> str:
+        return f"외래키 ON DELETE CASCADE: {self.table}"
+
+    def _missing(self, conn):
+        # [(제약 이름, 컬럼, 참조 테이블)] 중 CASCADE가 빠진 것
+        wanted = {fk.parent.name for fk in Base.metadata.tables[self.table].foreign_keys if fk.ondelete == "CASCADE"}
+        missing = []
+        for fk in inspect(conn).get_foreign_keys(self.table):
+            columns = fk["constrained_columns"]
+            ondelete = (fk.get("options") or {}).get("ondelete") or ""
+            if len(columns) == 1 and columns[0] in wanted and ondelete.upper() != "CASCADE":
+                missing.append((fk.get("name"), columns[0], fk["referred_table"]))
+        return missing
+
+    def _orphans(self, column, referred) -> str:
+        return f"{column} IS NOT NULL AND {column} NOT IN (SELECT id FROM {referred})"
+
+    @property
+    def orphan_table(self) -> str:
+        # 고아 행을 옮겨 둘 테이블 (원래 테이블과 같은 컬럼)
+        return f"orphaned_{self.table}"
+
+    def _move_orphans(self, execute, missing):
+        # 고아 행을 orphaned_<테이블>로 복사한 뒤 원래 테이블에서 제거 (execute: SQL 한 문장을 실행하는 함수, 호출한 쪽 트랜잭션 안에서 실행)
+        for _, column, referred in missing:
+            orphans = self._orphans(column, referred)
+            if execute(f"SELECT 1 FROM {self.table} WHERE {orphans} LIMIT 1").fetchone():
+                execute(f"CREATE TABLE IF NOT EXISTS {self.orphan_table} AS SELECT * FROM {self.table} WHERE 1 = 0")
+                execute(f"INSERT INTO {self.orphan_table} SELECT * FROM {self.table} WHERE {orphans}")
+                execute(f"DELETE FROM {self.table} WHERE {orphans}")  # 보관한 뒤에만 원래 테이블에서 제거
+
+    def estimate(self, conn, chunk_size):
+        missing = self._missing(conn)
+        if not missing:
+            return None
+        orphans = _count(conn, self.table, " OR ".join(f"({self._orphans(column, referred)})" for _, column, referred in missing))
+        # 외래키 두 개가 모두 끊긴 행도 한 번만 셈
+        if conn.dialect.name == "sqlite":
+            lock = "테이블 재생성 (복사하는 동안 쓰기 잠금)"
+        else:
+            lock = "NOT VALID로 교체 후 VALIDATE (쓰기를 막지 않음)"
+        if orphans:
+            lock += f", 고아 행 {orphans}개 → {self.orphan_table} 테이블로 이동"
+        return {"rows": _count(conn, self.table), "chunks": 1, "lock": lock}
+
+    def apply(self, bind, chunk_size, pause):
+        with bind.connect() as conn:
+            missing = self._missing(conn)
+        if not missing:
+            return
+        if bind.dialect.name == "sqlite":
+            self._rebuild_sqlite(bind, missing)
+        else:
+            with bind.begin() as conn:
+                # 제약만 바꾸고 기존 행 검사는 미룸 → 잠금이 짧음
+                for name, column, referred in missing:
+                    conn.exec_driver_sql(
+                        f"ALTER TABLE {self.table} DROP CONSTRAINT {name}, "
+                        f"ADD CONSTRAINT {name} FOREIGN KEY ({column}) REFERENCES {referred} (id) ON DELETE CASCADE NOT VALID"
+                    )
+            with bind.begin() as conn:
+                # 새 외래키가 걸린 뒤에 옮김 → 옮기는 동안 새 고아 행이 생기지 않음
+                self._move_orphans(conn.exec_driver_sql, missing)
+            with bind.begin() as conn:
+                # 기존 행 검사 (쓰기를 막지 않는 잠금)
+                for name, _, _ in missing:
+                    conn.exec_driver_sql(f"ALTER TABLE {self.table} VALIDATE CONSTRAINT {name}")
+
+    def _rebuild_sqlite(self, bind, missing):
+        # SQLite는 외래키를 ALTER로 바꿀 수 없음 → 새 정의로 테이블을 만들어 복사한 뒤 이름 교체
+        # (https://www.sqlite.org/lang_altertable.html 의 12단계 절차)
+        table = Base.metadata.tables[self.table]
+        temp = f"_new_{self.table}"
+        raw = bind.raw_connection()
+        db = raw.driver_connection
+        isolation_level = db.isolation_level
+        db.isolation_level = None  # BEGIN/COMMIT을 직접 실행 (DDL까지 한 트랜잭션으로 묶기 위해)
+        try:
+            db.execute("PRAGMA foreign_keys=OFF")  # 트랜잭션 밖에서만 바꿀 수 있음
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                self._move_orphans(db.execute, missing)
+                existing = {row[1] for row in db.execute(f"PRAGMA table_info({self.table})")}
+                columns = ", ".join(column.name for column in table.columns if column.name in existing)
+                ddl = str(CreateTable(table).compile(dialect=bind.dialect))
+                db.execute(ddl.replace(f"CREATE TABLE {self.table} (", f"CREATE TABLE {temp} (", 1))
+                db.execute(f"INSERT INTO {temp} ({columns}) SELECT {columns} FROM {self.table}")
+                db.execute(f"DROP TABLE {self.table}")  # 인덱스, 트리거도 함께 삭제됨
+                db.execute(f"ALTER TABLE {temp} RENAME TO {self.table}")
+                for index in table.indexes:
+                    db.execute(str(CreateIndex(index, if_not_exists=True).compile(dialect=bind.dialect)))
+                if self.table in ("posts", "comments") and db.execute(
+                    "SELECT 1 FROM sqlite_master WHERE name = 'search_index'"
+                ).fetchone():
+                    for statement in search.POST_TRIGGER_DDL + search.COMMENT_TRIGGER_DDL:
+                        db.execute(statement)  # 검색 자동 색인 트리거 다시 생성
+                problems = db.execute(f"PRAGMA foreign_key_check({self.table})").fetchall()
+                if problems:
+                    raise RuntimeError(f"{self.table} 외래키 검사 실패: {problems[:5]}")
+                db.execute("COMMIT")
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+        finally:
+            db.execute("PRAGMA foreign_keys=ON")
+            db.isolation_level = isolation_level
+            raw.close()
+
+
+# ---------------------------
+# 마이그레이션 목록 (버전 순서대로, 한 번 배포한 버전은 고치지 말고 새 버전을 추가)
+# ---------------------------
+@dataclass
+class Migration:
+    version: int
+    description: str
+    steps: list
+
+
+COMMENT_COUNT_BACKFILL = Backfill(
+    "posts", "comment_count",
+    "(SELECT count(*) FROM comments WHERE comments.post_id = posts.id)",
+    where="comment_count <> (SELECT count(*) FROM comments WHERE comments.post_id = posts.id)",
+)
+# 실제 댓글 수와 다른 게시글만 다시 계산
+
+MIGRATIONS = [
+    Migration(1, "기본 테이블", [
+        CreateTables("users", "posts", "comments", "login_history", "question", "answer"),
+    ]),
+    Migration(2, "목록 페이지네이션 인덱스 (게시글 작성일 순, 게시글별 댓글)", [
+        AddIndex("posts", "ix_posts_create_date_id"),
+        AddIndex("comments", "ix_comments_post_id_create_date_id"),
+    ]),
+    Migration(3, "게시글 댓글 수 컬럼", [
+        AddColumn("posts", "comment_count", "INTEGER NOT NULL DEFAULT 0"),
+        COMMENT_COUNT_BACKFILL,
+    ]),
+    Migration(4, "사용자 토큰 버전 컬럼", [
+        AddColumn("users", "token_version", "INTEGER NOT NULL DEFAULT 0"),
+    ]),
+    Migration(5, "게시글 마지막 변경 시각 컬럼", [
+        AddColumn("posts", "updated_at"),  # 타입은 모델 정의(DateTime)를 DB 종류에 맞게 변환
+        Backfill("posts", "updated_at", "create_date", where="updated_at IS NULL"),
+        SetNotNull("posts", "updated_at", fill="create_date"),  # 모델과 같이 nullable=False (값을 다 채운 뒤)
+    ]),
+    Migration(6, "게시글/댓글 검색 인덱스", [
+        SearchIndex(),
+    ]),
+    Migration(7, "로그인 기록 인덱스, 일별 집계 테이블", [
+        AddIndex("login_history", "ix_login_history_user_id_login_time"),
+        AddIndex("login_history", "ix_login_history_login_time"),
+        CreateTables("login_daily"),
+    ]),
+    Migration(8, "계정/게시글 삭제용 인덱스, 외래키 ON DELETE CASCADE", [
+        AddIndex("posts", "ix_posts_owner_id"),
+        AddIndex("comments", "ix_comments_user_id"),
+        CascadeForeignKeys("posts"),
+        CascadeForeignKeys("comments"),
+        CascadeForeignKeys("login_history"),
+        COMMENT_COUNT_BACKFILL,  # 고아 댓글을 옮긴 게시글의 댓글 수 다시 계산
+    ]),
+    Migration(9, "로그인 기록 재저장 중복 방지 키", [
+        AddColumn("login_history", "event_key", "VARCHAR"),
+        AddIndex("login_history", "ux_login_history_event_key"),
+    ]),
+]
+LATEST_VERSION = MIGRATIONS[-1].version
+
+
+def current_version(conn) -> int:
+    # 적용된 마지막 버전 (schema_version 테이블이 없으면 0)
+    if not inspect(conn).has_table("schema_version"):
+        return 0
+    return conn.execute(select(func.max(schema_version.c.version))).scalar() or 0
+
+
+def schema_status(bind=engine) -> dict:
+    # 서버 시작 시 확인용: 현재 버전, 최신 버전
+    with bind.connect() as conn:
+        return {"current": current_version(conn), "latest": LATEST_VERSION}
+
+
+def _pending(conn, target):
+    current = current_version(conn)
+    return [m for m in MIGRATIONS if current < m.version <= (target or LATEST_VERSION)]
+
+
+def plan(bind=engine, target: int = None, chunk_size: int = MIGRATION_CHUNK_ROWS) -> list:
+    # 실행하지 않고 할 일만 계산 (dry-run)
+    # → [(마이그레이션, [(단계, 예상 비용 또는 None(이미 적용됨))])]
+    with bind.connect() as conn:
+        return [
+            (migration, [(step, step.estimate(conn, chunk_size)) for step in migration.steps])
+            for migration in _pending(conn, target)
+        ]
+
+
+@contextmanager
+def _migration_lock(bind):
+    # 여러 워커/배포가 동시에 마이그레이션하지 않도록 한 프로세스만 진행
+    if bind.dialect.name == "sqlite" and bind.url.database not in (None, "", ":memory:"):
+        with FileLock(bind.url.database + ".migrate.lock", timeout=MIGRATION_LOCK_TIMEOUT):
+            yield
+    elif bind.dialect.name == "postgresql":
+        with bind.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.exec_driver_sql("SELECT pg_advisory_lock(20240101)")
+            try:
+                yield
+            finally:
+                conn.exec_driver_sql("SELECT pg_advisory_unlock(20240101)")
+    else:
+        yield
+
+
+def upgrade(bind=engine, target: int = None, chunk_size: int = MIGRATION_CHUNK_ROWS,
+            pause: float = MIGRATION_CHUNK_PAUSE, log=print) -> list:
+    # 밀린 마이그레이션을 순서대로 적용하고 적용한 버전 목록 반환
+    # 버전 하나가 끝날 때마다 schema_version에 기록 → 중간에 실패하면 그 버전부터 다시 실행
+    applied = []
+    with _migration_lock(bind):
+        schema_version.create(bind=bind, checkfirst=True)
+        with bind.connect() as conn:
+            pending = _pending(conn, target)  # 잠금을 잡은 뒤 다시 확인 (기다리는 동안 다른 프로세스가 적용했을 수 있음)
+        for migration in pending:
+            started = time.perf_counter()
+            for step in migration.steps:
+                with bind.connect() as conn:
+                    needed = step.estimate(conn, chunk_size) is not None
+                if needed:
+                    step_started = time.perf_counter()
+                    step.apply(bind, chunk_size, pause)
+                    log(f"  {step.describe()} ({time.perf_counter() - step_started:.2f}초)")
+                else:
+                    log(f"  {step.describe()} (이미 적용됨)")
+            with bind.begin() as conn:
+                conn.execute(insert(schema_version).values(
+                    version=migration.version, description=migration.description, applied_at=datetime.utcnow(),
+                ))
+            log(f"버전 {migration.version} 적용: {migration.description} ({time.perf_counter() - started:.2f}초)")
+            applied.append(migration.version)
+    return applied
@@ -1,8 +1,12 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey  # DB 컬럼, 타입, 외래키 import
+from sqlalchemy import Column, Integer, String, Text, Date, DateTime, ForeignKey, Index  # DB 컬럼, 타입, 외래키, 인덱스 import
 from sqlalchemy.orm import relationship  # 테이블 간 ORM 관계 설정
 from database import Base  # ORM Base 클래스 import
 from datetime import datetime  # 시간/날짜 처리용
 
+# 기존 DB에는 create_all이 새 컬럼/인덱스/외래키를 추가하지 않음
+# → 스키마를 바꾸면 같은 변경에서 app/database/migrations.py에 새 버전(업그레이드 단계)을 함께 추가할 것
+#   (아래 "마이그레이션 N" 주석은 그 변경을 기존 DB에 적용하는 버전 번호)
+
 # 사용자 테이블
 class User(Base):
     __tablename__ = "users"  # 테이블 이름
@@ -11,22 +15,42 @@ class User(Base):
     email = Column(String, unique=True, index=True, nullable=False)  # 이메일, 유니크, 인덱스, 필수
     hashed_password = Column(String, nullable=False)  # 암호화된 비밀번호
     created_at = Column(DateTime, default=datetime.utcnow)  # 생성시간, 기본값 현재
+    token_version = Column(Integer, nullable=False, default=0, server_default="0")  # 토큰 버전, 비밀번호 변경/계정 삭제 시 1 증가 → 이전 토큰 무효화 (마이그레이션 4)
 
     # 관계 설정
-    posts = relationship("PostModel", back_populates="owner")  # 게시글과 1:N 관계
-    comments = relationship("Comment", back_populates="user")  # 댓글과 1:N 관계
-    logins = relationship("LoginHistory", back_populates="user")  # 로그인 기록과 1:N 관계
+    # cascade="all, delete" + passive_deletes=True → 사용자를 지우면 자식 행은 DB의 ON DELETE CASCADE가 지움 (마이그레이션 8)
+    # (ORM이 자식 행을 하나씩 불러와서 지우지 않음)
+    posts = relationship("PostModel", back_populates="owner", cascade="all, delete", passive_deletes=True)  # 게시글과 1:N 관계
+    comments = relationship("Comment", back_populates="user", cascade="all, delete", passive_deletes=True)  # 댓글과 1:N 관계
+    logins = relationship("LoginHistory", back_populates="user", cascade="all, delete", passive_deletes=True)  # 로그인 기록과 1:N 관계
 
 # 로그인 기록 테이블
 class LoginHistory(Base):
     __tablename__ = "login_history"  # DB 테이블 이름
     id = Column(Integer, primary_key=True, index=True)  # 로그인 기록 고유 ID, 기본키, 인덱스
-    user_id = Column(Integer, ForeignKey("users.id"))  # 어느 사용자가 로그인했는지 연결 (users.id 참조)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"))  # 어느 사용자가 로그인했는지 연결 (users.id 참조, 사용자 삭제 시 함께 삭제)
     login_time = Column(DateTime, default=datetime.utcnow)  # 로그인 시간 기록, 기본값 현재 UTC
+    event_key = Column(String, nullable=True)  # 디스크에 임시 저장했다가 다시 저장한 기록의 고유 키 (중복 저장 방지, 그 외에는 NULL, 마이그레이션 9)
 
     user = relationship("User", back_populates="logins")  
     # User 모델과 양방향 관계 설정
 
+    __table_args__ = (  # 마이그레이션 7
+        Index("ix_login_history_user_id_login_time", "user_id", "login_time"),  # 사용자별 최근 로그인 조회용 복합 인덱스
+        Index("ix_login_history_login_time", "login_time"),  # 보존 기간이 지난 기록 정리(집계 후 삭제)용 인덱스
+        Index("ux_login_history_event_key", "event_key", unique=True),  # 같은 키를 두 번 저장하지 않도록 (NULL은 여러 개 허용, 마이그레이션 9)
+    )
+
+# 일별 로그인 집계 테이블
+# 보존 기간(LOGIN_HISTORY_RETENTION_DAYS)이 지난 login_history 원본은 사용자/날짜별 한 행으로 합쳐서 여기에 남김 (마이그레이션 7)
+class LoginDaily(Base):
+    __tablename__ = "login_daily"
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)  # 사용자 id
+    day = Column(Date, primary_key=True)  # 로그인 날짜 (UTC)
+    login_count = Column(Integer, nullable=False, default=0)  # 그날 로그인 횟수
+    first_login = Column(DateTime, nullable=False)  # 그날 첫 로그인 시각
+    last_login = Column(DateTime, nullable=False)  # 그날 마지막 로그인 시각
+
 # 게시글 테이블
 class PostModel(Base):
     __tablename__ = "posts"
@@ -34,11 +58,18 @@ class PostModel(Base):
     title = Column(String, nullable=False)  # 제목
     content = Column(Text, nullable=False)  # 내용
     create_date = Column(DateTime, nullable=False, default=datetime.utcnow)  # 작성일
-    owner_id = Column(Integer, ForeignKey("users.id"))  # 작성자 외래키
+    owner_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"))  # 작성자 외래키 (작성자 삭제 시 게시글도 삭제)
+    comment_count = Column(Integer, nullable=False, default=0, server_default="0")  # 댓글 수, 댓글 작성/삭제 시 함께 갱신 (마이그레이션 3)
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)  # 마지막 변경 시각 (수정, 댓글 수 변경 포함), ETag/Last-Modified 계산용 (마이그레이션 5)
 
     # 관계 설정
     owner = relationship("User", back_populates="posts")  # Post.owner → User 접근 가능
-    comments = relationship("Comment", back_populates="post")  # 게시글-댓글 1:N 관계
+    comments = relationship("Comment", back_populates="post", cascade="all, delete", passive_deletes=True)  # 게시글-댓글 1:N 관계 (게시글 삭제 시 DB가 댓글 삭제)
+
+    __table_args__ = (
+        Index("ix_posts_create_date_id", "create_date", "id"),  # 목록 cursor 페이지네이션(작성일, id 순)용 복합 인덱스
+        Index("ix_posts_owner_id", "owner_id"),  # 작성자별 게시글 조회/삭제용 인덱스 (없으면 사용자 삭제 시 posts 전체를 훑음, 마이그레이션 8)
+    )
 
 # 댓글 테이블
 class Comment(Base):
@@ -46,13 +77,18 @@ class Comment(Base):
     id = Column(Integer, primary_key=True, index=True)
     content = Column(Text, nullable=False)  # 댓글 내용
     create_date = Column(DateTime, nullable=False, default=datetime.utcnow)  # 작성일
-    post_id = Column(Integer, ForeignKey("posts.id"))  # 어떤 게시글에 달린 댓글인지
-    user_id = Column(Integer, ForeignKey("users.id"))  # 누가 쓴 댓글인지
+    post_id = Column(Integer, ForeignKey("posts.id", ondelete="CASCADE"))  # 어떤 게시글에 달린 댓글인지 (게시글 삭제 시 함께 삭제)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"))  # 누가 쓴 댓글인지 (사용자 삭제 시 함께 삭제)
 
     # 관계 설정
     post = relationship("PostModel", back_populates="comments")  # Comment → PostModel 접근
     user = relationship("User", back_populates="comments")  # Comment → User 접근
 
+    __table_args__ = (
+        Index("ix_comments_post_id_create_date_id", "post_id", "create_date", "id"),  # 게시글별 댓글 목록(작성일, id 순) 조회용 복합 인덱스
+        Index("ix_comments_user_id", "user_id"),  # 사용자별 댓글 삭제(계정 삭제, ON DELETE CASCADE)용 인덱스 (마이그레이션 8)
+    )
+
 # 질문 테이블
 class Question(Base):
     __tablename__ = "question"
@@ -1,5 +1,6 @@
 from pydantic import BaseModel, EmailStr  # 데이터 검증용 Pydantic import
 from datetime import datetime  # 시간 처리
+from typing import Optional  # 값이 없을 수 있는 필드용
 
 class UserCreate(BaseModel):  # 회원가입 요청용 스키마
     username: str  # 사용자명
@@ -14,6 +15,13 @@ class UserResponse(BaseModel):  # 회원가입 응답용 스키마
     class Config:
         from_attributes = True  # ORM 객체 바로 반환 가능
 
+class LoginRecord(BaseModel):  # 로그인 기록 응답 스키마
+    id: int  # 로그인 기록 ID
+    login_time: datetime  # 로그인 시각 (UTC)
+
+    class Config:
+        from_attributes = True  # ORM 객체 바로 반환 가능
+
 class PostCreate(BaseModel):  # 게시글 생성 요청 스키마
     title: str  # 제목
     content: str  # 내용
@@ -24,10 +32,16 @@ class PostResponse(BaseModel):  # 게시글 응답 스키마
     content: str  # 내용
     create_date: datetime  # 작성일
     owner_id: int  # 작성자 ID
+    comment_count: int = 0  # 댓글 수 (posts.comment_count 컬럼 값, COUNT 쿼리 없이 제공)
+    updated_at: Optional[datetime] = None  # 마지막 변경 시각
 
     class Config:
         from_attributes = True  # ORM 객체 바로 반환 가능
 
+class PostPage(BaseModel):  # 게시글 목록 페이지 응답 스키마
+    items: list[PostResponse]  # 이번 페이지의 게시글
+    next_cursor: Optional[str] = None  # 다음 페이지 조회용 cursor, 마지막 페이지면 None
+
 # 댓글 작성용 요청 스키마
 class CommentCreate(BaseModel):
     post_id: int       # 어떤 게시글에 달리는 댓글인지
@@ -44,4 +58,42 @@ class CommentResponse(BaseModel):
 
     model_config = { 
         "from_attributes": True  # ORM 객체 바로 반환 가능
-    }
\ No newline at end of file
+    }
+
+# 댓글 목록 페이지 응답 스키마
+class CommentPage(BaseModel):
+    items: list[CommentResponse]  # 이번 페이지의 댓글
+    next_cursor: Optional[str] = None  # 다음 페이지 조회용 cursor, 마지막 페이지면 None
+
+# 작성자 요약 (게시글 상세에 함께 보내는 작성자 정보, 이메일은 제외)
+class UserSummary(BaseModel):
+    id: int  # 사용자 ID
+    username: str  # 사용자명
+
+    model_config = {
+        "from_attributes": True  # ORM 객체 바로 반환 가능
+    }
+
+# 작성자 정보가 포함된 댓글
+class CommentWithAuthor(CommentResponse):
+    user: Optional[UserSummary] = None  # 댓글 작성자 (탈퇴 등으로 없으면 None)
+
+# 게시글 상세 응답 스키마 (게시글 + 작성자 + 첫 페이지 댓글)
+class PostDetail(PostResponse):
+    owner: Optional[UserSummary] = None  # 게시글 작성자
+    comments: list[CommentWithAuthor]  # 첫 페이지 댓글 (오래된 순)
+    next_comment_cursor: Optional[str] = None  # 다음 댓글 페이지 cursor → GET /comments/{post_id}?cursor= 로 이어서 조회
+
+# 검색 결과 한 건 (게시글 또는 댓글)
+class SearchHit(BaseModel):
+    kind: str          # "post" / "comment"
+    id: int            # 게시글 id 또는 댓글 id
+    post_id: int       # 게시글 id (댓글이면 달린 게시글)
+    title: str         # 게시글 제목
+    snippet: str       # 검색어 주변 본문, 검색어는 <mark>로 표시 (나머지는 HTML escape됨)
+    score: float       # 관련도 (클수록 관련 높음, 짧은 검색어만 있으면 0)
+
+# 검색 결과 페이지
+class SearchPage(BaseModel):
+    items: list[SearchHit]
+    next_cursor: Optional[str] = None  # 다음 페이지 조회용 cursor
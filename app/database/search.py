@@ -0,0 +1,152 @@
+from sqlalchemy import DDL, event, text
+# DDL/event → 테이블을 만들 때 검색 인덱스(FTS5)와 트리거도 함께 생성
+# text → FTS5 전용 문법(MATCH, bm25, snippet)은 직접 SQL로 작성
+import html
+# 검색 결과 snippet을 HTML로 보낼 때 본문 속 태그를 그대로 출력하지 않도록 escape
+from models import PostModel, Comment
+# 게시글/댓글 테이블이 생성될 때 검색 인덱스 DDL을 붙이기 위해 사용
+
+# 게시글/댓글 전문 검색 (SQLite FTS5)
+# search_index 하나에 게시글과 댓글을 함께 넣어 한 번에 bm25 순위를 매긴다
+#   rowid = 게시글 id * 2       (게시글)
+#   rowid = 댓글 id * 2 + 1     (댓글)
+# → rowid만으로 원래 행을 찾고 지울 수 있음 (UNINDEXED 컬럼으로 찾으면 인덱스 전체를 훑어야 함)
+#
+# tokenize='trigram' → 공백/형태소 대신 3글자 단위로 색인하므로 띄어쓰기, 조사와 상관없이 한글 부분 문자열 검색 가능
+# 대신 3글자 미만 검색어는 색인으로 찾을 수 없어 LIKE로 따로 처리한다
+
+MIN_TERM_LENGTH = 3
+# trigram 색인으로 찾을 수 있는 최소 글자 수
+
+SEARCH_TABLE_DDL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5(
+        title, body, kind UNINDEXED, post_id UNINDEXED, tokenize='trigram'
+    )""",
+]
+# kind: 'post' / 'comment', post_id: 댓글이면 달린 게시글 id
+
+POST_TRIGGER_DDL = [
+    # 게시글 작성 → 색인 추가
+    """CREATE TRIGGER IF NOT EXISTS posts_search_ai AFTER INSERT ON posts BEGIN
+        INSERT INTO search_index(rowid, title, body, kind, post_id) VALUES (new.id * 2, new.title, new.content, 'post', new.id);
+    END""",
+    # 제목/본문 수정 → 색인 교체 (댓글 수, 변경 시각만 바뀐 경우는 다시 색인하지 않음)
+    """CREATE TRIGGER IF NOT EXISTS posts_search_au AFTER UPDATE OF title, content ON posts BEGIN
+        DELETE FROM search_index WHERE rowid = old.id * 2;
+        INSERT INTO search_index(rowid, title, body, kind, post_id) VALUES (new.id * 2, new.title, new.content, 'post', new.id);
+    END""",
+    # 게시글 삭제 → 색인 삭제
+    """CREATE TRIGGER IF NOT EXISTS posts_search_ad AFTER DELETE ON posts BEGIN
+        DELETE FROM search_index WHERE rowid = old.id * 2;
+    END""",
+]
+
+COMMENT_TRIGGER_DDL = [
+    """CREATE TRIGGER IF NOT EXISTS comments_search_ai AFTER INSERT ON comments BEGIN
+        INSERT INTO search_index(rowid, title, body, kind, post_id) VALUES (new.id * 2 + 1, '', new.content, 'comment', new.post_id);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS comments_search_au AFTER UPDATE OF content, post_id ON comments BEGIN
+        DELETE FROM search_index WHERE rowid = old.id * 2 + 1;
+        INSERT INTO search_index(rowid, title, body, kind, post_id) VALUES (new.id * 2 + 1, '', new.content, 'comment', new.post_id);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS comments_search_ad AFTER DELETE ON comments BEGIN
+        DELETE FROM search_index WHERE rowid = old.id * 2 + 1;
+    END""",
+]
+
+# create_all로 posts/comments 테이블을 만들 때 검색 인덱스와 트리거도 같이 생성 (SQLite에서만)
+for _statement in SEARCH_TABLE_DDL + POST_TRIGGER_DDL:
+    event.listen(PostModel.__table__, "after_create", DDL(_statement).execute_if(dialect="sqlite"))
+for _statement in COMMENT_TRIGGER_DDL:
+    event.listen(Comment.__table__, "after_create", DDL(_statement).execute_if(dialect="sqlite"))
+
+def ensure_search_index(conn):
+    # 이미 만들어진 DB에 검색 인덱스/트리거가 없으면 생성 (conn: 동기 Connection)
+    for statement in SEARCH_TABLE_DDL + POST_TRIGGER_DDL + COMMENT_TRIGGER_DDL:
+        conn.exec_driver_sql(statement)
+
+def rebuild_search_index(conn) -> dict:
+    # 검색 인덱스를 비우고 posts/comments 전체로 다시 채움 (기존 데이터 색인, 인덱스 복구용)
+    ensure_search_index(conn)
+    conn.exec_driver_sql("DELETE FROM search_index")
+    posts = conn.exec_driver_sql(
+        "INSERT INTO search_index(rowid, title, body, kind, post_id) "
+        "SELECT id * 2, title, content, 'post', id FROM posts"
+    ).rowcount
+    comments = conn.exec_driver_sql(
+        "INSERT INTO search_index(rowid, title, body, kind, post_id) "
+        "SELECT id * 2 + 1, '', content, 'comment', post_id FROM comments"
+    ).rowcount
+    conn.exec_driver_sql("INSERT INTO search_index(search_index) VALUES ('optimize')")
+    # 색인 조각(segment)을 하나로 합쳐 검색 속도 개선
+    return {"posts": posts, "comments": comments}
+
+def split_terms(q: str) -> tuple[list, list]:
+    # 검색어를 공백으로 나눠 (색인으로 찾을 단어, LIKE로 찾을 짧은 단어)로 구분
+    terms = list(dict.fromkeys(term for term in q.split() if term))
+    long_terms = [term for term in terms if len(term) >= MIN_TERM_LENGTH]
+    short_terms = [term for term in terms if len(term) < MIN_TERM_LENGTH]
+    return long_terms, short_terms
+
+def match_expression(terms: list) -> str:
+    # 각 단어를 "..."로 감싸 FTS5 문법(AND, OR, *, 괄호 등)으로 해석되지 않게 하고 모두 포함(AND)하도록 연결
+    return " ".join('"' + term.replace('"', '""') + '"' for term in terms)
+
+def like_pattern(term: str) -> str:
+    # LIKE 특수문자(%, _)를 글자 그대로 찾도록 escape
+    return "%" + term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+
+SNIPPET_START, SNIPPET_END = "\x02", "\x03"
+# snippet에서 검색어 위치를 표시할 임시 문자 (escape 후 <mark> 태그로 바꿈)
+
+def render_snippet(raw: str) -> str:
+    # 본문은 HTML escape 하고, 검색어 위치만 <mark>로 감싸서 반환
+    return html.escape(raw or "").replace(SNIPPET_START, "<mark>").replace(SNIPPET_END, "</mark>")
+
+def search_statement(q: str, kind: str | None, limit: int, after: tuple | None):
+    """검색 SQL과 파라미터 생성
+
+    3글자 이상 단어가 있으면 FTS5 MATCH + bm25 순위(제목 가중치 10배), 정렬: (점수, rowid)
+    짧은 단어만 있으면 LIKE로 찾고 최신순(rowid 내림차순) 정렬 → 점수는 0
+    after: 이전 페이지 마지막 결과의 (점수, rowid)
+    """
+    long_terms, short_terms = split_terms(q)
+    params = {"limit": limit}
+    where = []   # 검색 조건
+    page = []    # cursor 조건 (점수를 계산한 뒤 적용)
+    if long_terms:
+        params["match"] = match_expression(long_terms)
+        where.append("search_index MATCH :match")
+        score = "bm25(search_index, 10.0, 1.0)"
+        snippet = f"snippet(search_index, 1, '{SNIPPET_START}', '{SNIPPET_END}', '…', 24)"
+        order = "score, rowid"
+        if after is not None:
+            page.append("(score > :after_score OR (score = :after_score AND rowid > :after_rowid))")
+    else:
+        # 색인을 쓸 수 없는 짧은 검색어 → 검색 인덱스 전체를 훑음 (결과 수는 limit로 제한)
+        score = "0.0"
+        snippet = "substr(search_index.body, 1, 80)"
+        order = "rowid DESC"
+        if after is not None:
+            page.append("rowid < :after_rowid")
+    for i, term in enumerate(short_terms):
+        # 짧은 단어는 제목/본문에 포함되어 있는지 LIKE로 추가 확인
+        params[f"like{i}"] = like_pattern(term)
+        where.append(f"(search_index.title LIKE :like{i} ESCAPE '\\' OR search_index.body LIKE :like{i} ESCAPE '\\')")
+    if kind is not None:
+        params["kind"] = kind
+        where.append("search_index.kind = :kind")
+    if after is not None:
+        params["after_score"], params["after_rowid"] = after
+    sql = f"""
+        SELECT * FROM (
+            SELECT search_index.rowid AS rowid, search_index.kind AS kind, search_index.post_id AS post_id,
+                   posts.title AS title, {snippet} AS snippet, {score} AS score
+            FROM search_index JOIN posts ON posts.id = search_index.post_id
+            WHERE {" AND ".join(where)}
+        )
+        {("WHERE " + " AND ".join(page)) if page else ""}
+        ORDER BY {order}
+        LIMIT :limit
+    """
+    return text(sql), params
@@ -0,0 +1,288 @@
+# 사용자/게시글/댓글 대량 가져오기·내보내기 (NDJSON, CSV)
+# 파일 전체를 메모리에 올리지 않고 chunk 단위로 읽고 쓰므로 수백만 행도 메모리 사용량이 일정함
+#
+# 내보내기: python bulk_data.py export posts --format ndjson --out posts.ndjson
+# 가져오기: python bulk_data.py import posts --format ndjson --in posts.ndjson --batch-size 5000
+# (app/scripts 폴더에서, database.py/models.py를 import 할 수 있는 환경에서 실행. --out/--in 생략 시 표준 입출력)
+
+import argparse
+import csv
+import io
+import json
+import queue
+import sys
+import threading
+import time
+from datetime import datetime
+
+from sqlalchemy import insert, select, text
+from database import engine
+# database.py의 엔진 (PRAGMA, 커넥션 풀 설정이 그대로 적용됨)
+import models
+from search import rebuild_search_index, POST_TRIGGER_DDL, COMMENT_TRIGGER_DDL
+# 게시글/댓글 검색 인덱스 (대량 가져오기 때는 트리거를 잠시 끄고 마지막에 한 번에 색인)
+try:
+    import orjson
+    # 빠른 JSON 인코더/디코더 (없으면 표준 json 사용)
+except ImportError:
+    orjson = None
+
+TABLES = {
+    "users": models.User.__table__,
+    "login_history": models.LoginHistory.__table__,
+    "posts": models.PostModel.__table__,
+    "comments": models.Comment.__table__,
+}
+# 가져오기 순서: users → posts → comments (외래키가 가리키는 쪽부터)
+
+SEARCH_TRIGGERS = {
+    "posts": ["posts_search_ai", "posts_search_au", "posts_search_ad"],
+    "comments": ["comments_search_ai", "comments_search_au", "comments_search_ad"],
+}
+
+
+def dumps_line(row: dict) -> bytes:
+    # 한 행 → NDJSON 한 줄
+    if orjson is not None:
+        return orjson.dumps(row) + b"\n"
+    return (json.dumps(row, default=lambda v: v.isoformat(), ensure_ascii=False) + "\n").encode()
+
+
+def loads_line(line):
+    return orjson.loads(line) if orjson is not None else json.loads(line)
+
+
+def column_converter(column, dialect):
+    # 파일에서 읽은 값(문자열 등) → 파이썬 값 → DB 드라이버에 넘길 값으로 변환하는 함수
+    # (DB 저장 형식은 SQLAlchemy 컬럼 타입의 bind_processor를 그대로 사용 → ORM으로 넣은 값과 같은 형식)
+    python_type = column.type.python_type
+    if python_type is datetime:
+        parse = lambda v: datetime.fromisoformat(v) if v not in (None, "") else None
+    elif python_type is int:
+        parse = lambda v: int(v) if v not in (None, "") else None
+    else:
+        parse = None
+    bind = column.type.dialect_impl(dialect).bind_processor(dialect)
+    # dialect_impl → DB 종류별 실제 타입 (예: SQLite DATETIME은 '2024-01-01 00:00:00.000000' 문자열로 저장)
+    if python_type is datetime and bind is not None:
+        sample = datetime(2001, 2, 3, 4, 5, 6, 7)
+        if bind(sample) == sample.isoformat(" ", "microseconds"):
+            # SQLite DATETIME 저장 형식과 같으면 C로 구현된 isoformat으로 바로 변환 (bind_processor보다 약 2배 빠름)
+            return lambda v: datetime.fromisoformat(v).isoformat(" ", "microseconds") if v not in (None, "") else None
+    if parse and bind:
+        return lambda v: bind(parse(v))
+    return parse or bind or (lambda v: v)
+
+
+# ---------------------------
+# 내보내기
+# ---------------------------
+def export_table(name: str, fmt: str, out, chunk_size: int) -> int:
+    # yield_per → DB 커서에서 chunk_size 행씩만 가져와서 바로 파일에 씀
+    table = TABLES[name]
+    columns = [column.name for column in table.columns]
+    count = 0
+    writer = None
+    if fmt == "csv":
+        text_out = io.TextIOWrapper(out, encoding="utf-8", newline="", write_through=True)
+        writer = csv.writer(text_out)
+        writer.writerow(columns)
+    with engine.connect() as conn:
+        result = conn.execution_options(yield_per=chunk_size).execute(select(table).order_by(table.c.id))
+        for rows in result.partitions():
+            if fmt == "csv":
+                writer.writerows(
+                    [value.isoformat() if isinstance(value, datetime) else value for value in row] for row in rows
+                )
+            else:
+                out.write(b"".join(dumps_line(dict(zip(columns, row))) for row in rows))
+            count += len(rows)
+    if fmt == "csv":
+        text_out.detach()  # out(바이너리 스트림)은 호출한 쪽에서 닫음
+    return count
+
+
+# ---------------------------
+# 가져오기
+# ---------------------------
+def read_rows(fmt: str, source):
+    # 파일에서 한 행씩 dict로 읽음 (전체를 읽어두지 않음)
+    if fmt == "csv":
+        yield from csv.DictReader(io.TextIOWrapper(source, encoding="utf-8", newline=""))
+    else:
+        for line in source:
+            if line.strip():
+                yield loads_line(line)
+
+
+def prepare_insert(table, columns: list, dialect):
+    # executemany에 바로 넘길 INSERT 문과, 파일의 한 행(dict)을 파라미터 tuple로 바꾸는 함수
+    # → 행마다 SQLAlchemy 파라미터 처리를 거치지 않고 DB 드라이버의 executemany로 직접 실행
+    unknown = [name for name in columns if name not in table.c]
+    if unknown:
+        raise SystemExit(f"{table.name} 테이블에 없는 컬럼입니다: {', '.join(unknown)}")
+    compiled = insert(table).compile(dialect=dialect, column_keys=columns)
+    # → 파일에 없어도 파이썬 쪽 기본값이 있는 컬럼(comment_count, updated_at, token_version 등)은 INSERT 문에 포함됨
+    order = list(compiled.positiontup) if compiled.positional else list(compiled.params)
+    getters = [column_getter(table.c[name], name in columns, dialect) for name in order]
+    if compiled.positional:
+        to_params = lambda row: tuple([get(row) for get in getters])
+    else:
+        pairs = list(zip(order, getters))
+        to_params = lambda row: {name: get(row) for name, get in pairs}
+    return str(compiled), to_params
+
+
+def column_getter(column, in_file: bool, dialect):
+    # 한 행(dict) → 해당 컬럼의 파라미터 값
+    # 파일에 있는 컬럼은 파일 값을, 없는 컬럼(또는 그 행에만 빠진 키)은 모델의 기본값(default=...)을 ORM으로 넣을 때처럼 행마다 계산해서 사용
+    name = column.key
+    default = column_default(column, dialect)
+    if not in_file:
+        return default
+    convert = column_converter(column, dialect)
+    return lambda row: convert(row[name]) if name in row else default(row)
+
+
+def column_default(column, dialect):
+    # 파일에 값이 없을 때 넣을 파라미터 값을 만드는 함수 (기본값이 없는 컬럼은 NULL)
+    default = column.default
+    if default is None or not (default.is_scalar or default.is_callable):
+        return lambda row: None
+    bind = column.type.dialect_impl(dialect).bind_processor(dialect) or (lambda v: v)
+    # → 기본값은 문자열이 아니라 이미 파이썬 값이므로 DB 드라이버 형식으로만 변환
+    if default.is_scalar:
+        value = bind(default.arg)
+        return lambda row: value
+    make = default.arg
+    # → 호출형 기본값(datetime.utcnow 등)은 SQLAlchemy가 실행 context 하나를 받는 함수로 감싸 둠
+    return lambda row: bind(make(None))
+
+
+def read_batches(rows, batch_size: int):
+    # batch_size 행씩 묶음
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+_DONE = object()
+# 파일을 다 읽었다는 표시
+
+
+def prefetch(batches, depth: int = 2):
+    # 파일 읽기/변환(파이썬)과 DB 쓰기(SQLite는 실행 중 GIL을 놓음)를 겹쳐서 실행
+    # 큐 크기를 depth로 제한하므로 메모리에는 최대 depth+2개 batch만 올라감
+    pending = queue.Queue(maxsize=depth)
+
+    def worker():
+        try:
+            for batch in batches:
+                pending.put(batch)
+            pending.put(_DONE)
+        except BaseException as exc:  # 읽기 에러는 DB 쓰는 쪽에서 다시 발생시킴
+            pending.put(exc)
+
+    threading.Thread(target=worker, daemon=True).start()
+    while True:
+        item = pending.get()
+        if item is _DONE:
+            return
+        if isinstance(item, BaseException):
+            raise item
+        yield item
+
+
+def convert_batches(batches, table, dialect):
+    # 각 batch를 (INSERT 문, 파라미터 목록)으로 변환. 컬럼 목록은 첫 행(CSV면 헤더) 기준
+    statement = to_params = None
+    for batch in batches:
+        if statement is None:
+            statement, to_params = prepare_insert(table, list(batch[0]), dialect)
+        yield statement, [to_params(row) for row in batch]
+
+
+def set_search_triggers(conn, name: str, enabled: bool):
+    # 대량 가져오기 동안 검색 인덱스 트리거를 끄고(행마다 색인하지 않음), 끝나면 다시 생성
+    if name not in SEARCH_TRIGGERS or conn.dialect.name != "sqlite":
+        return
+    if enabled:
+        for statement in POST_TRIGGER_DDL + COMMENT_TRIGGER_DDL:
+            conn.exec_driver_sql(statement)
+    else:
+        for trigger in SEARCH_TRIGGERS[name]:
+            conn.exec_driver_sql(f"DROP TRIGGER IF EXISTS {trigger}")
+
+
+def import_table(name: str, fmt: str, source, batch_size: int, reindex: bool) -> int:
+    # batch_size 행마다 한 트랜잭션으로 executemany(insert) 실행
+    # → 중간에 실패해도 이미 커밋된 batch는 남고, 실패한 batch만 롤백됨 (출력된 행 수로 이어서 가져올 위치 확인)
+    table = TABLES[name]
+    count = 0
+    if reindex:
+        with engine.begin() as conn:
+            set_search_triggers(conn, name, False)
+    try:
+        batches = convert_batches(read_batches(read_rows(fmt, source), batch_size), table, engine.dialect)
+        # 파일에 없는 컬럼은 모델의 기본값이 들어감 (기본값이 없는 컬럼은 NULL)
+        for statement, params in prefetch(batches):
+            with engine.begin() as conn:
+                conn.exec_driver_sql(statement, params)
+            count += len(params)
+    finally:
+        if reindex:
+            with engine.begin() as conn:
+                set_search_triggers(conn, name, True)
+    with engine.begin() as conn:
+        if name == "comments":
+            # 가져온 댓글 수를 게시글의 comment_count에 반영 (집합 연산 한 번)
+            conn.execute(text(
+                "UPDATE posts SET comment_count = (SELECT count(*) FROM comments WHERE comments.post_id = posts.id)"
+            ))
+        if reindex and name in SEARCH_TRIGGERS and conn.dialect.name == "sqlite":
+            started = time.perf_counter()
+            rebuild_search_index(conn)
+            print(f"검색 인덱스 재색인: {time.perf_counter() - started:.2f}초", file=sys.stderr)
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="사용자/게시글/댓글 NDJSON·CSV 대량 가져오기/내보내기")
+    parser.add_argument("command", choices=["export", "import"])
+    parser.add_argument("table", choices=list(TABLES))
+    parser.add_argument("--format", choices=["ndjson", "csv"], default="ndjson")
+    parser.add_argument("--out", help="내보낼 파일 경로 (생략하면 표준 출력)")
+    parser.add_argument("--in", dest="source", help="가져올 파일 경로 (생략하면 표준 입력)")
+    parser.add_argument("--chunk-size", type=int, default=5000, help="내보내기 때 DB에서 한 번에 가져올 행 수")
+    parser.add_argument("--batch-size", type=int, default=5000, help="가져오기 때 한 트랜잭션에 넣을 행 수")
+    parser.add_argument("--keep-search-triggers", action="store_true",
+                        help="가져오기 중에도 행마다 검색 인덱스를 갱신 (기본: 끝나고 한 번에 재색인)")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    if args.command == "export":
+        out = open(args.out, "wb") if args.out else sys.stdout.buffer
+        try:
+            count = export_table(args.table, args.format, out, args.chunk_size)
+        finally:
+            if args.out:
+                out.close()
+    else:
+        source = open(args.source, "rb") if args.source else sys.stdin.buffer
+        try:
+            count = import_table(args.table, args.format, source, args.batch_size, not args.keep_search_triggers)
+        finally:
+            if args.source:
+                source.close()
+    elapsed = time.perf_counter() - started
+    print(f"{args.table} {args.command} 완료: {count}행, {elapsed:.2f}초 ({count / elapsed if elapsed else 0:,.0f}행/초)", file=sys.stderr)
+    # 진행 결과는 표준 에러로 출력 (표준 출력은 내보내기 데이터로 사용)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+# 게시글 상세(GET /posts/{id}/full) 쿼리 수 확인
+# 댓글/작성자 수가 늘어나도 SQL 실행 횟수가 그대로인지(N+1이 아닌지) 검사한다
+# 임시 SQLite DB에 게시글 하나와 댓글(작성자가 모두 다른)을 넣고, 댓글 수를 바꿔가며 요청할 때 실행된 SQL을 센다
+#
+# 실행: python check_query_count.py (app/scripts 폴더에서, database.py/models.py/posts.py를 import 할 수 있는 환경)
+# DB_MODE=async 로 실행하면 비동기 세션 경로를 검사. 기대한 쿼리 수와 다르면 종료 코드 1
+
+import os
+import sys
+import tempfile
+
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(prefix="query_count_"), "query_count.db")
+# 실제 DB를 건드리지 않도록 database.py를 import 하기 전에 임시 DB로 지정
+os.environ["DATABASE_REPLICA_URLS"] = ""
+
+from datetime import datetime, timedelta
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import event, insert
+
+import database, models
+from posts import router as posts_router
+
+EXPECTED_QUERIES = 2
+# ① 게시글 + 작성자(JOIN) ② 첫 페이지 댓글 + 댓글 작성자(JOIN)
+
+database.Base.metadata.create_all(bind=database.engine)
+app = FastAPI()
+app.include_router(posts_router)
+client = TestClient(app)
+
+statements = []
+query_engine = database.async_engine.sync_engine if database.async_engine is not None else database.engine
+# 요청이 실제로 사용하는 엔진 (async 모드면 AsyncEngine 안의 동기 엔진에서 이벤트가 발생함)
+
+
+@event.listens_for(query_engine, "before_cursor_execute")
+def count_statement(conn, cursor, statement, parameters, context, executemany):
+    statements.append(statement)
+
+
+def seed(comment_count: int) -> int:
+    # 게시글 하나 + 서로 다른 사용자 comment_count명이 단 댓글 → 게시글 id 반환
+    with database.engine.begin() as conn:
+        owner_id = conn.execute(insert(models.User).values(
+            username=f"owner{comment_count}", email=f"owner{comment_count}@example.com", hashed_password="-",
+        )).inserted_primary_key[0]
+        post_id = conn.execute(insert(models.PostModel).values(
+            title=f"댓글 {comment_count}개", content="본문", owner_id=owner_id, comment_count=comment_count,
+        )).inserted_primary_key[0]
+        if comment_count:
+            start = datetime(2024, 1, 1)
+            conn.execute(insert(models.User), [
+                {"username": f"u{comment_count}-{i}", "email": f"u{comment_count}-{i}@example.com", "hashed_password": "-"}
+                for i in range(comment_count)
+            ])
+            first_user = owner_id + 1
+            conn.execute(insert(models.Comment), [
+                {"post_id": post_id, "user_id": first_user + i, "content": f"댓글 {i}", "create_date": start + timedelta(seconds=i)}
+                for i in range(comment_count)
+            ])
+    return post_id
+
+
+failed = False
+for comment_count in (0, 1, 30, 200):
+    post_id = seed(comment_count)
+    statements.clear()
+    response = client.get(f"/posts/{post_id}/full", params={"comment_limit": 50})
+    body = response.json()
+    authors = {comment["user"]["username"] for comment in body.get("comments", [])}
+    ok = (
+        response.status_code == 200
+        and len(statements) == EXPECTED_QUERIES
+        and len(body["comments"]) == min(comment_count, 50)
+        and len(authors) == len(body["comments"])  # 댓글마다 작성자가 함께 왔는지
+        and body["owner"]["username"] == f"owner{comment_count}"
+        and (body["next_comment_cursor"] is not None) == (comment_count > 50)
+    )
+    failed = failed or not ok
+    print(f"댓글 {comment_count:>3}개: 응답 {response.status_code}, SQL {len(statements)}회 (기대 {EXPECTED_QUERIES}회) → {'통과' if ok else '실패'}")
+    if not ok:
+        for statement in statements:
+            print("   ", " ".join(statement.split())[:160])
+
+print(f"DB_MODE={database.DB_MODE}: {'실패' if failed else '통과'}")
+sys.exit(1 if failed else 0)
@@ -0,0 +1,15 @@
+import sys
+from login_history import compact_login_history
+# 보존 기간이 지난 로그인 기록 → 일별 집계(login_daily)로 합치고 원본 삭제
+from config import LOGIN_HISTORY_RETENTION_DAYS
+# 기본 보존 기간(일)
+
+# 로그인 기록 정리 (하루 한 번 정도 스케줄러/cron으로 실행)
+# login_history 테이블 크기가 보존 기간만큼으로 유지됨
+# 실행: python compact_login_history.py [보존 기간(일)] (app/scripts 폴더에서, database.py/models.py를 import 할 수 있는 환경)
+
+retention_days = int(sys.argv[1]) if len(sys.argv) > 1 else LOGIN_HISTORY_RETENTION_DAYS
+
+result = compact_login_history(retention_days)
+
+print(f"로그인 기록 정리 완료: {result['cutoff']} 이전 {result['rows']}건을 일별 집계로 이동 ({result['chunks']}회 나눠 처리)")
@@ -1,7 +1,10 @@
 from database import Base, engine
 import models
+import search
+# 게시글/댓글 테이블을 만들 때 검색 인덱스(FTS)와 트리거도 같이 생성되도록 등록
 
 # 데이터베이스 및 테이블 생성
+# 없는 테이블만 만들고 기존 테이블의 컬럼/인덱스는 바꾸지 않음 → 배포할 때는 migrate.py 사용
 Base.metadata.create_all(bind=engine)
 
 print("DB 및 테이블 생성 완료!")
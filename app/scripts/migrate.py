@@ -0,0 +1,60 @@
+# 스키마 마이그레이션 실행
+# 배포할 때 서버를 올리기 전에 한 번 실행 (서버는 시작할 때 스키마를 바꾸지 않음, MIGRATE_ON_STARTUP 참고)
+# --dry-run 이면 실행하지 않고 버전별 단계, 대상 행 수, 배치 수, 잠금 방식만 출력
+#
+# 실행: python migrate.py --dry-run       (app/scripts 폴더에서, database.py/models.py를 import 할 수 있는 환경)
+#       python migrate.py                 (최신 버전까지 적용)
+#       python migrate.py --target 5 --chunk-size 5000 --pause 0.05
+#       python migrate.py --status
+
+import argparse
+import sys
+
+from config import MIGRATION_CHUNK_ROWS, MIGRATION_CHUNK_PAUSE
+from migrations import LATEST_VERSION, plan, schema_status, upgrade
+
+
+def print_plan(chunk_size, target):
+    steps = plan(target=target, chunk_size=chunk_size)
+    if not steps:
+        print("적용할 마이그레이션 없음")
+        return
+    total_rows = 0
+    for migration, estimates in steps:
+        print(f"버전 {migration.version}: {migration.description}")
+        for step, estimate in estimates:
+            if estimate is None:
+                print(f"  - {step.describe()}: 이미 적용됨 (건너뜀)")
+                continue
+            total_rows += estimate["rows"]
+            print(f"  - {step.describe()}")
+            print(f"      대상 {estimate['rows']:,}행, 배치 {estimate['chunks']:,}회, {estimate['lock']}")
+    print(f"합계: 버전 {len(steps)}개, 대상 {total_rows:,}행 (배치 크기 {chunk_size:,}행)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="스키마 마이그레이션")
+    parser.add_argument("--dry-run", action="store_true", help="실행하지 않고 계획과 예상 비용만 출력")
+    parser.add_argument("--status", action="store_true", help="현재 버전만 출력")
+    parser.add_argument("--target", type=int, help=f"이 버전까지만 적용 (기본: 최신 {LATEST_VERSION})")
+    parser.add_argument("--chunk-size", type=int, default=MIGRATION_CHUNK_ROWS, help="값 채우기 배치 크기(행)")
+    parser.add_argument("--pause", type=float, default=MIGRATION_CHUNK_PAUSE, help="배치 사이 쉬는 시간(초)")
+    args = parser.parse_args()
+
+    status = schema_status()
+    print(f"스키마 버전: {status['current']} (최신 {status['latest']})")
+    if args.status:
+        return
+    if args.dry_run:
+        print_plan(args.chunk_size, args.target)
+        return
+    applied = upgrade(target=args.target, chunk_size=args.chunk_size, pause=args.pause)
+    print(f"마이그레이션 완료: {len(applied)}개 적용, 현재 버전 {schema_status()['current']}")
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except Exception as e:
+        print(f"마이그레이션 실패: {e}")
+        sys.exit(1)
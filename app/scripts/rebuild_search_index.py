@@ -0,0 +1,17 @@
+from database import engine
+# database.py에서 DB 연결 객체(engine)를 가져온다
+import models
+# ORM 모델(posts, comments 테이블 정보)
+from search import rebuild_search_index
+# 검색 인덱스(search_index) 생성 + 전체 재색인 함수
+
+# 게시글/댓글 검색 인덱스 재생성
+# 검색 기능이 생기기 전에 만든 DB나, 인덱스가 어긋났을 때 한 번 실행
+# 이후 새 글/댓글은 트리거가 자동으로 색인함
+# 실행: python rebuild_search_index.py (app/scripts 폴더에서, database.py/models.py를 import 할 수 있는 환경)
+
+with engine.begin() as conn:
+    # 한 트랜잭션에서 비우고 다시 채우므로 중간에 실패하면 기존 인덱스가 그대로 남음
+    result = rebuild_search_index(conn)
+
+print(f"검색 인덱스 재생성 완료: 게시글 {result['posts']}개, 댓글 {result['comments']}개")
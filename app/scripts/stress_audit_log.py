@@ -0,0 +1,129 @@
+# 감사 로그 다중 워커 부하 테스트
+# uvicorn --workers N 처럼 여러 프로세스가 동시에 로그인/댓글 이벤트를 기록할 때
+# 이벤트가 빠지거나 두 번 저장되지 않는지, 엑셀 파일이 깨지지 않는지 확인한다
+#   - 프로세스마다 AuditLogWriter를 따로 만들고 (실제 워커와 같음) 여러 스레드에서 동시에 append
+#   - 큐를 작게 잡아서 spill(디스크 임시 저장) → 다른 프로세스와 경쟁하며 다시 저장(replay)하는 경로까지 실행
+#   - 그동안 다른 프로세스들이 같은 엑셀 파일을 계속 다시 내보냄 (잠금 + 원자적 교체)
+#
+# 실행: python stress_audit_log.py --workers 8 --events 2000 (app/scripts 폴더에서, audit_log.py를 import 할 수 있는 환경)
+# 실패하면 종료 코드 1
+
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+
+from audit_log import AuditLogStore, AuditLogWriter, replace_atomically
+# 실제 서버와 같은 감사 로그 저장소/기록기
+
+
+def fire_events(worker: int, db_path: str, events: int, threads: int, queue_size: int):
+    # 워커 프로세스 하나: threads개 스레드가 events개의 로그인/댓글 이벤트를 나눠서 기록
+    writer = AuditLogWriter(
+        AuditLogStore(db_path), batch_size=50, flush_interval=0.05, maxsize=queue_size, policy="spill",
+    )
+
+    def run(thread: int):
+        for i in range(thread, events, threads):
+            seq = f"{worker}-{i}"
+            if i % 2:
+                writer.append("Comments", worker, {"post_id": 1, "content": seq})
+            else:
+                writer.append("LoginHistory", worker, {"seq": seq})
+
+    pool = [threading.Thread(target=run, args=(t,)) for t in range(threads)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    writer.stop()
+    stats = writer.stats()
+    if stats["dropped"]:
+        print(f"워커 {worker}: {stats['dropped']}건 버려짐", file=sys.stderr)
+
+
+def export_loop(db_path: str, xlsx_path: str, stop_at: float):
+    # 이벤트가 쌓이는 동안 같은 엑셀 파일을 계속 다시 내보냄
+    from openpyxl import Workbook
+    store = AuditLogStore(db_path)
+
+    def write(path):
+        wb = Workbook(write_only=True)
+        for sheet in ("LoginHistory", "Comments"):
+            ws = wb.create_sheet(sheet)
+            for event_id, user_id, payload, created_at in store.iter_events(sheet):
+                ws.append([event_id, user_id, payload.get("seq") or payload.get("content"), created_at])
+        wb.save(path)
+
+    while time.monotonic() < stop_at:
+        replace_atomically(xlsx_path, write)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="감사 로그 다중 프로세스 부하 테스트")
+    parser.add_argument("--workers", type=int, default=8, help="동시에 기록할 프로세스 수")
+    parser.add_argument("--events", type=int, default=2000, help="프로세스마다 기록할 이벤트 수")
+    parser.add_argument("--threads", type=int, default=4, help="프로세스마다 이벤트를 보내는 스레드 수")
+    parser.add_argument("--queue-size", type=int, default=50, help="기록기 큐 크기 (작을수록 spill 경로를 많이 탐)")
+    parser.add_argument("--exporters", type=int, default=2, help="동시에 엑셀을 내보낼 프로세스 수")
+    args = parser.parse_args()
+
+    folder = tempfile.mkdtemp(prefix="stress_audit_")
+    db_path = os.path.join(folder, "audit_log.db")
+    xlsx_path = os.path.join(folder, "data_log.xlsx")
+    AuditLogStore(db_path).init()
+
+    started = time.perf_counter()
+    writers = [
+        multiprocessing.Process(target=fire_events, args=(w, db_path, args.events, args.threads, args.queue_size))
+        for w in range(args.workers)
+    ]
+    exporters = [
+        multiprocessing.Process(target=export_loop, args=(db_path, xlsx_path, time.monotonic() + 5))
+        for _ in range(args.exporters)
+    ]
+    for p in writers + exporters:
+        p.start()
+    for p in writers + exporters:
+        p.join()
+    # 마지막 replay 때 다른 프로세스가 잠금을 잡고 있어서 남은 spill 파일이 있으면 여기서 마저 저장
+    writer = AuditLogWriter(AuditLogStore(db_path))
+    writer.start()
+    writer.stop()
+    elapsed = time.perf_counter() - started
+
+    # 검증: 보낸 이벤트가 모두 정확히 한 번씩 저장되었는지
+    store = AuditLogStore(db_path)
+    seen = Counter()
+    ids = set()
+    for sheet, key in (("LoginHistory", "seq"), ("Comments", "content")):
+        for event_id, user_id, payload, created_at in store.iter_events(sheet):
+            seen[payload[key]] += 1
+            ids.add(event_id)
+    expected = {f"{w}-{i}" for w in range(args.workers) for i in range(args.events)}
+    missing = expected - set(seen)
+    duplicated = [seq for seq, count in seen.items() if count > 1]
+    leftovers = [name for name in os.listdir(folder) if ".spill.jsonl." in name and name.rsplit(".", 1)[-1].isdigit()]
+
+    from openpyxl import load_workbook
+    exported = load_workbook(xlsx_path, read_only=True)
+    # 마지막으로 내보낸 엑셀 파일이 정상적으로 열리는지 (교체 도중의 깨진 파일이 아닌지)
+    sheets = exported.sheetnames
+    exported.close()
+
+    total = args.workers * args.events
+    print(f"이벤트 {total}건, {args.workers}개 프로세스 × {args.threads}개 스레드, {elapsed:.2f}초")
+    print(f"저장됨: {sum(seen.values())}건 (고유 {len(seen)}건, id {len(ids)}개)")
+    print(f"누락: {len(missing)}건, 중복: {len(duplicated)}건, 남은 spill 파일: {len(leftovers)}개")
+    print(f"엑셀 파일: {xlsx_path} (시트: {', '.join(sheets)})")
+    ok = not missing and not duplicated and not leftovers and len(ids) == total
+    print("통과" if ok else "실패")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+# 목록 응답 직렬화 벤치마크
+# 게시글 1,000개를 JSON으로 만드는 비용을 경로별로 비교한다
+#   orm+pydantic(json)  : ORM 객체 → Pydantic 검증(from_attributes) → jsonable_encoder → 표준 json
+#   orm+pydantic        : ORM 객체 → Pydantic 검증(from_attributes) → Pydantic JSON (현재 FastAPI 기본 경로)
+#   rows+orjson         : 컬럼 tuple 조회 → dict → orjson (FAST_JSON_RESPONSES=true 경로)
+#
+# 실행: python benchmarks/bench_json_serialization.py --rows 1000 --repeat 20
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for sub in ("", "app/core", "app/database"):
+    sys.path.append(os.path.join(ROOT, sub))
+# 프로젝트 모듈(database, models, schemas, json_response)을 import 할 수 있도록 검색 경로 추가
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import Session
+
+import database, models, schemas, json_response
+
+POST_COLUMNS = [getattr(models.PostModel, name) for name in schemas.PostResponse.model_fields]
+# posts 라우터의 빠른 경로와 같은 컬럼 목록
+
+
+def seed(engine, rows):
+    models.Base.metadata.create_all(bind=engine)
+    start = datetime(2024, 1, 1)
+    with engine.begin() as conn:
+        conn.execute(insert(models.PostModel), [
+            {"title": f"제목 {i}", "content": "본문 " * 50, "create_date": start + timedelta(seconds=i),
+             "updated_at": start + timedelta(seconds=i), "owner_id": 1}
+            for i in range(rows)
+        ])
+
+
+def orm_pydantic_json(session, rows):
+    posts = session.scalars(select(models.PostModel).limit(rows)).all()
+    started = time.perf_counter()
+    page = schemas.PostPage.model_validate({"items": posts, "next_cursor": None}, from_attributes=True)
+    body = json.dumps(jsonable_encoder(page), ensure_ascii=False, separators=(",", ":")).encode()
+    return body, started
+
+
+def orm_pydantic(session, rows):
+    posts = session.scalars(select(models.PostModel).limit(rows)).all()
+    started = time.perf_counter()
+    page = schemas.PostPage.model_validate({"items": posts, "next_cursor": None}, from_attributes=True)
+    body = page.__pydantic_serializer__.to_json(page)
+    return body, started
+
+
+def rows_orjson(session, rows):
+    result = session.execute(select(*POST_COLUMNS).limit(rows)).all()
+    started = time.perf_counter()
+    body = json_response.dumps({"items": [row._asdict() for row in result], "next_cursor": None})
+    return body, started
+
+
+PATHS = {
+    "orm+pydantic(json)": orm_pydantic_json,
+    "orm+pydantic": orm_pydantic,
+    "rows+orjson": rows_orjson,
+}
+
+
+def run_path(engine, fn, args):
+    totals, serialize = [], []
+    for _ in range(args.repeat):
+        with Session(engine) as session:
+            began = time.perf_counter()
+            body, started = fn(session, args.rows)
+            finished = time.perf_counter()
+        totals.append(finished - began)
+        serialize.append(finished - started)
+    return {
+        "total_ms": round(statistics.median(totals) * 1000, 2),        # 조회 + 객체 생성 + 직렬화
+        "serialize_ms": round(statistics.median(serialize) * 1000, 2),  # 검증 + 직렬화만
+        "bytes": len(body),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="게시글 목록 직렬화 경로별 비용 비교")
+    parser.add_argument("--rows", type=int, default=1000, help="한 번에 직렬화할 게시글 수")
+    parser.add_argument("--repeat", type=int, default=20, help="경로별 반복 횟수 (중앙값 사용)")
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(prefix="bench_json_"), "bench.db")
+    url = f"sqlite:///{path}"
+    engine = create_engine(url, **database._engine_options(url))
+    seed(engine, args.rows)
+
+    print(f"orjson: {'사용' if json_response.orjson is not None else '없음 (표준 json으로 대체)'}")
+    print(f"{'path':<20} {'total(ms)':>10} {'serialize(ms)':>14} {'bytes':>9}   (게시글 {args.rows}개 기준)")
+    for name, fn in PATHS.items():
+        r = run_path(engine, fn, args)
+        print(f"{name:<20} {r['total_ms']:>10} {r['serialize_ms']:>14} {r['bytes']:>9}")
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+# 단위 작업 마이크로 벤치마크
+#   audit     loge_excel.add_comment / save_login_history (감사 로그 append)
+#             감사 로그 DB에 이미 1k/10k/100k 행이 있을 때 호출 지연 시간(요청 스레드가 기다리는 시간)과
+#             큐에 쌓인 이벤트를 모두 저장하는 데 걸린 시간
+#   password  utils.hash_password / verify_password (bcrypt, PASSWORD_HASH_ROUNDS 적용)
+# 결과는 표로 출력하고 --json으로 저장 (bench_routes.py 결과와 함께 기준 파일로 보관)
+#
+# 실행: python benchmarks/bench_micro.py --sizes 1000,10000,100000 --appends 2000 --hashes 10
+#       PASSWORD_HASH_ROUNDS=10 python benchmarks/bench_micro.py --only password
+
+import argparse
+import contextlib
+import io
+import json
+import math
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for sub in ("", "app/core", "app/database"):
+    sys.path.append(os.path.join(ROOT, sub))
+# 프로젝트 모듈(loge_excel, audit_log, utils)을 import 할 수 있도록 검색 경로 추가
+
+os.chdir(tempfile.mkdtemp(prefix="bench_micro_"))
+os.environ["AUDIT_EXCEL_PATH"] = os.path.join(os.getcwd(), "data_log.xlsx")
+os.environ["AUDIT_DB_PATH"] = os.path.join(os.getcwd(), "audit_log.db")
+# loge_excel의 기본 감사 로그 DB가 실제 파일을 건드리지 않도록 임시 폴더에서 실행
+
+import loge_excel
+from audit_log import AuditLogStore, AuditLogWriter
+from config import AUDIT_BATCH_SIZE, PASSWORD_HASH_ROUNDS
+import utils
+
+
+def summarize(samples):
+    # 초 단위 측정값 → 밀리초 통계
+    samples = sorted(samples)
+    return {
+        "p50_ms": round(statistics.median(samples) * 1000, 4),
+        "p99_ms": round(samples[max(0, math.ceil(len(samples) * 0.99) - 1)] * 1000, 4),  # 최근접 순위(nearest-rank)
+        "mean_ms": round(statistics.fmean(samples) * 1000, 4),
+    }
+
+
+def prefill(store, rows):
+    # 감사 로그 DB에 rows개(로그인/댓글 반씩) 미리 저장
+    store.init()
+    start = datetime(2024, 1, 1)
+    for chunk in range(0, rows, 10000):
+        store.append_many([
+            ("Comments" if i % 2 else "LoginHistory", i % 500 + 1,
+             {"post_id": i % 1000 + 1, "content": f"댓글 {i}"} if i % 2 else {}, start + timedelta(seconds=i))
+            for i in range(chunk, min(chunk + 10000, rows))
+        ])
+
+
+def bench_audit(rows, appends):
+    # 기존 행 rows개인 감사 로그에 appends번 기록 (실제 라우터가 부르는 loge_excel 함수 그대로)
+    store = AuditLogStore(os.path.join(tempfile.mkdtemp(prefix="audit_"), "audit_log.db"))
+    prefill(store, rows)
+    writer = AuditLogWriter(store, batch_size=AUDIT_BATCH_SIZE, maxsize=appends + 1)
+    loge_excel.audit_writer = writer  # 모듈 전역 기록기를 이 크기의 저장소로 교체
+    writer.start()
+
+    latencies = []
+    with contextlib.redirect_stdout(io.StringIO()):  # 함수마다 찍는 완료 메시지는 버림
+        started = time.perf_counter()
+        for i in range(appends):
+            t = time.perf_counter()
+            if i % 2:
+                loge_excel.add_comment(i % 1000 + 1, i % 500 + 1, f"벤치마크 댓글 {i}")
+            else:
+                loge_excel.save_login_history(i % 500 + 1)
+            latencies.append(time.perf_counter() - t)
+        appended = time.perf_counter()
+        writer.stop()  # 큐에 남은 이벤트를 모두 저장할 때까지 대기
+        drained = time.perf_counter() - started
+
+    stats = writer.stats()
+    return {
+        "existing_rows": rows,
+        "appends": appends,
+        **summarize(latencies),
+        "append_total_s": round(appended - started, 4),
+        "drain_total_s": round(drained, 4),
+        "events_per_s": round(appends / drained, 1),
+        "flushes": stats["flushes"],
+        "dropped": stats["dropped"],
+    }
+
+
+def bench_password(count):
+    # bcrypt 해싱/검증 count번
+    hashed, hash_times, verify_times = None, [], []
+    for _ in range(count):
+        t = time.perf_counter()
+        hashed = utils.hash_password("bench-password")
+        hash_times.append(time.perf_counter() - t)
+    for _ in range(count):
+        t = time.perf_counter()
+        utils.verify_password("bench-password", hashed)
+        verify_times.append(time.perf_counter() - t)
+    return {
+        "rounds": PASSWORD_HASH_ROUNDS,
+        "count": count,
+        "hash": summarize(hash_times),
+        "verify": summarize(verify_times),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="감사 로그 append / bcrypt 마이크로 벤치마크")
+    parser.add_argument("--sizes", default="1000,10000,100000", help="감사 로그에 미리 넣어둘 행 수 (쉼표로 구분)")
+    parser.add_argument("--appends", type=int, default=2000, help="크기별 append 횟수")
+    parser.add_argument("--hashes", type=int, default=10, help="해싱/검증 반복 횟수")
+    parser.add_argument("--only", choices=["audit", "password"], help="한 종류만 실행")
+    parser.add_argument("--json", dest="json_path", help="결과를 저장할 JSON 파일")
+    args = parser.parse_args()
+
+    result = {"meta": {"python": sys.version.split()[0], "created_at": datetime.now().isoformat(timespec="seconds")}}
+    if args.only in (None, "audit"):
+        result["audit"] = []
+        print(f"{'rows':>8} {'appends':>8} {'p50(ms)':>9} {'p99(ms)':>9} {'append(s)':>10} {'drain(s)':>9} {'events/s':>10} {'flushes':>8}")
+        for rows in (int(size) for size in args.sizes.split(",")):
+            r = bench_audit(rows, args.appends)
+            result["audit"].append(r)
+            print(f"{r['existing_rows']:>8} {r['appends']:>8} {r['p50_ms']:>9} {r['p99_ms']:>9} {r['append_total_s']:>10} {r['drain_total_s']:>9} {r['events_per_s']:>10} {r['flushes']:>8}")
+    if args.only in (None, "password"):
+        r = result["password"] = bench_password(args.hashes)
+        print(f"\nbcrypt rounds={r['rounds']} ({r['count']}회)")
+        print(f"  hash_password   p50 {r['hash']['p50_ms']}ms, p99 {r['hash']['p99_ms']}ms")
+        print(f"  verify_password p50 {r['verify']['p50_ms']}ms, p99 {r['verify']['p99_ms']}ms")
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,240 @@
+# 라우터 부하 테스트
+# 사용자/게시글/댓글을 원하는 양만큼 DB에 넣고, 앱을 프로세스 안의 ASGI 클라이언트로 고정 동시성으로 호출한다
+#   login           POST /users/login            (users.login)
+#   get_posts       GET  /posts/?limit=20        (posts.get_posts)
+#   get_post        GET  /posts/{id}             (posts.get_post)
+#   create_comment  POST /comments/              (comments.create_comment)
+#   read_comments   GET  /comments/{post_id}     (comments.read_comments)
+# 시나리오별 p50/p95/p99 지연 시간, 처리량(요청/초), 요청당 SQL 수를 출력하고
+# --json으로 결과를 저장, --baseline으로 이전 결과와 비교한다 (기준보다 느려지면 종료 코드 1)
+#
+# 실행: python benchmarks/bench_routes.py --users 1000 --posts 20000 --comments 100000 --concurrency 16 --requests 500
+#       python benchmarks/bench_routes.py --json result.json --baseline baseline.json
+# --db를 지정하지 않으면 임시 폴더의 새 DB 사용 (--db myapi.db 처럼 기존 DB를 쓰면 데이터가 추가됨)
+# DB_MODE=async 로 실행하면 비동기 세션 경로를 측정
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for sub in ("", "app/core", "app/database", "app/api"):
+    sys.path.append(os.path.join(ROOT, sub))
+# 프로젝트 모듈(database, models, 라우터)을 import 할 수 있도록 검색 경로 추가
+
+SCENARIOS = ["login", "get_posts", "get_post", "create_comment", "read_comments"]
+PASSWORD = "bench-password"
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="라우터별 지연 시간/처리량/요청당 SQL 수 측정")
+    parser.add_argument("--db", help="사용할 SQLite 파일 (생략하면 임시 DB)")
+    parser.add_argument("--users", type=int, default=200, help="넣어둘 사용자 수")
+    parser.add_argument("--posts", type=int, default=5000, help="넣어둘 게시글 수")
+    parser.add_argument("--comments", type=int, default=20000, help="넣어둘 댓글 수")
+    parser.add_argument("--concurrency", type=int, default=16, help="동시에 보내는 요청 수")
+    parser.add_argument("--requests", type=int, default=300, help="시나리오별 요청 수")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="실행할 시나리오 (쉼표로 구분)")
+    parser.add_argument("--seed", type=int, default=42, help="난수 시드 (같은 값이면 같은 id 순서로 요청)")
+    parser.add_argument("--json", dest="json_path", help="결과를 저장할 JSON 파일")
+    parser.add_argument("--baseline", help="비교할 이전 결과 JSON 파일")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="기준 대비 허용 범위 (0.15 → p95 15%% 증가/처리량 15%% 감소까지 허용)")
+    return parser.parse_args()
+
+
+args = parse_args()
+workdir = tempfile.mkdtemp(prefix="bench_routes_")
+db_path = os.path.abspath(args.db) if args.db else os.path.join(workdir, "myapi.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+os.environ.setdefault("DATABASE_REPLICA_URLS", "")
+os.environ.setdefault("SLOW_REQUEST_SECONDS", "60")  # 동시성 때문에 느려진 요청마다 SQL 목록이 찍히지 않도록
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")  # 같은 IP/계정으로 계속 로그인/댓글 작성하므로 429가 나지 않도록
+os.environ["AUDIT_EXCEL_PATH"] = os.path.join(workdir, "data_log.xlsx")
+os.environ["AUDIT_DB_PATH"] = os.path.join(workdir, "audit_log.db")
+os.chdir(workdir)
+# database.py를 import 하기 전에 DB 주소 지정, 감사 로그 파일 등은 임시 폴더에 생성
+
+import httpx
+from fastapi import FastAPI
+from sqlalchemy import event, func, insert, select
+
+import database, models, utils
+import users, posts, comments
+from metrics import MetricsMiddleware
+
+
+def seed():
+    # 지정한 양이 될 때까지 사용자/게시글/댓글 추가 (이미 있으면 모자란 만큼만)
+    database.Base.metadata.create_all(bind=database.engine)
+    hashed = utils.hash_password(PASSWORD)  # 모든 사용자가 같은 비밀번호 (해싱은 한 번만)
+    start = datetime(2024, 1, 1)
+    with database.engine.begin() as conn:
+        have_users = conn.scalar(select(func.count()).select_from(models.User))
+        if have_users < args.users:
+            conn.execute(insert(models.User), [
+                {"username": f"bench{i}", "email": f"bench{i}@example.com", "hashed_password": hashed}
+                for i in range(have_users, args.users)
+            ])
+        user_ids = list(conn.scalars(select(models.User.id).where(models.User.email.like("bench%@example.com"))))
+        have_posts = conn.scalar(select(func.count()).select_from(models.PostModel))
+        for chunk in range(have_posts, args.posts, 10000):
+            conn.execute(insert(models.PostModel), [
+                {"title": f"벤치마크 게시글 {i}", "content": "본문 " * 100, "owner_id": user_ids[i % len(user_ids)],
+                 "create_date": start + timedelta(seconds=i), "updated_at": start + timedelta(seconds=i)}
+                for i in range(chunk, min(chunk + 10000, args.posts))
+            ])
+        post_ids = list(conn.scalars(select(models.PostModel.id)))
+        have_comments = conn.scalar(select(func.count()).select_from(models.Comment))
+        for chunk in range(have_comments, args.comments, 10000):
+            conn.execute(insert(models.Comment), [
+                {"post_id": post_ids[i % len(post_ids)], "user_id": user_ids[i % len(user_ids)],
+                 "content": f"벤치마크 댓글 {i}", "create_date": start + timedelta(seconds=i)}
+                for i in range(chunk, min(chunk + 10000, args.comments))
+            ])
+        conn.exec_driver_sql(
+            "UPDATE posts SET comment_count = (SELECT count(*) FROM comments WHERE comments.post_id = posts.id)"
+        )
+    return user_ids, post_ids
+
+
+def build_app():
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware)  # 실제 서버와 같은 미들웨어 구성
+    for module in (users, posts, comments):
+        app.include_router(module.router)
+    return app
+
+
+statement_count = 0
+
+
+def count_statements(*_):
+    global statement_count
+    statement_count += 1
+
+
+def make_requests(name, rng, user_ids, post_ids):
+    # 시나리오별 요청 목록 (method, url, 요청 옵션) — 미리 만들어두고 측정 중에는 보내기만 함
+    n = args.requests
+    if name == "login":
+        return [("POST", "/users/login", {"data": {"email": f"bench{rng.randrange(len(user_ids))}@example.com", "password": PASSWORD}}) for _ in range(n)]
+    if name == "get_posts":
+        return [("GET", "/posts/", {"params": {"limit": 20}}) for _ in range(n)]
+    if name == "get_post":
+        return [("GET", f"/posts/{rng.choice(post_ids)}", {}) for _ in range(n)]
+    if name == "create_comment":
+        return [("POST", "/comments/", {"json": {"post_id": rng.choice(post_ids), "user_id": rng.choice(user_ids), "content": "부하 테스트 댓글"}}) for _ in range(n)]
+    if name == "read_comments":
+        return [("GET", f"/comments/{rng.choice(post_ids)}", {"params": {"limit": 50}}) for _ in range(n)]
+    raise SystemExit(f"알 수 없는 시나리오: {name}")
+
+
+def percentile(sorted_values, q):
+    # 최근접 순위(nearest-rank) 방식 백분위수
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, int(round(q / 100 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+async def run_scenario(client, requests):
+    # requests를 동시성 args.concurrency로 모두 보내고 요청별 지연 시간 측정
+    global statement_count
+    latencies, errors = [], 0
+    queue = iter(requests)
+
+    async def worker():
+        nonlocal errors
+        for method, url, options in queue:
+            started = time.perf_counter()
+            response = await client.request(method, url, **options)
+            latencies.append(time.perf_counter() - started)
+            if response.status_code >= 400:
+                errors += 1
+
+    statement_count = 0
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 2),
+        "queries_per_request": round(statement_count / len(latencies), 2),
+    }
+
+
+def compare(result, baseline):
+    # 기준 결과와 비교 → p95가 tolerance 이상 늘었거나 처리량이 tolerance 이상 줄면 회귀
+    regressions = []
+    print(f"\n기준 대비 ({args.baseline}, 허용 {args.tolerance:.0%})")
+    print(f"{'scenario':<16} {'p95 변화':>10} {'rps 변화':>10} {'SQL/req':>12}")
+    for name, now in result["scenarios"].items():
+        base = baseline.get("scenarios", {}).get(name)
+        if not base:
+            print(f"{name:<16} {'(기준 없음)':>10}")
+            continue
+        p95_change = now["p95_ms"] / base["p95_ms"] - 1 if base["p95_ms"] else 0.0
+        rps_change = now["rps"] / base["rps"] - 1 if base["rps"] else 0.0
+        queries = f"{base['queries_per_request']}→{now['queries_per_request']}"
+        bad = p95_change > args.tolerance or rps_change < -args.tolerance or now["queries_per_request"] > base["queries_per_request"]
+        print(f"{name:<16} {p95_change:>+10.1%} {rps_change:>+10.1%} {queries:>12}{'  ← 회귀' if bad else ''}")
+        if bad:
+            regressions.append(name)
+    return regressions
+
+
+async def main():
+    user_ids, post_ids = seed()
+    engines = [database.engine] + ([database.async_engine.sync_engine] if database.async_engine is not None else [])
+    for engine in engines:
+        event.listen(engine, "before_cursor_execute", count_statements)
+    rng = random.Random(args.seed)
+    result = {
+        "meta": {
+            "db_mode": database.DB_MODE, "users": len(user_ids), "posts": len(post_ids), "comments": args.comments,
+            "concurrency": args.concurrency, "python": platform.python_version(),
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+        },
+        "scenarios": {},
+    }
+    transport = httpx.ASGITransport(app=build_app())
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        print(f"DB: {db_path} (사용자 {len(user_ids)}, 게시글 {len(post_ids)}), DB_MODE={database.DB_MODE}, 동시성 {args.concurrency}")
+        print(f"{'scenario':<16} {'req':>6} {'err':>5} {'rps':>9} {'p50(ms)':>9} {'p95(ms)':>9} {'p99(ms)':>9} {'SQL/req':>8}")
+        for name in args.scenarios.split(","):
+            requests = make_requests(name, rng, user_ids, post_ids)
+            with contextlib.redirect_stdout(io.StringIO()):  # 라우터가 요청마다 찍는 메시지는 버림
+                await run_scenario(client, requests[: args.concurrency])  # 준비 운동 (커넥션 풀, 캐시)
+                r = await run_scenario(client, requests)
+            result["scenarios"][name] = r
+            print(f"{name:<16} {r['requests']:>6} {r['errors']:>5} {r['rps']:>9} {r['p50_ms']:>9} {r['p95_ms']:>9} {r['p99_ms']:>9} {r['queries_per_request']:>8}")
+    await database.dispose_engines()
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(result, json.load(f))
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
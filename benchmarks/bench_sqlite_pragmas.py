@@ -0,0 +1,153 @@
+# SQLite PRAGMA 프로필 벤치마크
+# 쓰기(댓글 작성)가 계속 일어나는 동안 읽기(게시글 목록 조회) 처리량이 얼마나 나오는지
+# 기존 설정(rollback journal)과 튜닝 프로필(WAL 등)을 비교한다
+#
+# 실행: python benchmarks/bench_sqlite_pragmas.py --seconds 5 --readers 4 --writers 2
+
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for sub in ("", "app/core", "app/database"):
+    sys.path.append(os.path.join(ROOT, sub))
+# 프로젝트 모듈(database, models)을 import 할 수 있도록 검색 경로 추가
+
+from sqlalchemy import create_engine, event, insert, select, update, tuple_
+from sqlalchemy.exc import OperationalError
+
+import database, models
+
+PROFILES = {
+    # 기존 엔진: PRAGMA 없이 sqlite3 기본값 (rollback journal, synchronous=FULL, timeout 5초)
+    "before": {"journal_mode": "DELETE", "synchronous": "FULL"},
+    # 현재 설정된 튜닝 프로필
+    "after": database.SQLITE_PRAGMAS,
+}
+
+
+def build_engine(path, pragmas):
+    url = f"sqlite:///{path}"
+    engine = create_engine(url, **database._engine_options(url))
+
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        database.apply_sqlite_pragmas(dbapi_connection, pragmas)
+
+    return engine
+
+
+def seed(engine, rows):
+    # 작성자 1명 + 게시글 rows개 생성 (foreign_keys=ON 프로필에서도 owner_id/user_id가 유효하도록)
+    models.Base.metadata.create_all(bind=engine)
+    start = datetime(2024, 1, 1)
+    with engine.begin() as conn:
+        conn.execute(insert(models.User).values(id=1, username="bench", email="bench@example.com", hashed_password="-"))
+        conn.execute(insert(models.PostModel), [
+            {"title": f"제목 {i}", "content": "본문 " * 50, "create_date": start + timedelta(seconds=i), "owner_id": 1}
+            for i in range(rows)
+        ])
+
+
+def run_profile(name, pragmas, args):
+    path = os.path.join(tempfile.mkdtemp(prefix="bench_sqlite_"), "bench.db")
+    engine = build_engine(path, pragmas)
+    seed(engine, args.rows)
+
+    stop = threading.Event()
+    counts = {"reads": 0, "writes": 0, "read_errors": 0, "write_errors": 0}
+    read_latencies = []
+    lock = threading.Lock()
+
+    def reader():
+        # 게시글 목록 첫 페이지 + 다음 페이지를 반복 조회 (GET /posts/ 와 같은 쿼리)
+        while not stop.is_set():
+            started = time.perf_counter()
+            try:
+                with engine.connect() as conn:
+                    rows = conn.execute(
+                        select(models.PostModel.id, models.PostModel.create_date)
+                        .order_by(models.PostModel.create_date.desc(), models.PostModel.id.desc())
+                        .limit(20)
+                    ).all()
+                    last = rows[-1]
+                    conn.execute(
+                        select(models.PostModel)
+                        .where(tuple_(models.PostModel.create_date, models.PostModel.id) < (last.create_date, last.id))
+                        .order_by(models.PostModel.create_date.desc(), models.PostModel.id.desc())
+                        .limit(20)
+                    ).all()
+            except OperationalError:
+                with lock:
+                    counts["read_errors"] += 1
+                continue
+            elapsed = time.perf_counter() - started
+            with lock:
+                counts["reads"] += 1
+                read_latencies.append(elapsed)
+
+    def writer(worker_id):
+        # 댓글 작성 + 게시글 댓글 수 증가를 한 트랜잭션으로 반복 (POST /comments/ 와 같은 쓰기)
+        i = 0
+        while not stop.is_set():
+            post_id = (worker_id * 7919 + i) % args.rows + 1
+            i += 1
+            try:
+                with engine.begin() as conn:
+                    conn.execute(insert(models.Comment).values(
+                        post_id=post_id, user_id=1, content="벤치마크 댓글", create_date=datetime.utcnow()
+                    ))
+                    conn.execute(
+                        update(models.PostModel)
+                        .where(models.PostModel.id == post_id)
+                        .values(comment_count=models.PostModel.comment_count + 1)
+                    )
+            except OperationalError:
+                with lock:
+                    counts["write_errors"] += 1
+                continue
+            with lock:
+                counts["writes"] += 1
+
+    threads = [threading.Thread(target=reader) for _ in range(args.readers)]
+    threads += [threading.Thread(target=writer, args=(w,)) for w in range(args.writers)]
+    for t in threads:
+        t.start()
+    time.sleep(args.seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+    engine.dispose()
+
+    read_latencies.sort()
+    p95 = read_latencies[int(len(read_latencies) * 0.95)] if read_latencies else 0.0
+    return {
+        "profile": name,
+        "reads_per_sec": round(counts["reads"] / args.seconds, 1),
+        "writes_per_sec": round(counts["writes"] / args.seconds, 1),
+        "read_p95_ms": round(p95 * 1000, 2),
+        "read_errors": counts["read_errors"],
+        "write_errors": counts["write_errors"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SQLite PRAGMA 프로필 전/후 동시 읽기·쓰기 벤치마크")
+    parser.add_argument("--rows", type=int, default=20000, help="미리 넣어둘 게시글 수")
+    parser.add_argument("--seconds", type=float, default=5.0, help="프로필당 측정 시간(초)")
+    parser.add_argument("--readers", type=int, default=4, help="읽기 스레드 수")
+    parser.add_argument("--writers", type=int, default=2, help="쓰기 스레드 수")
+    args = parser.parse_args()
+
+    print(f"{'profile':<8} {'reads/s':>10} {'writes/s':>10} {'read p95(ms)':>13} {'read err':>9} {'write err':>10}")
+    for name, pragmas in PROFILES.items():
+        r = run_profile(name, pragmas, args)
+        print(f"{r['profile']:<8} {r['reads_per_sec']:>10} {r['writes_per_sec']:>10} {r['read_p95_ms']:>13} {r['read_errors']:>9} {r['write_errors']:>10}")
+
+
+if __name__ == "__main__":
+    main()
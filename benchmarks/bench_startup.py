@@ -0,0 +1,152 @@
+# 서버 시작 시간 벤치마크
+# 매번 새 파이썬 프로세스에서 (import 캐시 없이 워커가 새로 뜨는 것과 같은 상황)
+#   import     main.py import 시간 (모듈 로딩, 라우터/미들웨어 등록)
+#   startup    lifespan 시작 시간 (감사 로그/로그인 기록 스레드, DB 설정 확인)
+#   first      첫 요청(GET /posts/) 지연 시간 (커넥션 풀, SQL 컴파일 캐시가 비어 있음)
+#   second     두 번째 요청 지연 시간 (비교용)
+# 를 측정해서 중앙값/최댓값을 출력하고 --json으로 저장, --baseline으로 이전 결과와 비교한다
+# --importtime을 주면 python -X importtime 결과에서 가장 오래 걸린 모듈을 함께 출력
+#
+# 실행: python benchmarks/bench_startup.py --runs 10
+#       python benchmarks/bench_startup.py --json startup.json --baseline startup_baseline.json
+#       python benchmarks/bench_startup.py --runs 1 --importtime
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = r"""
+import json, sys, time
+started = time.perf_counter()
+sys.path.insert(0, ROOT)
+import main
+imported = time.perf_counter()
+from fastapi.testclient import TestClient
+client = TestClient(main.app)
+before_startup = time.perf_counter()
+client.__enter__()  # lifespan 시작
+started_up = time.perf_counter()
+client.get("/posts/")
+first = time.perf_counter()
+client.get("/posts/")
+second = time.perf_counter()
+client.__exit__(None, None, None)
+print(json.dumps({
+    "import_ms": (imported - started) * 1000,
+    "startup_ms": (started_up - before_startup) * 1000,
+    "first_request_ms": (first - started_up) * 1000,
+    "second_request_ms": (second - first) * 1000,
+    "modules": len(sys.modules),
+    "heavy_modules": [name for name in ("pandas", "openpyxl") if name in sys.modules],
+}))
+"""
+METRICS = ["import_ms", "startup_ms", "first_request_ms", "second_request_ms"]
+
+
+def prepare_workdir():
+    # main.py는 현재 폴더 기준으로 templates/static, myapi.db, 감사 로그 파일을 사용 → 임시 폴더에 준비
+    workdir = tempfile.mkdtemp(prefix="bench_startup_")
+    for folder in ("templates", "static"):
+        shutil.copytree(os.path.join(ROOT, folder), os.path.join(workdir, folder))
+    return workdir
+
+
+def run_child(workdir, env, importtime=False):
+    command = [sys.executable] + (["-X", "importtime"] if importtime else []) + ["-c", f"ROOT = {ROOT!r}\n" + CHILD]
+    done = subprocess.run(command, cwd=workdir, env=env, capture_output=True, text=True)
+    if done.returncode != 0:
+        sys.exit(f"자식 프로세스 실패:\n{done.stderr[-3000:]}")
+    return json.loads(done.stdout.strip().splitlines()[-1]), done.stderr
+
+
+def slowest_imports(stderr, top):
+    # "import time: self [us] | cumulative | imported package" 형식에서
+    # 최상위 모듈과 그 모듈이 직접 import 한 모듈(main.py가 불러오는 fastapi, sqlalchemy, 라우터 등)만 누적 시간순으로
+    # (하위 모듈은 깊이마다 이름 앞에 공백 2칸이 붙음)
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        name = name[1:]
+        depth = (len(name) - len(name.lstrip())) // 2
+        if depth <= 1:
+            rows.append((int(cumulative_us), name.strip()))
+    return sorted(rows, reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="main.py import / lifespan 시작 / 첫 요청 지연 시간 측정")
+    parser.add_argument("--runs", type=int, default=5, help="측정 횟수 (매번 새 프로세스)")
+    parser.add_argument("--importtime", action="store_true", help="오래 걸린 import 상위 모듈 출력")
+    parser.add_argument("--top", type=int, default=15, help="--importtime 때 출력할 모듈 수")
+    parser.add_argument("--json", dest="json_path", help="결과를 저장할 JSON 파일")
+    parser.add_argument("--baseline", help="비교할 이전 결과 JSON 파일")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="기준 대비 허용 증가율 (0.2 → 20%%)")
+    args = parser.parse_args()
+
+    workdir = prepare_workdir()
+    env = dict(
+        os.environ,
+        DATABASE_URL=f"sqlite:///{os.path.join(workdir, 'myapi.db')}",
+        DATABASE_REPLICA_URLS="",
+        AUDIT_EXCEL_PATH=os.path.join(workdir, "data_log.xlsx"),
+        AUDIT_DB_PATH=os.path.join(workdir, "audit_log.db"),
+    )
+    env.pop("PYTHONPATH", None)  # main.py가 스스로 잡는 모듈 경로만으로 import 되는지도 함께 확인
+
+    # 준비: 테이블 생성 + .pyc 캐시 생성 (측정에서 제외)
+    run_child(workdir, dict(env, MIGRATE_ON_STARTUP="true"))
+    samples = [run_child(workdir, env)[0] for _ in range(args.runs)]
+
+    summary = {}
+    print(f"{'metric':<18} {'median(ms)':>11} {'max(ms)':>9}")
+    for metric in METRICS:
+        values = [sample[metric] for sample in samples]
+        summary[metric] = {"median": round(statistics.median(values), 2), "max": round(max(values), 2)}
+        print(f"{metric:<18} {summary[metric]['median']:>11} {summary[metric]['max']:>9}")
+    heavy = samples[-1]["heavy_modules"]
+    print(f"로드된 모듈 {samples[-1]['modules']}개, 무거운 모듈: {', '.join(heavy) or '없음'}")
+
+    if args.importtime:
+        _, stderr = run_child(workdir, env, importtime=True)
+        print(f"\n오래 걸린 import (누적, 상위 {args.top}개)")
+        for us, name in slowest_imports(stderr, args.top):
+            print(f"  {us / 1000:>9.1f}ms  {name}")
+
+    result = {
+        "meta": {"runs": args.runs, "python": sys.version.split()[0], "created_at": datetime.now().isoformat(timespec="seconds")},
+        "summary": summary,
+        "modules": samples[-1]["modules"],
+        "heavy_modules": heavy,
+    }
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = []
+        print(f"\n기준 대비 ({args.baseline}, 허용 {args.tolerance:.0%})")
+        for metric in METRICS:
+            base = baseline["summary"].get(metric, {}).get("median")
+            if not base:
+                continue
+            change = summary[metric]["median"] / base - 1
+            print(f"{metric:<18} {base:>9} → {summary[metric]['median']:<9} {change:>+7.1%}{'  ← 회귀' if change > args.tolerance else ''}")
+            if change > args.tolerance:
+                regressions.append(metric)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
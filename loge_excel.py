@@ -1,154 +1,214 @@
-import pandas as pd  
-# → pandas 라이브러리를 불러옴. 엑셀 파일을 읽고(DataFrame으로) 쓰는 기능에 사용
-from openpyxl import load_workbook  
-# → openpyxl은 엑셀 파일의 시트(워크북)를 직접 다루는 라이브러리임.
-#   특히 시트가 존재하는지 확인할 때 pandas보다 빠르고 안정적이라 사용
-from datetime import datetime  
-# → 현재 날짜와 시간을 기록하기 위해 datetime 모듈의 datetime 클래스 사용
-import os  
+import atexit
+# → 프로그램 종료 시 큐에 남은 감사 로그를 마저 저장하기 위해 사용
+import os
 # → 파일 경로를 다루기 위해 필요한 기본 OS 관련 모듈
-import os  
-# → 중복 import지만 문제 없음 (코드 실행에는 영향 X)
-from app.core.utils import hash_password, verify_password
-
-EXCEL_PATH = "C:\\pro\\data_log.xlsx" 
-# → 현재 파이썬 파일(loge_excel.py)이 위치한 폴더 경로에 "data_log.xlsx"를 붙임
-#   즉, 항상 같은 폴더 안에 있는 엑셀 파일을 자동으로 찾거나 생성하게 됨
-# 1. 엑셀 초기화
-def init_excel():  
-    # → 프로그램 시작 시 실행됨. 
-    #   엑셀 파일이 없으면 자동 생성하고, 시트(Users, LoginHistory, Comments)가 없으면 만들어줌
-
-    if not os.path.exists(EXCEL_PATH):  
-        # → data_log.xlsx 파일이 존재하지 않으면 새로 만든다
-        with pd.ExcelWriter(EXCEL_PATH) as writer:  
-            # → 새 엑셀 파일 생성 (pandas의 ExcelWriter 사용)
-            pd.DataFrame(columns=["id", "username", "email", "password", "created_at"]).to_excel(writer, sheet_name="Users", index=False)  
-            # → Users 시트 생성: 회원 정보(id, 이름, 이메일, 비밀번호, 가입일)
-            pd.DataFrame(columns=["id", "user_id", "login_time"]).to_excel(writer, sheet_name="LoginHistory", index=False)  
-            # → LoginHistory 시트 생성: 로그인 기록(id, 사용자id, 로그인 시간)
-            pd.DataFrame(columns=["id", "post_id", "user_id", "content", "create_date"]).to_excel(writer, sheet_name="Comments", index=False)  
-            # → Comments 시트 생성: 댓글 기록(id, 게시글id, 작성자id, 내용, 작성일)
-    wb = load_workbook(EXCEL_PATH)  
-    # → 이미 존재하는 엑셀 파일을 열어서 시트 이름을 확인함
-    sheets = wb.sheetnames  
-    # → 현재 엑셀 파일에 들어있는 시트들의 이름 목록을 가져옴
-    wb.close()  
-    # → 엑셀 파일 닫기 (다른 함수에서 다시 열 수 있도록)
-    if "Users" not in sheets:  
-        # → Users 시트가 없으면 새로 생성
-        pd.DataFrame(columns=["id", "username", "email", "password", "created_at"]).to_excel(EXCEL_PATH, sheet_name="Users", index=False)
-    if "LoginHistory" not in sheets:  
-        # → LoginHistory 시트가 없으면 새로 생성
-        pd.DataFrame(columns=["id", "user_id", "login_time"]).to_excel(EXCEL_PATH, sheet_name="LoginHistory", index=False)
-    if "Comments" not in sheets:  
-        # → Comments 시트가 없으면 새로 생성
-        pd.DataFrame(columns=["id", "post_id", "user_id", "content", "create_date"]).to_excel(EXCEL_PATH, sheet_name="Comments", index=False)
-    print("엑셀 시트 업데이트 완료")  
-    # → 시트 확인 및 생성이 끝나면 콘솔에 메시지 출력
+import threading
+# → 처음 한 번만 초기화하도록 잠금 사용
+from datetime import datetime
+# → 예전 엑셀의 날짜 문자열 변환
+from utils import verify_password
+from audit_log import AuditLogStore, AuditLogWriter, replace_atomically
+# → 감사 로그 저장소(append-only SQLite 테이블)와 배치 기록기
+#   라우터와 같은 모듈 이름(utils, audit_log, config)으로 import 해야 같은 모듈을 두 번 읽지 않음
+from config import (
+    AUDIT_QUEUE_MAXSIZE, AUDIT_QUEUE_POLICY, AUDIT_BLOCK_TIMEOUT, AUDIT_BATCH_SIZE, AUDIT_FLUSH_INTERVAL,
+    AUDIT_EXCEL_PATH, AUDIT_DB_PATH,
+)
+# → 큐 크기, 가득 찼을 때 정책, 배치 크기 등은 환경변수로 조정 가능
+from metrics import track
+# → 요청 처리 중 감사 로그(엑셀) 작업에 쓴 시간을 /metrics에 따로 기록 (라우터와 같은 metrics 모듈)
+
+EXCEL_PATH = AUDIT_EXCEL_PATH
+# → 엑셀 파일 경로 (기본: 프로젝트 폴더의 data_log.xlsx). 이제 요청마다 다시 쓰지 않고 export_excel()을 부를 때만 생성됨
+# → 실제 기록이 쌓이는 감사 로그 DB는 AUDIT_DB_PATH (기본: 엑셀 파일과 같은 폴더의 audit_log.db)
+LEGACY_IMPORT_MARKER = "legacy_workbook_imported"
+# → 예전 엑셀(data_log.xlsx)의 기록을 감사 로그 DB로 옮겼다는 표시 (한 번만 가져오기 위해)
+
+SHEET_COLUMNS = {
+    "Users": ["id", "username", "email", "password", "created_at"],
+    # → Users 시트: 회원 정보(id, 이름, 이메일, 비밀번호, 가입일)
+    "LoginHistory": ["id", "user_id", "login_time"],
+    # → LoginHistory 시트: 로그인 기록(id, 사용자id, 로그인 시간)
+    "Comments": ["id", "post_id", "user_id", "content", "create_date"],
+    # → Comments 시트: 댓글 기록(id, 게시글id, 작성자id, 내용, 작성일)
+}
+
+audit_store = AuditLogStore(AUDIT_DB_PATH)
+audit_writer = AuditLogWriter(
+    audit_store,
+    batch_size=AUDIT_BATCH_SIZE,          # 이만큼 모이면 저장
+    flush_interval=AUDIT_FLUSH_INTERVAL,  # 또는 이 시간(초)이 지나면 저장
+    maxsize=AUDIT_QUEUE_MAXSIZE,          # 큐 최대 길이
+    policy=AUDIT_QUEUE_POLICY,            # 큐가 가득 찼을 때 drop / block / spill
+    block_timeout=AUDIT_BLOCK_TIMEOUT,
+)
+atexit.register(audit_writer.stop)
+# → 종료 시 남은 이벤트를 모두 저장 (lifespan에서 먼저 stop하면 아무 일도 안 함)
+
+_initialized = False
+_init_lock = threading.Lock()
+# → import 할 때는 아무 작업도 하지 않고, 서버 시작(lifespan) 또는 처음 기록할 때 한 번만 초기화
+
+# 1. 감사 로그 초기화
+def init_excel():
+    # → 서버 시작(lifespan) 시 실행됨. (이름은 기존 호출부 호환을 위해 유지)
+    #   감사 로그 테이블이 없으면 만들고, 기록 스레드를 시작함. 여러 번 불러도 테이블 확인은 한 번만
+    global _initialized
+    with _init_lock:
+        if not _initialized:
+            audit_store.init()
+            import_legacy_workbook()
+            _initialized = True
+            print("감사 로그 초기화 완료")
+    audit_writer.start()
+
+def _legacy_events(path):
+    # → 예전 방식으로 쌓인 엑셀 시트 행을 감사 로그 이벤트 (sheet, user_id, payload, created_at)로 변환
+    from openpyxl import load_workbook
+    wb = load_workbook(path, read_only=True)
+    try:
+        for sheet in SHEET_COLUMNS:
+            if sheet not in wb.sheetnames:
+                continue
+            rows = wb[sheet].iter_rows(values_only=True)
+            header = next(rows, None) or ()
+            for values in rows:
+                row = dict(zip(header, values))
+                if all(value is None for value in row.values()):
+                    continue  # 빈 줄
+                created_at = row.get("login_time" if sheet == "LoginHistory" else "create_date" if sheet == "Comments" else "created_at")
+                if isinstance(created_at, str):
+                    created_at = datetime.fromisoformat(created_at)
+                created_at = created_at or datetime.now()
+                if sheet == "Users":
+                    yield sheet, row.get("id"), {"username": row.get("username"), "email": row.get("email"), "password": row.get("password")}, created_at
+                elif sheet == "LoginHistory":
+                    yield sheet, row.get("user_id"), {}, created_at
+                else:
+                    yield sheet, row.get("user_id"), {"post_id": row.get("post_id"), "content": row.get("content")}, created_at
+    finally:
+        wb.close()
+
+def import_legacy_workbook(path=EXCEL_PATH):
+    # → 감사 로그 DB를 쓰기 전에 data_log.xlsx에 쌓여 있던 Users/LoginHistory/Comments 행을 한 번만 옮김
+    #   (옮기지 않으면 처음 export_excel()을 할 때 엑셀이 새 기록만으로 덮어써져 예전 기록이 사라짐)
+    #   옮긴 뒤에는 표시(LEGACY_IMPORT_MARKER)가 남아서 다시 읽지 않음
+    #   파일을 찾지 못하면 표시를 남기지 않음 → 경로(AUDIT_EXCEL_PATH)를 고친 뒤 다시 시작하면 그때 가져옴
+    if audit_store.has_marker(LEGACY_IMPORT_MARKER):
+        return
+    if not os.path.exists(path):
+        return
+    try:
+        events = list(_legacy_events(path))
+    except Exception as e:
+        # → 읽지 못하면 표시를 남기지 않음 (다음 시작 때 다시 시도, 그 전까지 export_excel은 이 파일을 덮어쓰지 않음)
+        print(f"예전 엑셀 기록 가져오기 실패: {e}")
+        return
+    imported = audit_store.import_once(LEGACY_IMPORT_MARKER, events)
+    if imported:
+        print(f"예전 엑셀 기록 {imported}건을 감사 로그로 가져옴: {path}")
+
+def _ensure_init():
+    # → lifespan 없이 쓰는 경우(스크립트, 테스트용 앱)를 위해 처음 기록할 때 초기화
+    if not _initialized:
+        init_excel()
+
+def start_audit_log():
+    # → 서버 시작(lifespan) 시 기록 스레드 시작
+    audit_writer.start()
+
+def stop_audit_log():
+    # → 서버 종료(lifespan) 시 큐를 모두 비우고 기록 스레드 종료
+    audit_writer.stop()
+
+def audit_stats():
+    # → 큐 길이, 저장 지연, 버려진 이벤트 수 등 모니터링용 카운터
+    return audit_writer.stats()
 
 # 2. 사용자 등록
-def register_user(username, email, password):  
-    # → 회원가입 시 실행되는 함수. 새 사용자를 Users 시트에 추가함
-    df = pd.read_excel(EXCEL_PATH, sheet_name="Users")  
-    # → 엑셀의 Users 시트를 읽어서 DataFrame 형태로 저장
-    new_id = df['id'].max() + 1 if not df.empty else 1  
-    # → 기존 데이터가 있으면 마지막 id값 +1을 새 ID로 사용
-    #   데이터가 없으면 첫 번째 유저는 id = 1로 시작
-    df = pd.concat([df, pd.DataFrame([{
-        "id": new_id,
-        "username": username,
-        "email": email,
-        "password":  hash_password(password),
-        "created_at": datetime.now()
-    }])], ignore_index=True)  
-    # → 새로운 사용자 정보를 기존 데이터프레임에 한 줄 추가함. 
-    #   created_at은 현재 시간으로 자동 기록됨
-    with pd.ExcelWriter(EXCEL_PATH, mode="a", engine="openpyxl", if_sheet_exists="replace") as writer:  
-        # → 엑셀 쓰기 모드. (a: append지만, 시트 교체 옵션 사용)
-        df.to_excel(writer, sheet_name="Users", index=False)  
-        # → Users 시트를 새로운 DataFrame 내용으로 교체 저장
-    print(f"사용자 등록 완료: {username}")  
-    # → 등록 성공 메시지 출력.
+def register_user(username, email, hashed_password, user_id=None):
+    # → 회원가입 시 실행되는 함수. Users 이벤트를 큐에 넣고 바로 반환함
+    #   hashed_password는 API에서 이미 해싱한 값을 그대로 받음 (bcrypt를 두 번 돌리지 않음)
+    #   user_id를 넘기면 DB의 사용자 id가 엑셀 id로 사용됨
+    _ensure_init()
+    with track("audit"):
+        audit_writer.append("Users", user_id, {
+            "username": username,
+            "email": email,
+            "password": hashed_password,
+        })
+        print(f"사용자 등록 완료: {username}")
 
 # 3. 로그인 기록 저장
-def save_login_history(user_id):  
+def save_login_history(user_id):
     # → 사용자가 로그인할 때마다 기록을 남기는 함수
-    df = pd.read_excel(EXCEL_PATH, sheet_name="LoginHistory")  
-    # → LoginHistory 시트를 읽음
-    new_id = df['id'].max() + 1 if not df.empty else 1  
-    # → 새 기록의 ID를 설정. (기존이 있으면 +1)
-    df = pd.concat([df, pd.DataFrame([{
-        "id": new_id,
-        "user_id": user_id,
-        "login_time": datetime.now()
-    }])], ignore_index=True)  
-    # → 새로운 로그인 기록 한 줄 추가
-    with pd.ExcelWriter(EXCEL_PATH, mode="a", engine="openpyxl", if_sheet_exists="replace") as writer:  
-        # → 시트를 교체 저장
-        df.to_excel(writer, sheet_name="LoginHistory", index=False)
-    print(f"로그인 기록 저장 완료: user_id={user_id}")  
-    # → 콘솔에 완료 메시지 출력
+    _ensure_init()
+    with track("audit"):
+        audit_writer.append("LoginHistory", user_id, {})
+        print(f"로그인 기록 저장 완료: user_id={user_id}")
 
 # 4. 댓글 추가
-def add_comment(post_id, user_id, content):  
+def add_comment(post_id, user_id, content):
     # → 게시물에 댓글을 추가하는 함수
-    df = pd.read_excel(EXCEL_PATH, sheet_name="Comments")  
-    # → Comments 시트를 읽어서 DataFrame으로 저장
-    new_id = df['id'].max() + 1 if not df.empty else 1  
-    # → 새 댓글의 ID를 생성
-    df = pd.concat([df, pd.DataFrame([{
-        "id": new_id,
-        "post_id": post_id,
-        "user_id": user_id,
-        "content": content,
-        "create_date": datetime.now()
-    }])], ignore_index=True)  
-    # → 새로운 댓글을 DataFrame에 추가
-    #   작성 시각은 datetime.now()로 기록됨
-    with pd.ExcelWriter(EXCEL_PATH, mode="a", engine="openpyxl", if_sheet_exists="replace") as writer:  
-        # → 엑셀에 시트를 교체 저쟝
-        df.to_excel(writer, sheet_name="Comments", index=False)
-    print(f"댓글 추가 완료: post_id={post_id}, user_id={user_id}")  
-    # → 댓글 작성 완료 메시지 출력
+    _ensure_init()
+    with track("audit"):
+        audit_writer.append("Comments", user_id, {"post_id": post_id, "content": content})
+        print(f"댓글 추가 완료: post_id={post_id}, user_id={user_id}")
 
 # 5. 사용자 삭제 (안전한 삭제)
-def delete_user_safe(username: str, email: str, password: str):  
-    # → 회원 삭제 함수. 이름, 이메일, 비밀번호가 모두 일치해야 삭제 가능  
+def delete_user_safe(username: str, email: str, password: str):
+    # → 회원 삭제 함수. 이름, 이메일, 비밀번호가 모두 일치해야 삭제 가능
     #   단순 ID 입력만으로 다른 계정을 지우는 걸 방지함
-    df_users = pd.read_excel(EXCEL_PATH, sheet_name="Users")  
-    # → Users 시트 읽기
-    user_row = df_users[(df_users['username'] == username) & (df_users['email'] == email)]  
-    # → 입력한 이름과 이메일이 모두 일치하는 사용자 행을 찾음
-    if user_row.empty:  
-        # → 조건에 맞는 유저가 없을 경우
-        raise ValueError("사용자가 존재하지 않습니다.")  
-        # → 예외 발생시켜 API 쪽에서 에러 메시지를 보여줄 수 있음
-    if user_row.iloc[0]['password'] != password:  
-        # → 비밀번호가 다를 경우
-        raise ValueError("비밀번호가 일치하지 않습니다.")  
-        # → 비밀번호 불일치 예외 발생
-    user_id = user_row.iloc[0]['id']  
-    # → 삭제할 사용자의 고유 ID를 가져옴
-    df_users = df_users[df_users['id'] != user_id]  
-    # → Users 시트에서 해당 ID를 가진 유저 제거
-    df_login = pd.read_excel(EXCEL_PATH, sheet_name="LoginHistory")  
-    # → LoginHistory 시트 읽
-    df_login = df_login[df_login['user_id'] != user_id]  
-    # → 해당 유저의 로그인 기록 삭제
-    df_comments = pd.read_excel(EXCEL_PATH, sheet_name="Comments")  
-    # → Comments 시트 읽기
-    df_comments = df_comments[df_comments['user_id'] != user_id]  
-    # → 해당 유저의 댓글 모두 삭제
-    with pd.ExcelWriter(EXCEL_PATH, engine="openpyxl", mode="a", if_sheet_exists="replace") as writer:  
-        # → 엑셀 저장 (각 시트를 교체하면서 전체 저장)
-        df_users.to_excel(writer, sheet_name="Users", index=False)
-        df_login.to_excel(writer, sheet_name="LoginHistory", index=False)
-        df_comments.to_excel(writer, sheet_name="Comments", index=False)
-    print(f"계정 삭제 완료: {username}")  
-    # → 콘솔에 삭제 완료 메시지 출력
-
-# 6. 초기 실행
-init_excel()  
-# → 프로그램 실행 시 자동으로 엑셀을 초기화
-#   시트가 없으면 새로 만들고, 이미 있으면 그대로 둠
+    _ensure_init()
+    audit_writer.flush()
+    # → 아직 큐에 남아있는 기록까지 저장한 뒤 조회
+    user_rows = audit_store.find_users(username, email)
+    if not user_rows:
+        raise ValueError("사용자가 존재하지 않습니다.")
+    event_id, user_id, payload = user_rows[0]
+    if not verify_password(password, payload["password"]):
+        # → 저장된 값은 해시이므로 verify_password로 비교
+        raise ValueError("비밀번호가 일치하지 않습니다.")
+    audit_store.delete_user([row[0] for row in user_rows], user_id if user_id is not None else event_id)
+    # → 사용자 행과 해당 사용자의 로그인 기록/댓글을 한 번에 삭제
+    print(f"계정 삭제 완료: {username}")
+
+def delete_user_records(user_id):
+    # → DB에서 계정을 삭제한 뒤 감사 로그에 남은 해당 사용자의 기록(회원 정보, 로그인, 댓글)을 삭제
+    #   비밀번호 확인은 DB 기준으로 이미 끝났으므로 여기서는 user_id로만 지움
+    _ensure_init()
+    with track("audit"):
+        audit_writer.flush()
+        # → 아직 큐에 남아있는 기록까지 저장한 뒤 삭제
+        deleted = audit_store.delete_user_events(user_id)
+    print(f"감사 로그 계정 기록 삭제 완료: user_id={user_id}, {deleted}건")
+    return deleted
+
+# 6. 엑셀 내보내기
+def export_excel(path=EXCEL_PATH):
+    # → 감사 로그를 읽어 엑셀 파일을 새로 만든다. (요청 시에만 실행)
+    from openpyxl import Workbook
+    # → openpyxl은 엑셀 파일(워크북)을 직접 다루는 라이브러리임. import가 무거워서 내보낼 때만 불러옴
+    #   write_only 모드로 열면 행을 하나씩 흘려 쓰기 때문에 행 수가 많아도 메모리가 일정함
+    _ensure_init()
+    if os.path.exists(path) and not audit_store.has_marker(LEGACY_IMPORT_MARKER):
+        # → 아직 가져오지 않은 예전 기록이 있을 수 있는 파일은 덮어쓰지 않음 (파일이 없으면 잃을 것도 없음)
+        raise RuntimeError(f"예전 엑셀 기록을 아직 가져오지 못해 덮어쓸 수 없습니다: {path}")
+    audit_writer.flush()
+    wb = Workbook(write_only=True)
+    for sheet, columns in SHEET_COLUMNS.items():
+        ws = wb.create_sheet(sheet)
+        ws.append(columns)
+        for event_id, user_id, payload, created_at in audit_store.iter_events(sheet):
+            if sheet == "Users":
+                ws.append([user_id if user_id is not None else event_id, payload["username"], payload["email"], payload["password"], created_at])
+            elif sheet == "LoginHistory":
+                ws.append([event_id, user_id, created_at])
+            else:
+                ws.append([event_id, payload["post_id"], user_id, payload["content"], created_at])
+    with track("audit"):
+        replace_atomically(path, wb.save)
+    # → 파일 잠금을 잡고 임시 파일에 다 쓴 뒤 교체하므로 중간에 실패해도 기존 파일이 깨지지 않고,
+    #   여러 워커가 동시에 내보내도 한 번에 하나씩 교체됨
+    print(f"엑셀 내보내기 완료: {path}")
+    return path
@@ -3,12 +3,16 @@
 # DB에 생성된 테이블
 # C:\pro>python check_users.py
 
+import os
 import sys
 # 파이썬 시스템 모듈 import
 # sys.path를 통해 모듈 검색 경로를 추가할 수 있음
 
-sys.path.append(r"C:\Users\rudal\OneDrive\바탕 화면\por")
-# 프로젝트 폴더를 모듈 검색 경로에 추가
+ROOT = os.path.dirname(os.path.abspath(__file__))
+for sub in ("", "app/core", "app/database", "app/api"):
+    sys.path.append(os.path.join(ROOT, sub))
+# 프로젝트 폴더(이 파일이 있는 폴더)와 라우터가 쓰는 모듈 폴더를 모듈 검색 경로에 추가
+# (라우터는 from database import ... 처럼 폴더 이름 없이 import 함)
 
 from fastapi import FastAPI
 # FastAPI 프레임워크의 핵심 클래스 import
@@ -19,24 +23,51 @@ from app.api.posts import router as posts_router
 # posts.py에서 게시글 router 가져와 이름을 posts_router로 변경
 from app.api.comments import router as comments_router
 # comments.py에서 댓글 router 가져와 이름을 comments_router로 변경
-from app.database import Base, engine # 모든 ORM 모델 테이블을 DB에 생성
-
-from app.database.models import User, PostModel, Comment, LoginHistory  # ORM 모델(User, Post, Comment, LoginHistory) 임포트
-from loge_excel import init_excel, register_user, save_login_history, add_comment
-
+from app.api.admin import router as admin_router
+# admin.py에서 관리자 router(엑셀 내보내기) 가져오기
+from database import dispose_engines, describe_database  # 라우터가 쓰는 것과 같은 database 모듈 (커넥션 풀 정리, 설정 확인용)
+from migrations import schema_status, upgrade  # 스키마 버전 확인, 마이그레이션 (app/scripts/migrate.py와 같은 목록)
+from config import MIGRATE_ON_STARTUP  # 시작할 때 마이그레이션을 실행할지 여부 (기본값: 확인만)
+from login_history import start_login_history, stop_login_history, login_history_stats  # users.py가 쓰는 것과 같은 로그인 기록 기록기
+from metrics import MetricsMiddleware, render_metrics  # 요청/SQL/bcrypt/감사 로그 시간 측정 (database.py, utils.py와 같은 metrics 모듈)
+from rate_limit import LoadShedMiddleware, rate_limit_stats  # 과부하 때 쓰기 요청 503, 라우터가 쓰는 것과 같은 요청 수 제한 저장소
+from cache import post_cache_stats  # posts/comments 라우터가 쓰는 것과 같은 게시글 캐시
+from utils import shutdown_password_executor, auth_cache_stats  # users.py가 쓰는 것과 같은 utils 모듈 (비밀번호 스레드풀 정리, 인증 캐시 통계)
+from loge_excel import init_excel, stop_audit_log, audit_stats  # import만으로는 아무 작업도 하지 않음 (초기화는 lifespan에서)
+
+from fastapi.responses import PlainTextResponse
 from fastapi.templating import Jinja2Templates
 from fastapi.staticfiles import StaticFiles
 from fastapi import Request
 
 from fastapi import Form
-
-init_excel()
-
-Base.metadata.create_all(bind=engine)  # DB에 등록된 모든 ORM 모델의 테이블 생성
-
+from contextlib import asynccontextmanager
+from starlette.concurrency import run_in_threadpool
+
+
+# 서버 시작/종료 시 실행할 작업
+# import 할 때는 파일/DB 작업을 하지 않으므로 워커 부팅, --reload 재시작이 빠름
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if MIGRATE_ON_STARTUP:
+        await run_in_threadpool(upgrade)  # 개발용: 밀린 마이그레이션 적용 (여러 워커면 잠금을 잡은 하나만 실행)
+    status = await run_in_threadpool(schema_status)
+    if status["current"] < status["latest"]:
+        # 예전 스키마로 요청을 받으면 500이 나므로 시작하지 않음 (헬스 체크를 통과한 채 잘못 배포되는 것 방지)
+        raise RuntimeError(f"스키마 버전이 최신이 아닙니다: {status['current']} (최신 {status['latest']}) → python app/scripts/migrate.py 실행 필요")
+    await run_in_threadpool(init_excel)  # 감사 로그 테이블 확인 + 기록 스레드 시작
+    start_login_history()  # 로그인 기록 저장 스레드 시작
+    print("DB 설정:", await run_in_threadpool(describe_database))  # 실제 적용된 DB 설정(풀, PRAGMA) 출력
+    yield
+    await run_in_threadpool(stop_audit_log)  # 큐에 남은 감사 로그를 모두 저장한 뒤 종료
+    await run_in_threadpool(stop_login_history)  # 큐에 남은 로그인 기록을 모두 저장한 뒤 종료 (DB 정리 전에)
+    await run_in_threadpool(shutdown_password_executor)  # 비밀번호 작업 전용 스레드풀 정리
+    await dispose_engines()  # DB 커넥션 풀 정리
 
 # FastAPI 앱 생성
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
+app.add_middleware(LoadShedMiddleware)  # 처리 중인 요청 수/DB 연결 대기 시간이 기준을 넘으면 쓰기 요청을 바로 503
+app.add_middleware(MetricsMiddleware)  # 라우트별 지연 시간, 요청별 SQL 수/시간, 느린 요청 로그 (나중에 추가 → 바깥쪽, 503도 기록)
 
 templates = Jinja2Templates(directory="templates")
 app.mount("/static", StaticFiles(directory="static"), name="static")
@@ -76,7 +107,37 @@ def change_password_page(request: Request):
 app.include_router(users_router)      # 사용자 관련 API
 app.include_router(posts_router)      # 게시글 관련 API
 app.include_router(comments_router)   # 댓글 관련 API
-app.include_router(users_router)      # 계정삭제 API   
+app.include_router(admin_router)      # 관리자 API (엑셀 내보내기)
+# 감사 로그 상태 조회 (큐 길이, 저장 지연, 버려진 이벤트 수)
+@app.get("/audit/stats")
+def get_audit_stats():
+    return audit_stats()
+
+# 로그인 기록 저장 상태 조회 (큐 길이, 배치 저장 시간, 버려진 기록 수)
+@app.get("/login-history/stats")
+def get_login_history_stats():
+    return login_history_stats()
+
+# Prometheus 형식 지표 (요청 지연 히스토그램, 요청별 SQL 수/시간, bcrypt/감사 로그 작업 시간)
+@app.get("/metrics")
+def get_metrics():
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+# 인증 캐시 상태 조회 (토큰/사용자 캐시 hit, miss)
+@app.get("/auth/cache-stats")
+def get_auth_cache_stats():
+    return auth_cache_stats()
+
+# 게시글 조회 캐시 상태 (hit 비율, 크기, eviction, DB 조회 횟수)
+@app.get("/cache/stats")
+def get_cache_stats():
+    return {"posts": post_cache_stats()}
+
+# 요청 수 제한 저장소 상태 (사용 여부, 저장소 종류, 기억 중인 키 수)
+@app.get("/rate-limit/stats")
+def get_rate_limit_stats():
+    return rate_limit_stats()
+
 # 루트 경로 API
 @app.get("/")
 def root():